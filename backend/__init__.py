@@ -95,6 +95,12 @@ def create_app():
     app.register_blueprint(analysis_bp, url_prefix='/api/analysis')
     app.register_blueprint(image_bp, url_prefix='/api/image')
 
+    # Warm the minimax search process pool so bot moves never fork per request
+    from backend.config import EngineConfig
+    if EngineConfig.MINIMAX_WORKERS > 1:
+        from backend.engines.parallel import warm_pool
+        warm_pool(EngineConfig.MINIMAX_WORKERS)
+
     # Only register auth if DB is configured
     if is_db_configured:
         try:
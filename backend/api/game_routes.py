@@ -110,12 +110,16 @@ def bot_move() -> Response:
     """
     Request bot to calculate and execute best move.
     Automatically selects appropriate engine based on environment.
+    Optional 'ponder' (with 'game_id') keeps the engine thinking on the expected reply.
     """
     data = request.get_json()
     fen = data.get('fen')
     engine_choice = data.get('engine', 'stockfish')
     skill_level = data.get('skill_level', EngineConfig.DEFAULT_SKILL_LEVEL)
     time_limit_raw = data.get('time_limit', '0')
+    search_id = data.get('search_id')
+    game_id = data.get('game_id')
+    ponder = bool(data.get('ponder', False))
 
     if not fen:
         return jsonify({
@@ -132,7 +136,10 @@ def bot_move() -> Response:
             fen=fen,
             engine_choice=engine_choice,
             skill_level=skill_level,
-            time_limit=time_limit_sec
+            time_limit=time_limit_sec,
+            search_id=search_id,
+            game_id=game_id,
+            ponder=ponder
         )
 
         if engine_results.get('success') and engine_results.get('best_move') != ChessConfig.DEFAULT_BEST_MOVE:
@@ -160,6 +167,27 @@ def bot_move() -> Response:
         }), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+@game_bp.route('/cancel_search', methods=['POST'])
+def cancel_search() -> Response:
+    """
+    Abort a running bot search by its client-provided search_id.
+    The pending bot_move request then returns the best move found so far.
+    """
+    data = request.get_json(silent=True) or {}
+    search_id = data.get('search_id')
+
+    if not search_id:
+        return jsonify({
+            'success': False, 
+            'error': ErrorMessages.SEARCH_ID_REQUIRED
+        }), HTTPStatus.BAD_REQUEST
+
+    return jsonify({
+        'success': True,
+        'cancelled': engine_service.cancel_search(search_id)
+    })
+
+
 # ==================== POSITION EVALUATION ====================
 
 @game_bp.route('/evaluate', methods=['POST'])
@@ -168,9 +196,11 @@ def get_engine_score() -> Response:
     Quick position evaluation for advantage bar.
     Uses time-boxed search for instant response.
     Automatically uses Minimax on production to avoid RAM issues.
+    Optional 'multipv' (1..MAX_MULTIPV) returns ranked candidate moves from the same search.
     """
     data = request.get_json()
     fen = data.get('fen')
+    multipv = data.get('multipv', 1)
 
     if not fen:
         return jsonify({
@@ -180,7 +210,7 @@ def get_engine_score() -> Response:
 
     try:
         # Get evaluation from appropriate engine (guaranteed format)
-        engine_results = engine_service.evaluate_position(fen)
+        engine_results = engine_service.evaluate_position(fen, multipv)
         
         return jsonify({
             'success': True,
@@ -198,16 +228,40 @@ def get_engine_score() -> Response:
         }), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+# ==================== ENGINE STATISTICS ====================
+
+@game_bp.route('/engine_stats', methods=['GET'])
+def engine_stats() -> Response:
+    """
+    Debug view of Minimax search statistics aggregated in this worker process
+    (nodes, NPS, depth, TT hit rate, move ordering quality, eval/movegen time share),
+    Stockfish pool health / queue wait times and the position cache hit rate.
+    """
+    return jsonify({
+        'success': True,
+        'stats': engine_service.get_engine_stats()
+    })
+
+
 # ==================== CACHE MANAGEMENT ====================
 
 @game_bp.route('/clear_cache', methods=['POST'])
 def api_clear_cache() -> Response:
     """
-    Clear engine transposition table.
+    Clear engine caches.
+    With a 'game_id', only that game's engine session is dropped (other games keep
+    their history and hash tables); without one, the shared transposition table and the
+    position cache are cleared.
     Called when starting new game to avoid stale data.
     """
+    data = request.get_json(silent=True) or {}
+    game_id = data.get('game_id')
     try:
-        clear_transposition_table()
+        if game_id:
+            engine_service.reset_session(game_id)
+        else:
+            clear_transposition_table()
+            engine_service.position_cache.clear()
         return jsonify({
             'success': True, 
             'message': SuccessMessages.CACHE_CLEARED
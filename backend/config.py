@@ -34,6 +34,50 @@ class EngineConfig:
     FALLBACK_MAX_DEPTH = 10 # Increased from 8
     FALLBACK_TIME_LIMIT = 0.3 # Increased from 0.1
     
+    # Minimax Transposition Table (fixed size, in MB)
+    MINIMAX_HASH_MB = int(os.environ.get("MINIMAX_HASH_MB", 16))
+    
+    # Minimax worker processes (>1 enables a persistent search process pool)
+    MINIMAX_WORKERS = int(os.environ.get("MINIMAX_WORKERS", 1))
+    # Multi-process mode: 'smp' (Lazy SMP, shared-memory TT) or 'root' (root-move splitting)
+    MINIMAX_PARALLEL_MODE = os.environ.get("MINIMAX_PARALLEL_MODE", "smp")
+    # Hard node budget per Minimax search (0 = unlimited, time limit only)
+    MINIMAX_NODE_LIMIT = int(os.environ.get("MINIMAX_NODE_LIMIT", 0))
+    # Print a one-line stats summary after every Minimax search
+    MINIMAX_LOG_STATS = os.environ.get("MINIMAX_LOG_STATS", "0") == "1"
+    
+    # Polyglot opening book (empty = backend/engines/bin/gm2001.bin)
+    OPENING_BOOK_PATH = os.environ.get("OPENING_BOOK_PATH", "")
+    
+    # Syzygy tablebase directory (.rtbw/.rtbz files; empty = tablebase probing disabled)
+    SYZYGY_PATH = os.environ.get("SYZYGY_PATH", "")
+    
+    # Per-game engine sessions (board history + private hash table), LRU-evicted
+    MAX_ENGINE_SESSIONS = int(os.environ.get("MAX_ENGINE_SESSIONS", 16))
+    ENGINE_SESSION_HASH_MB = int(os.environ.get("ENGINE_SESSION_HASH_MB", 4))
+    
+    # Stockfish process pool (local engine): processes, per-process Threads / Hash (MB)
+    STOCKFISH_POOL_SIZE = int(os.environ.get("STOCKFISH_POOL_SIZE", 2))
+    STOCKFISH_THREADS = int(os.environ.get("STOCKFISH_THREADS", 1))
+    STOCKFISH_HASH_MB = int(os.environ.get("STOCKFISH_HASH_MB", 16))
+    # Max seconds to wait for a free Stockfish process before falling back to Minimax
+    STOCKFISH_CHECKOUT_TIMEOUT = float(os.environ.get("STOCKFISH_CHECKOUT_TIMEOUT", 1.0))
+    
+    # Pondering (opt-in per request): search the predicted reply while the player thinks
+    PONDER_ENABLED = os.environ.get("PONDER_ENABLED", "1") == "1"
+    # CPU budget: seconds per ponder search and ponder searches running at once per process
+    PONDER_TIME_LIMIT = float(os.environ.get("PONDER_TIME_LIMIT", 10.0))
+    MAX_PONDER_TASKS = int(os.environ.get("MAX_PONDER_TASKS", 1))
+    
+    # Position result cache (eval bar, chat analysis, full-strength moves): LRU size, TTL (s)
+    POSITION_CACHE_SIZE = int(os.environ.get("POSITION_CACHE_SIZE", 4096))
+    POSITION_CACHE_TTL = float(os.environ.get("POSITION_CACHE_TTL", 3600))
+    # Optional sqlite file shared by all worker processes (empty = per-process cache only)
+    POSITION_CACHE_SQLITE_PATH = os.environ.get("POSITION_CACHE_SQLITE_PATH", "")
+    
+    # MultiPV: maximum number of candidate lines a client may request
+    MAX_MULTIPV = 5
+    
     # Time Conversion
     MINUTES_TO_SECONDS = 60
 
@@ -233,6 +277,7 @@ class ErrorMessages:
     FEN_REQUIRED = "FEN is required"
     FEN_REQUIRED_DOT = "FEN is required."
     BOT_NO_MOVE = "Bot could not find a move (Game Over?)"
+    SEARCH_ID_REQUIRED = "search_id is required."
     
     # Analysis Routes
     MISSING_FEN_OR_QUESTION = "Thiếu FEN hoặc câu hỏi người dùng."
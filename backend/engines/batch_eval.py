@@ -0,0 +1,157 @@
+"""
+Module: batch_eval.py
+Đánh giá tĩnh hàng loạt nhiều vị trí cùng lúc bằng NumPy (duyệt cả ván, chấm điểm các nước ứng viên).
+
+- N bàn cờ -> mảng bitplane (N, 12, 64): 12 bitboard mỗi vị trí được bung bit bằng np.unpackbits.
+- Material + PST = một phép nhân ma trận (N, 768) x (768,) với bảng PIECE_SQUARE_SCORES của minimax
+  (float32 qua BLAS; tổng điểm nhỏ hơn nhiều so với 2^24 nên vẫn chính xác tuyệt đối).
+- Cấu trúc Tốt và an toàn Vua cũng tính trên bitplane: đếm Tốt theo cột, mặt nạ Tốt thông /
+  Tốt che chắn của minimax dạng ma trận (64, 64).
+- Chỉ còn kiểm tra kết thúc ván (cần sinh nước đi) là duyệt từng vị trí; Tempo và dấu Negamax
+  cộng sau để kết quả khớp chính xác `evaluate_board`.
+"""
+
+import chess
+import numpy as np
+
+from backend.engines import minimax
+
+# Thứ tự 12 bitplane: Tốt..Vua của Trắng, rồi Tốt..Vua của Đen
+PLANES = [(piece_type, color) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+
+def _build_weights():
+    """Bảng điểm Material + PST dạng (12 * 64,), cùng thứ tự với bitplane."""
+    weights = np.array([minimax.PIECE_SQUARE_SCORES[plane] for plane in PLANES], dtype=np.float32)
+    return weights.reshape(-1)
+
+
+PST_WEIGHTS = _build_weights()
+
+# Chỉ số bitplane theo màu, dùng cho cấu trúc Tốt / an toàn Vua
+PAWN_PLANES = {color: PLANES.index((chess.PAWN, color)) for color in chess.COLORS}
+QUEEN_PLANES = {color: PLANES.index((chess.QUEEN, color)) for color in chess.COLORS}
+KING_PLANES = {color: PLANES.index((chess.KING, color)) for color in chess.COLORS}
+
+
+def _unpack_bitboards(bitboards):
+    """Mảng bitboard (..., ) -> mảng bit uint8 (..., 64), bit 0 là ô a1."""
+    raw = np.asarray(bitboards, dtype='<u8')
+    return np.unpackbits(raw[..., None].view(np.uint8), axis=-1, bitorder='little')
+
+
+def _build_pawn_matrices():
+    """
+    Ma trận từ các mặt nạ của minimax:
+    - ADJACENT[f, g] = 1 nếu cột g kề cột f.
+    - PASSED[color][t, s] = 1 nếu ô t nằm trong vùng Tốt thông của Tốt ở ô s
+      (Tốt đối phương x PASSED = số Tốt chặn trước từng ô).
+    - PASSED_BONUS[color][s]: thưởng Tốt thông theo hàng của ô s.
+    - SHIELD[color][k]: các ô che chắn khi Vua ở ô k.
+    """
+    adjacent = np.array(
+        [[1 if minimax.ADJACENT_FILES[f] & chess.BB_FILES[g] else 0 for g in range(8)] for f in range(8)],
+        dtype=np.int64
+    )
+    passed, bonus, shield = {}, {}, {}
+    for color in chess.COLORS:
+        passed[color] = _unpack_bitboards(minimax.PASSED_MASKS[color]).T.astype(np.float32)
+        bonus[color] = np.array([
+            minimax.PASSED_PAWN_BONUS[chess.square_rank(sq) if color == chess.WHITE else 7 - chess.square_rank(sq)]
+            for sq in chess.SQUARES
+        ], dtype=np.int64)
+        shield[color] = _unpack_bitboards(minimax.SHIELD_MASKS[color])
+    return adjacent, passed, bonus, shield
+
+
+ADJACENT_MATRIX, PASSED_MATRICES, PASSED_BONUS, SHIELD_MATRICES = _build_pawn_matrices()
+
+
+def board_bitplanes(boards):
+    """
+    Chuyển danh sách bàn cờ thành mảng bitplane uint8 (N, 12, 64).
+    planes[i, p, sq] = 1 nếu ô `sq` của vị trí i có quân thuộc plane p.
+    """
+    n = len(boards)
+    # Đọc thẳng 6 bitboard loại quân và 2 bitboard màu, ghép (AND) trên NumPy
+    types = np.array(
+        [(b.pawns, b.knights, b.bishops, b.rooks, b.queens, b.kings) for b in boards], dtype='<u8'
+    ).reshape(n, 6)
+    colors = np.array(
+        [(b.occupied_co[chess.WHITE], b.occupied_co[chess.BLACK]) for b in boards], dtype='<u8'
+    ).reshape(n, 2)
+    bitboards = (colors[:, :, None] & types[:, None, :]).reshape(n, len(PLANES))
+    # Mỗi bitboard -> 8 byte little-endian -> 64 bit, bit 0 là ô a1
+    return _unpack_bitboards(bitboards)
+
+
+def batch_material_pst(boards, planes=None):
+    """Điểm Material + PST (góc nhìn của Trắng) cho N vị trí, khớp `minimax.material_pst_score`."""
+    if not boards:
+        return np.zeros(0, dtype=np.int64)
+    if planes is None:
+        planes = board_bitplanes(boards)
+    scores = planes.reshape(len(boards), -1).astype(np.float32) @ PST_WEIGHTS
+    return np.rint(scores).astype(np.int64)
+
+
+def _pawn_side_scores(own, enemy, color):
+    """Điểm cấu trúc Tốt của một bên cho N vị trí (khớp `minimax._pawn_side_score`)."""
+    n = len(own)
+    files = own.reshape(n, 8, 8).sum(axis=1, dtype=np.int64)
+    doubled = np.maximum(files - 1, 0).sum(axis=1)
+    isolated = np.where(files @ ADJACENT_MATRIX == 0, files, 0).sum(axis=1)
+    blockers = enemy.astype(np.float32) @ PASSED_MATRICES[color]
+    passed = (blockers == 0) & (own != 0)
+    return (passed @ PASSED_BONUS[color]
+            - minimax.DOUBLED_PAWN_PENALTY * doubled
+            - minimax.ISOLATED_PAWN_PENALTY * isolated)
+
+
+def batch_pawn_structure(planes):
+    """Điểm cấu trúc Tốt (góc nhìn của Trắng) cho N vị trí, khớp `minimax.pawn_structure_score`."""
+    white = planes[:, PAWN_PLANES[chess.WHITE]]
+    black = planes[:, PAWN_PLANES[chess.BLACK]]
+    return _pawn_side_scores(white, black, chess.WHITE) - _pawn_side_scores(black, white, chess.BLACK)
+
+
+def batch_king_safety(planes):
+    """An toàn Vua (góc nhìn của Trắng) cho N vị trí, khớp `minimax.king_safety_score`."""
+    score = np.zeros(len(planes), dtype=np.int64)
+    for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        kings = planes[:, KING_PLANES[color]]
+        # Ô cao nhất có Vua, như bit_length() - 1 trong minimax
+        king_squares = 63 - kings[:, ::-1].argmax(axis=1)
+        active = planes[:, QUEEN_PLANES[not color]].any(axis=1) & kings.any(axis=1)
+        shield = (SHIELD_MATRICES[color][king_squares] & planes[:, PAWN_PLANES[color]]).sum(axis=1, dtype=np.int64)
+        score += sign * minimax.KING_SHIELD_BONUS * np.where(active, shield, 0)
+    return score
+
+
+def batch_evaluate(boards):
+    """
+    Đánh giá N vị trí, khớp chính xác `minimax.evaluate_board` (góc nhìn bên đang đi).
+    Trả về mảng int64 (N,).
+    """
+    boards = list(boards)
+    if not boards:
+        return np.zeros(0, dtype=np.int64)
+    planes = board_bitplanes(boards)
+    scores = batch_material_pst(boards, planes) + batch_pawn_structure(planes) + batch_king_safety(planes)
+
+    # Kết thúc ván cần sinh nước đi nên vẫn kiểm tra từng vị trí
+    sign = np.array([1 if board.turn == chess.WHITE else -1 for board in boards], dtype=np.int64)
+    terminal = np.zeros(len(boards), dtype=bool)
+    terminal_scores = np.zeros(len(boards), dtype=np.int64)
+    for i, board in enumerate(boards):
+        in_check = board.is_check()
+        if not minimax.has_legal_move(board, in_check):
+            terminal[i] = True
+            terminal_scores[i] = -minimax.MATE_SCORE if in_check else 0
+        elif minimax.is_draw_by_rule(board):
+            terminal[i] = True
+
+    # Tempo (theo màu đang đi) rồi đảo dấu Negamax: sign * (score + sign * TEMPO) = sign * score + TEMPO
+    scores = sign * scores + minimax.TEMPO_BONUS
+    return np.where(terminal, terminal_scores, scores)
+
@@ -0,0 +1,240 @@
+"""
+Module: bench.py
+Bộ benchmark cho engine Minimax, dùng để so sánh hiệu năng giữa các commit.
+
+1. Perft: đếm số nút sinh nước trên các vị trí chuẩn và đối chiếu với số đã biết
+   (kiểm tra tính đúng của sinh nước + push/pop của SearchBoard).
+2. Tìm kiếm độ sâu cố định trên bộ EPD đi kèm (bench.epd, kiểu WAC / Bratko-Kopec):
+   số nút, NPS, thời gian đạt độ sâu và số bài giải đúng (nước đi nằm trong `bm`).
+3. Quiescence Search cửa sổ đầy đủ từ mọi vị trí sau một nước của bộ EPD: số nút và
+   qnodes/s (tốc độ hàm đánh giá + sinh nước ăn quân + SEE, không có bảng băm).
+4. Xuất JSON để diff giữa các commit.
+
+Chạy từ thư mục gốc của repo:
+    python -m backend.engines.bench --perft-depth 3 --depth 4 --json bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import chess
+
+from backend.engines import minimax
+from backend.engines.search_board import SearchBoard
+
+DEFAULT_EPD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench.epd")
+
+# (tên, FEN, số nút perft ở độ sâu 1, 2, 3, 4)
+PERFT_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+]
+
+
+def perft(board, depth):
+    """Số nút lá ở độ sâu `depth` (đếm gộp ở độ sâu 1, không push nước cuối)."""
+    if depth <= 1:
+        return board.legal_moves.count() if depth == 1 else 1
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def run_perft(max_depth):
+    """Chạy perft cho mọi vị trí chuẩn tới `max_depth`; mỗi kết quả có cờ `ok` so với số đã biết."""
+    results = []
+    for name, fen, expected in PERFT_POSITIONS:
+        board = SearchBoard(fen)
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'name': name,
+                'depth': depth,
+                'nodes': nodes,
+                'expected': expected[depth - 1],
+                'ok': nodes == expected[depth - 1],
+                'time': round(elapsed, 4),
+                'nps': int(nodes / elapsed) if elapsed > 0 else 0
+            })
+    return results
+
+
+def load_epd(path=DEFAULT_EPD_PATH):
+    """Đọc bộ EPD: [(id, fen, [nước bm dạng UCI])]."""
+    positions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            board, ops = chess.Board.from_epd(line)
+            best_moves = [move.uci() for move in ops.get('bm', [])]
+            positions.append((ops.get('id', f"#{len(positions) + 1}"), board.fen(), best_moves))
+    return positions
+
+
+def run_search(depth, epd_path=DEFAULT_EPD_PATH, time_limit=600.0):
+    """Tìm kiếm độ sâu cố định (bảng băm xóa trước mỗi vị trí) trên bộ EPD."""
+    results = []
+    for position_id, fen, best_moves in load_epd(epd_path):
+        minimax.clear_transposition_table()
+        start = time.perf_counter()
+        result = minimax.find_best_move(fen, max_depth=depth, time_limit=time_limit, skill_level=20)
+        elapsed = time.perf_counter() - start
+        stats = result['stats']
+        nodes = stats['nodes'] + stats['qnodes']
+        results.append({
+            'id': position_id,
+            'move': result['best_move'],
+            'bm': best_moves,
+            'solved': result['best_move'] in best_moves,
+            'score': result['search_score'],
+            'depth': stats['depth'],
+            'nodes': nodes,
+            'time': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0
+        })
+    return results
+
+
+def run_qsearch(epd_path=DEFAULT_EPD_PATH, repeat=3):
+    """
+    Quiescence Search (cửa sổ đầy đủ) từ mọi vị trí sau một nước hợp lệ của bộ EPD.
+    Bộ đệm đánh giá xóa trước mỗi lần chạy; lấy thời gian tốt nhất trong `repeat` lần.
+    """
+    boards = []
+    for _, fen, _ in load_epd(epd_path):
+        board = chess.Board(fen)
+        for move in board.legal_moves:
+            child = board.copy(stack=False)
+            child.push(move)
+            boards.append(child)
+
+    best = None
+    for _ in range(max(1, repeat)):
+        minimax.clear_eval_caches()
+        ctx = minimax.SearchContext()
+        start = time.perf_counter()
+        for board in boards:
+            minimax.quiescence_search(board, -minimax.INFINITY, minimax.INFINITY, ctx)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'positions': len(boards),
+        'qnodes': ctx.qnodes,
+        'time': round(best, 4),
+        'nps': int(ctx.qnodes / best) if best > 0 else 0
+    }
+
+
+def summarize(perft_results, search_results):
+    summary = {}
+    if perft_results:
+        nodes = sum(r['nodes'] for r in perft_results)
+        elapsed = sum(r['time'] for r in perft_results)
+        summary['perft'] = {
+            'ok': all(r['ok'] for r in perft_results),
+            'nodes': nodes,
+            'time': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0
+        }
+    if search_results:
+        nodes = sum(r['nodes'] for r in search_results)
+        elapsed = sum(r['time'] for r in search_results)
+        summary['search'] = {
+            'solved': sum(r['solved'] for r in search_results),
+            'positions': len(search_results),
+            'nodes': nodes,
+            'time_to_depth': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0
+        }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_bench(perft_depth=3, search_depth=4, epd_path=DEFAULT_EPD_PATH, qsearch=True):
+    """Chạy toàn bộ benchmark và trả về báo cáo dạng dict (sẵn sàng ghi JSON)."""
+    perft_results = run_perft(perft_depth) if perft_depth > 0 else []
+    search_results = run_search(search_depth, epd_path) if search_depth > 0 else []
+    summary = summarize(perft_results, search_results)
+    if qsearch:
+        summary['qsearch'] = run_qsearch(epd_path)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'python_chess': chess.__version__,
+            'perft_depth': perft_depth,
+            'search_depth': search_depth,
+            'epd': os.path.basename(epd_path)
+        },
+        'summary': summary,
+        'perft': perft_results,
+        'search': search_results
+    }
+
+
+def print_report(report, out=sys.stdout):
+    if report['perft']:
+        print(f"{'perft':<12}{'depth':>6}{'nodes':>12}{'time (s)':>10}{'nps':>10}  ok", file=out)
+        for r in report['perft']:
+            print(f"{r['name']:<12}{r['depth']:>6}{r['nodes']:>12}{r['time']:>10.3f}{r['nps']:>10}  "
+                  f"{'yes' if r['ok'] else 'NO (expected %d)' % r['expected']}", file=out)
+        print(file=out)
+    if report['search']:
+        print(f"{'position':<10}{'move':>7}{'bm':>12}{'depth':>6}{'nodes':>10}{'time (s)':>10}{'nps':>8}",
+              file=out)
+        for r in report['search']:
+            print(f"{r['id']:<10}{r['move']:>7}{','.join(r['bm']):>12}{r['depth']:>6}{r['nodes']:>10}"
+                  f"{r['time']:>10.3f}{r['nps']:>8}{'  solved' if r['solved'] else ''}", file=out)
+        print(file=out)
+    print(json.dumps(report['summary'], indent=2), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minimax perft + search benchmark")
+    parser.add_argument("--perft-depth", type=int, default=3, help="0 = skip perft")
+    parser.add_argument("--depth", type=int, default=4, help="fixed search depth (0 = skip search)")
+    parser.add_argument("--epd", default=DEFAULT_EPD_PATH)
+    parser.add_argument("--no-qsearch", action="store_true", help="skip the quiescence throughput run")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_bench(args.perft_depth, args.depth, args.epd, qsearch=not args.no_qsearch)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if 'perft' in report['summary'] and not report['summary']['perft']['ok']:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
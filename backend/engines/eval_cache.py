@@ -0,0 +1,53 @@
+"""
+Module: eval_cache.py
+Bảng băm cho hàm đánh giá của engine Minimax.
+
+- Pawn Hash: điểm cấu trúc Tốt (Tốt thông, Tốt cô lập, Tốt chồng) theo cặp bitboard Tốt.
+  Cấu trúc Tốt ít thay đổi trong cây tìm kiếm nên tỉ lệ trúng rất cao.
+- Eval Cache: điểm tĩnh đầy đủ của một vị trí, tránh đánh giá lại khi gặp lại vị trí
+  (hoán vị nước đi, tìm lại của PVS / aspiration, vòng lặp sâu dần).
+- Dung lượng cố định, mỗi ô luôn ghi đè (always-replace), không tăng theo thời gian chạy.
+"""
+
+
+class EvalHashTable:
+    """Bảng băm kích thước cố định (lũy thừa của 2): khóa đầy đủ -> điểm."""
+
+    def __init__(self, entries):
+        self.capacity = 1 << max(0, int(entries).bit_length() - 1)
+        self._mask = self.capacity - 1
+        # Mỗi ô là một tuple (khóa, điểm): ghi / đọc một ô là một thao tác duy nhất nên
+        # luồng khác (request Flask, luồng ponder) không thể thấy khóa mới đi với điểm cũ.
+        self._slots = [None] * self.capacity
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self.reset_stats()
+
+    def probe(self, key):
+        """Trả về điểm đã lưu hoặc None. So khớp khóa đầy đủ nên không có va chạm."""
+        self.probes += 1
+        slot = self._slots[hash(key) & self._mask]
+        if slot is not None and slot[0] == key:
+            self.hits += 1
+            return slot[1]
+        return None
+
+    def store(self, key, score):
+        self._slots[hash(key) & self._mask] = (key, score)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': round(self.hit_rate(), 4)
+        }
@@ -8,23 +8,58 @@ và quản lý bảng băm để tối ưu hóa hiệu suất tìm kiếm.
 
 import chess
 import chess.polyglot
-import os
 import time
+from time import perf_counter
+
+from backend.config import EngineConfig
+from backend.engines.eval_cache import EvalHashTable
+from backend.engines.opening_book import get_opening_book
+from backend.engines.search_board import SearchBoard
+from backend.engines.tablebase import TB_WIN_SCORE, get_tablebase, wdl_to_score
+from backend.engines.transposition import TranspositionTable
 
 # --- CẤU HÌNH ENGINE ---
 ENGINE_DEPTH = 6
 MATE_SCORE = 1000000
-TRANS_TABLE = {}
+INFINITY = 2 * MATE_SCORE
+TRANS_TABLE = TranspositionTable(EngineConfig.MINIMAX_HASH_MB)
 
 # Hằng số Flag
 HASH_EXACT = 0
-HASH_ALPHA = 1
-HASH_BETA = 2
-NODES_VISITED = 0
+HASH_ALPHA = 1  # Cận trên (fail-low)
+HASH_BETA = 2   # Cận dưới (fail-high)
 
 # Điểm lợi thế đi trước
 TEMPO_BONUS = 20
 
+# Cửa sổ khát vọng (Aspiration Window) quanh điểm của vòng lặp trước
+ASPIRATION_WINDOW = 50
+ASPIRATION_MIN_DEPTH = 3
+
+# Null-Move Pruning
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+
+# Late Move Reductions
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+
+# Killer Moves & History Heuristic (MAX_PLY cũng là độ dài tối đa của PV)
+MAX_PLY = 128
+KILLER_SCORES = (900, 800)
+HISTORY_MAX = 700
+
+# Delta Pruning trong Quiescence Search (biên cho phần đánh giá vị trí ngoài vật chất).
+# Biên 100 bớt thêm ~15% nút ăn quân nhưng làm điểm phụ thuộc cửa sổ alpha-beta
+# (PVS / aspiration cho điểm khác tìm cửa sổ đầy đủ), nên giữ 200.
+DELTA_MARGIN = 200
+
+# Số nước ứng viên có điểm chính xác (MultiPV) cho giả lập sai lầm ở level thấp
+BLUNDER_CANDIDATES = 4
+
+# Kiểm tra dừng / hết giờ / hết ngân sách nút sau mỗi (mask + 1) nút
+STOP_CHECK_MASK = 1023
+
 PIECE_VALUES = {
     chess.PAWN: 100,
     chess.KNIGHT: 320,
@@ -97,6 +132,39 @@ KING_TABLE = [
 ]
 
 
+# Bảng PST theo loại quân (dùng chung cho đánh giá và sắp xếp nước đi)
+PIECE_TABLES = {
+    chess.PAWN: PAWN_TABLE,
+    chess.KNIGHT: KNIGHT_TABLE,
+    chess.BISHOP: BISHOP_TABLE,
+    chess.ROOK: ROOK_TABLE,
+    chess.QUEEN: QUEEN_TABLE,
+    chess.KING: KING_TABLE
+}
+
+
+def _build_piece_square_scores():
+    """
+    Gộp Material + PST thành một bảng điểm theo (loại quân, màu) -> 64 ô.
+    Giá trị đã mang dấu: dương cho Trắng, âm cho Đen (góc nhìn của Trắng).
+    """
+    scores = {}
+    for piece_type, table in PIECE_TABLES.items():
+        value = PIECE_VALUES[piece_type]
+        scores[(piece_type, chess.WHITE)] = [value + table[sq] for sq in chess.SQUARES]
+        scores[(piece_type, chess.BLACK)] = [-(value + table[63 - sq]) for sq in chess.SQUARES]
+    return scores
+
+
+# Bảng tính sẵn, tra cứu theo bitboard thay vì quét 64 ô bằng piece_at()
+PIECE_SQUARE_SCORES = _build_piece_square_scores()
+_PIECE_SQUARE_ITEMS = [
+    (piece_type, color, PIECE_SQUARE_SCORES[(piece_type, color)])
+    for piece_type in chess.PIECE_TYPES
+    for color in chess.COLORS
+]
+
+
 def get_square_value(sq, color, table):
     """
     Lấy giá trị vị trí ô cờ từ bảng điểm.
@@ -108,49 +176,198 @@ def get_square_value(sq, color, table):
         return table[63 - sq]
 
 
+def material_pst_score(board):
+    """
+    Điểm Material + PST (góc nhìn của Trắng), tính trực tiếp trên bitboard.
+    Mỗi loại quân chỉ duyệt các bit đang bật nên chi phí tỉ lệ với số quân,
+    không phải 64 ô.
+    """
+    score = 0
+    pieces_mask = board.pieces_mask
+    for piece_type, color, square_scores in _PIECE_SQUARE_ITEMS:
+        for sq in chess.scan_forward(pieces_mask(piece_type, color)):
+            score += square_scores[sq]
+    return score
+
+
+# --- CẤU TRÚC TỐT & AN TOÀN VUA ---
+DOUBLED_PAWN_PENALTY = 15
+ISOLATED_PAWN_PENALTY = 12
+# Thưởng Tốt thông theo hàng (tính từ phía bên sở hữu, hàng 1 -> hàng 8)
+PASSED_PAWN_BONUS = [0, 5, 10, 20, 35, 60, 100, 0]
+# Thưởng mỗi Tốt che chắn trước Vua (chỉ tính khi đối phương còn Hậu)
+KING_SHIELD_BONUS = 10
+
+PAWN_HASH_ENTRIES = 1 << 14
+EVAL_CACHE_ENTRIES = 1 << 16
+PAWN_HASH = EvalHashTable(PAWN_HASH_ENTRIES)
+EVAL_CACHE = EvalHashTable(EVAL_CACHE_ENTRIES)
+
+
+def _build_pawn_masks():
+    """
+    Tính sẵn các mặt nạ bitboard:
+    - ADJACENT_FILES[file]: các cột kề bên (xét Tốt cô lập).
+    - PASSED_MASKS[color][sq]: các ô phía trước trên cùng cột và cột kề (xét Tốt thông).
+    - SHIELD_MASKS[color][sq]: 2 hàng ngay trước Vua trên 3 cột, chỉ khi Vua ở 2 hàng cuối.
+    """
+    adjacent = []
+    for file in range(8):
+        mask = 0
+        if file > 0:
+            mask |= chess.BB_FILES[file - 1]
+        if file < 7:
+            mask |= chess.BB_FILES[file + 1]
+        adjacent.append(mask)
+
+    passed = {chess.WHITE: [0] * 64, chess.BLACK: [0] * 64}
+    shield = {chess.WHITE: [0] * 64, chess.BLACK: [0] * 64}
+    for sq in chess.SQUARES:
+        file, rank = chess.square_file(sq), chess.square_rank(sq)
+        files = chess.BB_FILES[file] | adjacent[file]
+        ahead_white = ahead_black = 0
+        for r in range(8):
+            if r > rank:
+                ahead_white |= chess.BB_RANKS[r]
+            elif r < rank:
+                ahead_black |= chess.BB_RANKS[r]
+        passed[chess.WHITE][sq] = files & ahead_white
+        passed[chess.BLACK][sq] = files & ahead_black
+        if rank <= 1:
+            shield[chess.WHITE][sq] = files & (chess.BB_RANKS[rank + 1] | chess.BB_RANKS[rank + 2])
+        if rank >= 6:
+            shield[chess.BLACK][sq] = files & (chess.BB_RANKS[rank - 1] | chess.BB_RANKS[rank - 2])
+    return adjacent, passed, shield
+
+
+ADJACENT_FILES, PASSED_MASKS, SHIELD_MASKS = _build_pawn_masks()
+
+
+def _pawn_side_score(own, enemy, color):
+    """Điểm cấu trúc Tốt của một bên (Tốt chồng, Tốt cô lập, Tốt thông)."""
+    score = 0
+    for file in range(8):
+        count = chess.popcount(own & chess.BB_FILES[file])
+        if count:
+            if count > 1:
+                score -= DOUBLED_PAWN_PENALTY * (count - 1)
+            if not own & ADJACENT_FILES[file]:
+                score -= ISOLATED_PAWN_PENALTY * count
+
+    passed_masks = PASSED_MASKS[color]
+    for sq in chess.scan_forward(own):
+        if not enemy & passed_masks[sq]:
+            rank = chess.square_rank(sq)
+            score += PASSED_PAWN_BONUS[rank if color == chess.WHITE else 7 - rank]
+    return score
+
+
+def pawn_structure_score(board):
+    """
+    Điểm cấu trúc Tốt (góc nhìn của Trắng), tra Pawn Hash theo cặp bitboard Tốt.
+    Chỉ phụ thuộc vị trí các Tốt nên dùng lại được cho mọi vị trí có cùng cấu trúc Tốt.
+    """
+    white_pawns = board.pawns & board.occupied_co[chess.WHITE]
+    black_pawns = board.pawns & board.occupied_co[chess.BLACK]
+    key = white_pawns | (black_pawns << 64)
+    score = PAWN_HASH.probe(key)
+    if score is None:
+        score = (_pawn_side_score(white_pawns, black_pawns, chess.WHITE)
+                 - _pawn_side_score(black_pawns, white_pawns, chess.BLACK))
+        PAWN_HASH.store(key, score)
+    return score
+
+
+def king_safety_score(board):
+    """
+    An toàn Vua (góc nhìn của Trắng): thưởng Tốt che chắn trước Vua
+    khi đối phương còn Hậu. Chỉ vài phép toán bit, không cần bảng băm.
+    """
+    score = 0
+    occupied_co = board.occupied_co
+    for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        if board.queens & occupied_co[not color]:
+            king = (board.kings & occupied_co[color]).bit_length() - 1
+            if king >= 0:
+                shield = SHIELD_MASKS[color][king] & board.pawns & occupied_co[color]
+                score += sign * KING_SHIELD_BONUS * chess.popcount(shield)
+    return score
+
+
+def clear_eval_caches():
+    """Xóa Pawn Hash và Eval Cache của tiến trình hiện tại."""
+    PAWN_HASH.clear()
+    EVAL_CACHE.clear()
+
+
+def has_legal_move(board, in_check):
+    """
+    Kiểm tra nhanh bên đang đi còn nước hợp lệ hay không.
+    Khi không bị chiếu, một ô thoát của Vua không bị tấn công là đủ
+    để kết luận (không cần sinh toàn bộ nước đi).
+    """
+    if not in_check:
+        us = board.turn
+        king = board.king(us)
+        if king is not None:
+            for sq in chess.scan_forward(chess.BB_KING_ATTACKS[king] & ~board.occupied_co[us]):
+                if not board.attackers_mask(not us, sq):
+                    return True
+    return any(board.generate_legal_moves())
+
+
 def evaluate_board(board):
     """
     Hàm đánh giá:
-    1. Tính tổng điểm (Trắng - Đen).
-    2. Cộng Tempo.
-    3. Đảo dấu theo Negamax.
+    1. Kiểm tra kết thúc ván (chiếu hết, hòa).
+    2. Điểm tĩnh: Material + PST, cấu trúc Tốt, an toàn Vua (qua Eval Cache).
+    3. Cộng Tempo và đảo dấu theo Negamax.
     """
-    if board.is_checkmate():
-        return -MATE_SCORE
-    if board.is_stalemate() or board.is_insufficient_material() or board.is_repetition() or board.is_fifty_moves():
+    in_check = board.is_check()
+    if not has_legal_move(board, in_check):
+        # Chiếu hết hoặc hết nước (hòa)
+        return -MATE_SCORE if in_check else 0
+    if is_draw_by_rule(board):
         return 0
 
-    score = 0
+    return static_score(board)
 
-    # Material
-    for piece_type, value in PIECE_VALUES.items():
-        score += value * (len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK)))
 
-    # Positional
-    for sq in chess.SQUARES:
-        piece = board.piece_at(sq)
-        if not piece: continue
-
-        table = None
-        if piece.piece_type == chess.PAWN:
-            table = PAWN_TABLE
-        elif piece.piece_type == chess.KNIGHT:
-            table = KNIGHT_TABLE
-        elif piece.piece_type == chess.BISHOP:
-            table = BISHOP_TABLE
-        elif piece.piece_type == chess.ROOK:
-            table = ROOK_TABLE
-        elif piece.piece_type == chess.QUEEN:
-            table = QUEEN_TABLE
-        elif piece.piece_type == chess.KING:
-            table = KING_TABLE
-
-        if table:
-            val = get_square_value(sq, piece.color, table)
-            if piece.color == chess.WHITE:
-                score += val
-            else:
-                score -= val
+def is_draw_by_rule(board):
+    """
+    Hòa theo luật khi bên đang đi còn nước hợp lệ: thiếu quân chiếu hết, luật 50 nước, lặp 3 lần.
+    Sắp theo chi phí: lặp lại (phải phát lại ngăn xếp nước đi) chỉ kiểm tra khi đã có
+    đủ nước không ăn quân / không đi Tốt liên tiếp để một vị trí lặp lại 3 lần (8 ply).
+    """
+    if board.is_insufficient_material():
+        return True
+    clock = board.halfmove_clock
+    if clock >= 100:
+        return True
+    return clock >= 8 and board.is_repetition()
+
+
+def zobrist_key(board):
+    """Khóa Zobrist: lấy sẵn từ SearchBoard (cập nhật tăng dần), tính từ đầu với chess.Board thường."""
+    key = getattr(board, 'zobrist', None)
+    return chess.polyglot.zobrist_hash(board) if key is None else key
+
+
+def static_score(board):
+    """
+    Điểm tĩnh theo góc nhìn bên đang đi (không kiểm tra kết thúc ván):
+    Material + PST + cấu trúc Tốt + an toàn Vua, cộng Tempo rồi đảo dấu theo Negamax.
+    Phần điểm theo góc nhìn của Trắng được lưu trong Eval Cache theo khóa vị trí.
+    """
+    # Khóa Zobrist tăng dần của SearchBoard; với chess.Board thường dùng khóa vị trí của
+    # python-chess (rẻ hơn nhiều so với tính Zobrist từ đầu, so khớp chính xác).
+    key = getattr(board, 'zobrist', None)
+    if key is None:
+        key = board._transposition_key()
+    score = EVAL_CACHE.probe(key)
+    if score is None:
+        score = material_pst_score(board) + pawn_structure_score(board) + king_safety_score(board)
+        EVAL_CACHE.store(key, score)
 
     # Tempo Bonus
     if board.turn == chess.WHITE:
@@ -165,9 +382,44 @@ def evaluate_board(board):
     return score
 
 
-def get_move_score(board, move):
+def has_non_pawn_material(board, color):
+    """Bên `color` còn quân ngoài Tốt và Vua (điều kiện an toàn cho null-move)."""
+    return bool(board.occupied_co[color] & ~(board.pawns | board.kings))
+
+
+def gives_direct_check(board, move, piece_type):
+    """
+    Kiểm tra nhanh nước đi có chiếu trực tiếp hay không, chỉ dùng bảng tấn công bitboard.
+    Bỏ qua chiếu mở (discovered check) để tránh chi phí của board.gives_check().
+    """
+    king = board.king(not board.turn)
+    if king is None:
+        return False
+    king_bb = chess.BB_SQUARES[king]
+    to_sq = move.to_square
+    piece_type = move.promotion or piece_type
+
+    if piece_type == chess.PAWN:
+        return bool(chess.BB_PAWN_ATTACKS[board.turn][to_sq] & king_bb)
+    if piece_type == chess.KNIGHT:
+        return bool(chess.BB_KNIGHT_ATTACKS[to_sq] & king_bb)
+    if piece_type == chess.KING:
+        return False
+
+    occupied = (board.occupied & ~chess.BB_SQUARES[move.from_square]) | chess.BB_SQUARES[to_sq]
+    attacks = 0
+    if piece_type != chess.ROOK:
+        attacks |= chess.BB_DIAG_ATTACKS[to_sq][chess.BB_DIAG_MASKS[to_sq] & occupied]
+    if piece_type != chess.BISHOP:
+        attacks |= (chess.BB_FILE_ATTACKS[to_sq][chess.BB_FILE_MASKS[to_sq] & occupied]
+                    | chess.BB_RANK_ATTACKS[to_sq][chess.BB_RANK_MASKS[to_sq] & occupied])
+    return bool(attacks & king_bb)
+
+
+def get_move_score(board, move, ctx=None, ply=0):
     """
     Hàm sắp xếp nước đi tối ưu (có tính chênh lệch vị trí).
+    Với nước yên tĩnh, dùng thêm Killer Moves và History Heuristic từ ctx nếu có.
     """
     score = 0
     piece = board.piece_at(move.from_square)
@@ -180,28 +432,22 @@ def get_move_score(board, move):
 
     # 2. Ăn quân
     if board.is_capture(move):
-        victim = board.piece_at(move.to_square)
-        victim_val = 0
-        if victim:
-            victim_val = PIECE_VALUES.get(victim.piece_type, 0)
-        elif board.is_en_passant(move):
-            victim_val = PIECE_VALUES[chess.PAWN]
         attacker_val = PIECE_VALUES.get(piece.piece_type, 0)
-        score += 1000 + victim_val * 10 - attacker_val
-
-    # 3. Chiếu
-    if board.gives_check(move):
+        score += 1000 + captured_value(board, move) * 10 - attacker_val
+    elif ctx is not None:
+        # Nước yên tĩnh: Killer (gây cắt beta ở cùng ply) và History
+        killers = ctx.killers[ply] if ply < MAX_PLY else ()
+        if move in killers:
+            score += KILLER_SCORES[killers.index(move)]
+        else:
+            score += min(ctx.history[board.turn][move.from_square * 64 + move.to_square], HISTORY_MAX)
+
+    # 3. Chiếu (chiếu trực tiếp, tính bằng bitboard)
+    if gives_direct_check(board, move, piece.piece_type):
         score += 500
 
-    # 4. Cải thiện vị trí
-    table = None
-    if piece.piece_type == chess.PAWN:
-        table = PAWN_TABLE
-    elif piece.piece_type == chess.KNIGHT:
-        table = KNIGHT_TABLE
-    elif piece.piece_type == chess.BISHOP:
-        table = BISHOP_TABLE
-
+    # 4. Cải thiện vị trí (chỉ Tốt, Mã, Tượng)
+    table = PIECE_TABLES[piece.piece_type] if piece.piece_type <= chess.BISHOP else None
     if table:
         val_to = get_square_value(move.to_square, piece.color, table)
         val_from = get_square_value(move.from_square, piece.color, table)
@@ -210,18 +456,250 @@ def get_move_score(board, move):
     return score
 
 
+def captured_value(board, move):
+    """Giá trị quân bị ăn (kể cả bắt tốt qua đường), 0 nếu không ăn quân."""
+    victim = board.piece_type_at(move.to_square)
+    if victim:
+        return PIECE_VALUES[victim]
+    if board.is_en_passant(move):
+        return PIECE_VALUES[chess.PAWN]
+    return 0
+
+
+def _least_valuable_attacker(board, attackers, color):
+    """Ô và loại quân có giá trị thấp nhất trong tập `attackers` của bên `color`."""
+    for piece_type in chess.PIECE_TYPES:
+        bb = attackers & board.pieces_mask(piece_type, color)
+        if bb:
+            return chess.lsb(bb), piece_type
+    return None, None
+
+
+def see(board, move):
+    """
+    Static Exchange Evaluation: lợi ích vật chất ròng (centipawn) của chuỗi ăn qua lại
+    trên ô đích, mỗi bên luôn dùng quân rẻ nhất và được quyền dừng lại.
+    Tính trên bitboard tấn công (có xét quân xuyên tia khi quân phía trước rời ô).
+    """
+    to_sq = move.to_square
+    occupied = board.occupied & ~chess.BB_SQUARES[move.from_square]
+    if board.is_en_passant(move):
+        occupied &= ~chess.BB_SQUARES[to_sq + (-8 if board.turn == chess.WHITE else 8)]
+
+    gains = [captured_value(board, move)]
+    on_square = board.piece_type_at(move.from_square)
+    if move.promotion:
+        gains[0] += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+        on_square = move.promotion
+
+    color = not board.turn
+    while True:
+        attackers = board.attackers_mask(color, to_sq, occupied) & occupied
+        sq, piece_type = _least_valuable_attacker(board, attackers, color)
+        if sq is None:
+            break
+        # Vua không được ăn vào ô vẫn còn bị đối phương khống chế
+        if piece_type == chess.KING and board.attackers_mask(not color, to_sq, occupied) & occupied:
+            break
+        gains.append(PIECE_VALUES[on_square] - gains[-1])
+        on_square = piece_type
+        occupied &= ~chess.BB_SQUARES[sq]
+        color = not color
+
+    # Mỗi bên chọn giữa việc ăn tiếp hoặc dừng lại
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
 def clear_transposition_table():
-    global TRANS_TABLE
+    """Xóa bảng băm, gồm cả bảng của các tiến trình tìm kiếm song song và bộ đệm đánh giá."""
     TRANS_TABLE.clear()
+    clear_eval_caches()
+    from backend.engines import parallel, smp
+    parallel.clear_worker_tables()
+    smp.clear_shared_table()
+
+
+# Điểm phụ thuộc khoảng cách tới gốc (chiếu hết và thắng/thua theo tablebase) nằm trên ngưỡng này
+DISTANCE_SCORE_BOUND = TB_WIN_SCORE - 1000
+
+
+def score_to_tt(score, ply):
+    """
+    Điểm chiếu hết / thắng tablebase lưu vào bảng băm tính từ nút hiện tại, không phải từ gốc.
+    """
+    if score > DISTANCE_SCORE_BOUND:
+        return score + ply
+    if score < -DISTANCE_SCORE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score > DISTANCE_SCORE_BOUND:
+        return score - ply
+    if score < -DISTANCE_SCORE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    """Lượt tìm bị dừng giữa chừng (cờ dừng, hết giờ hoặc hết ngân sách nút)."""
+
+
+class SearchContext:
+    """
+    Trạng thái của một lượt tìm kiếm: các tùy chọn cắt tỉa và bộ đếm nút.
+    Được truyền xuyên suốt cây tìm kiếm thay vì dùng biến toàn cục.
+    """
+
+    def __init__(self, null_move=True, late_move_reductions=True, tt=None, stop_event=None,
+                 deadline=None, node_limit=None, multipv=1, pvs=True):
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        # PVS + Aspiration Windows; tắt thì mọi nước tìm với cửa sổ đầy đủ (alpha-beta thuần, không LMR)
+        self.pvs = pvs
+        # MultiPV: số nước gốc cần điểm chính xác và biến chính
+        self.multipv = multipv
+        # Bảng băm dùng cho lượt tìm (mặc định là bảng chung của tiến trình)
+        self.tt = tt if tt is not None else TRANS_TABLE
+        # Syzygy Tablebase của tiến trình (None nếu không cấu hình)
+        self.tablebase = get_tablebase()
+        self.tb_hits = 0
+        # Cờ dừng từ bên ngoài (threading.Event hoặc cờ bộ nhớ chia sẻ)
+        self.stop_event = stop_event
+        # Giới hạn cứng: thời điểm (time.time()) và tổng số nút (negamax + quiescence)
+        self.deadline = deadline
+        self.node_limit = node_limit
+        self.aborted = False
+        # Bị dừng bởi stop_event hoặc node_limit (không tính hết giờ): kết quả không ứng với ngân sách thời gian
+        self.interrupted = False
+        self.nodes = 0
+        self.qnodes = 0
+
+        # Thống kê bảng băm của lượt tìm (bảng có thể dùng chung nên đếm riêng)
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        # Thời gian (giây) dành cho hàm đánh giá và sinh nước đi
+        self.eval_time = 0.0
+        self.movegen_time = 0.0
+        # Kết quả từng vòng Iterative Deepening
+        self.iterations = []
+
+        # Triangular PV: pv[ply] là biến chính (tuple nước đi) tính từ nút ở độ sâu ply,
+        # chỉ cập nhật ở nút PV khi alpha tăng. best_pv: biến chính của kết quả tốt nhất.
+        self.pv = [()] * (MAX_PLY + 1)
+        self.best_pv = ()
+        # MultiPV: [(move, score, pv)] giảm dần theo điểm, của vòng được chấp nhận gần nhất
+        self.pv_lines = []
+        self.best_lines = []
+
+        # Killer Moves: 2 nước yên tĩnh gây cắt beta gần nhất ở mỗi ply
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # History (butterfly): [màu][from * 64 + to], giữ qua các vòng Iterative Deepening
+        self.history = [[0] * 4096, [0] * 4096]
+
+        # Thống kê cắt beta
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_iteration(self):
+        """Giảm một nửa History giữa các vòng để ưu tiên thông tin gần đây."""
+        for table in self.history:
+            for i, value in enumerate(table):
+                if value:
+                    table[i] = value >> 1
+
+    def record_cutoff(self, board, move, depth, ply, move_index, is_quiet):
+        """Ghi nhận nước gây cắt beta (board đang ở trạng thái trước khi đi nước đó)."""
+        self.beta_cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if not is_quiet:
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[board.turn][move.from_square * 64 + move.to_square] += depth * depth
+
+    def stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def check_limits(self):
+        """
+        Gọi định kỳ trong cây tìm kiếm (mỗi STOP_CHECK_MASK + 1 nút).
+        Ném SearchAborted để thoát ngay khỏi toàn bộ cây.
+        """
+        if self.stopped() or (self.node_limit is not None and self.nodes + self.qnodes >= self.node_limit):
+            self.interrupted = True
+            self.aborted = True
+        if self.aborted or (self.deadline is not None and time.time() >= self.deadline):
+            self.aborted = True
+            raise SearchAborted()
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Tỉ lệ cắt beta xảy ra ngay ở nước đầu tiên (đo chất lượng sắp xếp nước đi)."""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    def record_iteration(self, depth, start_time, score, pv, completed):
+        """Ghi lại kết quả một vòng Iterative Deepening (`pv`: dãy nước đi từ gốc)."""
+        self.iterations.append({
+            'depth': depth,
+            'time': round(time.time() - start_time, 4),
+            'nodes': self.nodes + self.qnodes,
+            'score': score,
+            'pv': ' '.join(move.uci() for move in pv),
+            'completed': completed
+        })
+
+    def stats(self, elapsed):
+        """Thống kê của lượt tìm dưới dạng dict (JSON được)."""
+        total_nodes = self.nodes + self.qnodes
+        completed = [it['depth'] for it in self.iterations if it['completed']]
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'time': round(elapsed, 4),
+            'nps': int(total_nodes / elapsed) if elapsed > 0 else 0,
+            'depth': max(completed, default=0),
+            'aborted': self.aborted,
+            'interrupted': self.interrupted or self.stopped(),
+            'iterations': self.iterations,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'tt_hit_rate': round(self.tt_hits / self.tt_probes, 4) if self.tt_probes else 0.0,
+            'tb_hits': self.tb_hits,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': round(self.first_move_cutoff_rate, 4),
+            'eval_time': round(self.eval_time, 4),
+            'movegen_time': round(self.movegen_time, 4)
+        }
 
 
 # ---Quiescence Search ---
-def quiescence_search(board, alpha, beta):
+def quiescence_search(board, alpha, beta, ctx=None):
     """
     Tìm kiếm yên tĩnh để tránh hiệu ứng "horizon effect".
-    Chỉ xét các nước ĂN QUÂN hoặc PHONG CẤP.
+    Chỉ xét các nước ĂN QUÂN hoặc PHONG CẤP, sinh trực tiếp bằng generate_legal_captures().
+    Bỏ qua nước ăn thua theo SEE và nước ăn không thể nâng điểm lên alpha (Delta Pruning).
     """
+    if ctx is not None:
+        ctx.qnodes += 1
+        if not (ctx.nodes + ctx.qnodes) & STOP_CHECK_MASK:
+            ctx.check_limits()
+
+    t0 = perf_counter()
     stand_pat = evaluate_board(board)
+    t1 = perf_counter()
+    if ctx is not None:
+        ctx.eval_time += t1 - t0
 
     if stand_pat >= beta:
         return beta
@@ -229,16 +707,35 @@ def quiescence_search(board, alpha, beta):
         alpha = stand_pat
 
     # Chỉ xét nước ĂN QUÂN hoặc PHONG CẤP.
-    noisy_moves = [
-        m for m in board.legal_moves
-        if board.is_capture(m) or m.promotion
-    ]
-    # Sắp xếp
-    noisy_moves.sort(key=lambda m: get_move_score(board, m), reverse=True)
+    candidates = list(board.generate_legal_captures())
+
+    # Phong cấp không ăn quân (Tốt ở hàng 7 đi thẳng)
+    promotion_rank = chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2
+    promoting_pawns = board.pawns & board.occupied_co[board.turn] & promotion_rank
+    if promoting_pawns:
+        candidates.extend(board.generate_legal_moves(promoting_pawns, ~board.occupied))
+    if ctx is not None:
+        ctx.movegen_time += perf_counter() - t1
+
+    scored_moves = []
+    for move in candidates:
+        gain = see(board, move)
+        if not move.promotion:
+            # SEE: chuỗi ăn qua lại trên ô đích làm mất vật chất
+            if gain < 0:
+                continue
+            # Delta Pruning: kể cả thắng được chuỗi trao đổi cũng không đủ bù lên alpha
+            if stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
+        scored_moves.append((gain, move))
+
+    # Sắp xếp theo SEE: nước ăn lời nhiều nhất trước
+    scored_moves.sort(key=lambda item: item[0], reverse=True)
+    noisy_moves = [move for _, move in scored_moves]
 
     for move in noisy_moves:
         board.push(move)
-        score = -quiescence_search(board, -beta, -alpha)
+        score = -quiescence_search(board, -beta, -alpha, ctx)
         board.pop()
 
         if score >= beta:
@@ -249,92 +746,380 @@ def quiescence_search(board, alpha, beta):
     return alpha
 
 
+def _timed_static_score(board, ctx):
+    t0 = perf_counter()
+    score = static_score(board)
+    ctx.eval_time += perf_counter() - t0
+    return score
+
+
 # --- NEGAMAX ALGORITHM ---
-def negamax(board, depth, alpha, beta):
+def negamax(board, depth, alpha, beta, ctx=None, ply=0, allow_null=True):
     """
-    Thuật toán Negamax với Alpha-Beta Pruning và Transposition Table.
+    Thuật toán Negamax với Alpha-Beta Pruning, Transposition Table
+    và Principal Variation Search (PVS):
+    nước đầu tiên tìm với cửa sổ đầy đủ, các nước sau tìm với cửa sổ rỗng
+    (null window) và chỉ tìm lại khi kết quả rơi vào trong (alpha, beta).
+    Cắt tỉa chọn lọc: Null-Move Pruning và Late Move Reductions (bật/tắt qua ctx).
     """
-    global NODES_VISITED
-    NODES_VISITED += 1
+    if ctx is None:
+        ctx = SearchContext()
+    ctx.nodes += 1
+    if not (ctx.nodes + ctx.qnodes) & STOP_CHECK_MASK:
+        ctx.check_limits()
+    pv = ctx.pv
+    pv[ply] = ()
 
     alpha_orig = alpha
 
-    board_hash = chess.polyglot.zobrist_hash(board)
-    tt_entry = TRANS_TABLE.get(board_hash)
+    board_hash = zobrist_key(board)
+    tt_entry = ctx.tt.probe(board_hash)
+    ctx.tt_probes += 1
     tt_best_move = None
     # --- 1. TRANSPOSITION TABLE LOOKUP ---
-    if tt_entry and tt_entry[0] >= depth:
-        tt_depth, tt_score, tt_flag, tt_move = tt_entry
-        tt_best_move = tt_move
-        if tt_flag == HASH_EXACT:
-            return tt_score
-        elif tt_flag == HASH_ALPHA:
-            alpha = max(alpha, tt_score)
-        elif tt_flag == HASH_BETA:
-            beta = min(beta, tt_score)
-        if alpha >= beta: return tt_score
-
-    if board.is_game_over():
-        if board.is_checkmate():
-            return -MATE_SCORE + (100 - depth)
+    if tt_entry:
+        ctx.tt_hits += 1
+        tt_depth, tt_score, tt_flag, tt_best_move = tt_entry
+        if tt_depth >= depth:
+            tt_score = score_from_tt(tt_score, ply)
+            if tt_flag == HASH_EXACT:
+                ctx.tt_cutoffs += 1
+                return tt_score
+            elif tt_flag == HASH_BETA:
+                alpha = max(alpha, tt_score)
+            elif tt_flag == HASH_ALPHA:
+                beta = min(beta, tt_score)
+            if alpha >= beta:
+                ctx.tt_cutoffs += 1
+                return tt_score
+
+    # --- 1b. SYZYGY TABLEBASE (WDL) ---
+    # Chỉ tra ngay sau nước về 0 (ăn quân / đi Tốt) để WDL đúng với luật 50 nước
+    tablebase = ctx.tablebase
+    if (tablebase is not None and ply > 0 and not board.halfmove_clock
+            and tablebase.covers(board)):
+        wdl = tablebase.probe_wdl(board)
+        if wdl is not None:
+            ctx.tb_hits += 1
+            tb_score = wdl_to_score(wdl, ply)
+            ctx.tt.store(board_hash, MAX_PLY, score_to_tt(tb_score, ply), HASH_EXACT, None)
+            return tb_score
+
+    # --- 1c. KẾT THÚC VÁN ---
+    # Hết nước trước (thường chỉ cần một ô thoát của Vua), luật hòa sau:
+    # kiểm tra lặp lại chỉ chạy khi đủ số nước thuận nghịch để có thể lặp.
+    in_check = board.is_check()
+    t0 = perf_counter()
+    has_move = has_legal_move(board, in_check)
+    ctx.movegen_time += perf_counter() - t0
+    if not has_move:
+        return -MATE_SCORE + ply if in_check else 0
+    if is_draw_by_rule(board):
         return 0
 
-    if depth == 0:
-        return quiescence_search(board, alpha, beta)
+    if depth <= 0:
+        return quiescence_search(board, alpha, beta, ctx)
+
+    is_pv_node = beta - alpha > 1
+
+    # --- 2. NULL-MOVE PRUNING ---
+    # Bỏ lượt: nếu đối thủ đi liền 2 nước mà vẫn không kéo điểm xuống dưới beta
+    # thì nút này gần như chắc chắn bị cắt. Không dùng khi bị chiếu hoặc chỉ còn Tốt (zugzwang).
+    if (ctx.null_move and allow_null and not is_pv_node and not in_check
+            and depth >= NULL_MOVE_MIN_DEPTH
+            and has_non_pawn_material(board, board.turn)
+            and _timed_static_score(board, ctx) >= beta):
+        reduction = NULL_MOVE_REDUCTION + (1 if depth >= 6 else 0)
+        board.push(chess.Move.null())
+        val = -negamax(board, depth - 1 - reduction, -beta, -beta + 1, ctx, ply + 1, allow_null=False)
+        board.pop()
+        if val >= beta:
+            # Không tin điểm chiếu hết từ nhánh bỏ lượt
+            return beta if val > MATE_SCORE - 1000 else val
 
-    # --- 2. MOVE ORDERING ---
+    # --- 3. MOVE ORDERING ---
+    t0 = perf_counter()
     legal_moves = list(board.legal_moves)
-    legal_moves.sort(key=lambda m: get_move_score(board, m), reverse=True)
+    ctx.movegen_time += perf_counter() - t0
+    legal_moves.sort(key=lambda m: get_move_score(board, m, ctx, ply), reverse=True)
 
     # Ưu tiên nước đi tốt từ bảng băm nếu có
     if tt_best_move in legal_moves:
         legal_moves.remove(tt_best_move)
         legal_moves.insert(0, tt_best_move)
 
-    best_value = -float('inf')
+    best_value = -INFINITY
     best_move = None
 
-    if not legal_moves:
-        return evaluate_board(board)
+    use_lmr = ctx.late_move_reductions and depth >= LMR_MIN_DEPTH and not in_check
+    killers = ctx.killers[ply] if ply < MAX_PLY else ()
 
-    # --- 3. MAIN SEARCH LOOP ---
-    for move in legal_moves:
+    # --- 4. MAIN SEARCH LOOP (PVS + LMR) ---
+    for i, move in enumerate(legal_moves):
+        is_quiet = not move.promotion and not board.is_capture(move)
         board.push(move)
         # Negamax: Đổi dấu và đổi vị trí alpha/beta
-        val = -negamax(board, depth - 1, -beta, -alpha)
+        if i == 0 or not ctx.pvs:
+            val = -negamax(board, depth - 1, -beta, -alpha, ctx, ply + 1)
+        else:
+            # Nước yên tĩnh xếp cuối danh sách: tìm nông hơn, tìm lại nếu bất ngờ tốt
+            reduction = 0
+            if (use_lmr and is_quiet and i >= LMR_FULL_DEPTH_MOVES
+                    and move not in killers and not board.is_check()):
+                reduction = 1 if i < 2 * LMR_FULL_DEPTH_MOVES else 2
+            val = -negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, ctx, ply + 1)
+            if reduction and val > alpha:
+                val = -negamax(board, depth - 1, -alpha - 1, -alpha, ctx, ply + 1)
+            if alpha < val < beta:
+                val = -negamax(board, depth - 1, -beta, -alpha, ctx, ply + 1)
         board.pop()
 
         if val > best_value:
             best_value = val
             best_move = move
+            # Triangular PV: nối nước đi với biến chính của nút con
+            if is_pv_node and val > alpha and ply < MAX_PLY:
+                pv[ply] = (move,) + pv[ply + 1]
 
         alpha = max(alpha, best_value)
         if alpha >= beta:
+            ctx.record_cutoff(board, move, depth, ply, i, is_quiet)
             break
 
     tt_flag = HASH_EXACT
-    if best_value <= alpha:
+    if best_value <= alpha_orig:
         tt_flag = HASH_ALPHA
     elif best_value >= beta:
         tt_flag = HASH_BETA
 
-    TRANS_TABLE[board_hash] = (depth, best_value, tt_flag, best_move)
+    ctx.tt.store(board_hash, depth, score_to_tt(best_value, ply), tt_flag, best_move)
     return best_value
 
 
+def search_root(board, legal_moves, depth, alpha, beta, start_time, time_limit, ctx):
+    """
+    Tìm kiếm tại gốc (PVS) với cửa sổ (alpha, beta) cho trước.
+    Trả về (best_move, best_value, scored_moves, completed);
+    completed = False nếu hết giờ / bị dừng giữa chừng (nước đang tìm dở bị bỏ qua).
+    """
+    best_value = -INFINITY
+    best_move = None
+    scored_moves = []
+    root_stack_size = len(board.move_stack)
+    ctx.pv[0] = ()
+
+    for i, move in enumerate(legal_moves):
+        if time.time() - start_time > time_limit or ctx.stopped():
+            return best_move, best_value, scored_moves, False
+
+        board.push(move)
+        try:
+            if i == 0 or not ctx.pvs:
+                val = -negamax(board, depth - 1, -beta, -alpha, ctx, 1)
+            else:
+                val = -negamax(board, depth - 1, -alpha - 1, -alpha, ctx, 1)
+                if alpha < val < beta:
+                    val = -negamax(board, depth - 1, -beta, -alpha, ctx, 1)
+        except SearchAborted:
+            # Trả bàn cờ về vị trí gốc (các nước đã push trong cây chưa được pop)
+            while len(board.move_stack) > root_stack_size:
+                board.pop()
+            return best_move, best_value, scored_moves, False
+        board.pop()
+
+        scored_moves.append((move, val))
+
+        if val > best_value:
+            best_value = val
+            best_move = move
+            ctx.pv[0] = (move,) + ctx.pv[1]
+
+        alpha = max(alpha, val)
+        if alpha >= beta:
+            break
+
+    return best_move, best_value, scored_moves, True
+
+
+def extend_pv_from_tt(board, pv, tt=None, max_length=MAX_PLY):
+    """
+    Kéo dài biến chính bằng nước đi tốt nhất lưu trong bảng băm
+    (triangular PV bị cắt ngắn khi nút con trả về sớm nhờ bảng băm).
+    Dừng khi gặp nước không hợp lệ, lặp lại vị trí hoặc hết entry.
+    """
+    tt = tt if tt is not None else TRANS_TABLE
+    line = list(pv)
+    for move in line:
+        board.push(move)
+    try:
+        while len(line) < max_length and not board.is_repetition(2):
+            entry = tt.probe(zobrist_key(board))
+            move = entry[3] if entry else None
+            if move is None or not board.is_legal(move):
+                break
+            board.push(move)
+            line.append(move)
+    finally:
+        for _ in line:
+            board.pop()
+    return line
+
+
+def search_root_multipv(board, legal_moves, depth, start_time, time_limit, ctx):
+    """
+    Tìm kiếm tại gốc ở chế độ MultiPV (k = ctx.multipv).
+    Alpha tại gốc là điểm của nước thứ k đã biết (thay vì nước tốt nhất): nước nào vượt
+    qua thì được tìm lại với cửa sổ mở để có điểm chính xác và biến chính riêng.
+    Trả về như search_root; các dòng chính xác lưu vào ctx.pv_lines.
+    """
+    k = ctx.multipv
+    lines = []  # (score, move, pv) giảm dần, tối đa k dòng
+    scored_moves = []
+    root_stack_size = len(board.move_stack)
+    completed = True
+
+    for move in legal_moves:
+        if time.time() - start_time > time_limit or ctx.stopped():
+            completed = False
+            break
+
+        threshold = lines[-1][0] if len(lines) >= k else -INFINITY
+        board.push(move)
+        try:
+            if threshold == -INFINITY:
+                val = -negamax(board, depth - 1, -INFINITY, INFINITY, ctx, 1)
+            else:
+                val = -negamax(board, depth - 1, -threshold - 1, -threshold, ctx, 1)
+                if val > threshold:
+                    val = -negamax(board, depth - 1, -INFINITY, -threshold, ctx, 1)
+        except SearchAborted:
+            while len(board.move_stack) > root_stack_size:
+                board.pop()
+            completed = False
+            break
+        board.pop()
+
+        scored_moves.append((move, val))
+        if val > threshold:
+            lines.append((val, move, (move,) + ctx.pv[1]))
+            lines.sort(key=lambda line: line[0], reverse=True)
+            del lines[k:]
+
+    ctx.pv_lines = [(move, val, pv) for val, move, pv in lines]
+    if not lines:
+        return None, -INFINITY, scored_moves, completed
+
+    # Các dòng chính xác đứng đầu, sau đó là các nước chỉ có cận trên
+    exact = {move for _, move, _ in lines}
+    scored_moves = [(move, val) for val, move, _ in lines] + [m for m in scored_moves if m[0] not in exact]
+    ctx.pv[0] = lines[0][2]
+    return lines[0][1], lines[0][0], scored_moves, completed
+
+
+def iterative_deepening(board, legal_moves, max_depth, start_time, time_limit, ctx, start_depth=1,
+                        hint_move=None):
+    """
+    Iterative Deepening từ `start_depth` đến `max_depth` (PVS + Aspiration Windows).
+    `hint_move` (ví dụ nước dự đoán từ lượt tìm trước) được xét đầu tiên cho tới khi có kết quả.
+    Trả về (best_move, best_score, top_moves, completed_depth).
+    """
+    legal_moves = list(legal_moves)
+    best_move_global = None
+    best_score_global = -INFINITY
+    completed_depth = 0
+    top_moves = [] # Lưu danh sách các nước đi tốt để bốc ngẫu nhiên nếu level thấp
+
+    # Chạy từ depth start_depth -> max_depth
+    for current_depth in range(start_depth, max_depth + 1):
+        if time.time() - start_time > time_limit or ctx.stopped() or ctx.aborted:
+            break
+
+        # Move Ordering
+        ctx.new_iteration()
+        legal_moves.sort(key=lambda m: get_move_score(board, m, ctx), reverse=True)
+        first_move = best_move_global or hint_move
+        if first_move and first_move in legal_moves:
+            legal_moves.remove(first_move)
+            legal_moves.insert(0, first_move)
+
+        # Cửa sổ hẹp quanh điểm của vòng trước (trừ khi đang có chiếu hết hoặc MultiPV)
+        alpha, beta = -INFINITY, INFINITY
+        if (ctx.pvs and ctx.multipv == 1 and current_depth >= ASPIRATION_MIN_DEPTH
+                and abs(best_score_global) < MATE_SCORE - 1000):
+            alpha = best_score_global - ASPIRATION_WINDOW
+            beta = best_score_global + ASPIRATION_WINDOW
+
+        if ctx.multipv > 1:
+            best_move_this_depth, best_val_this_depth, current_depth_moves, completed = search_root_multipv(
+                board, legal_moves, current_depth, start_time, time_limit, ctx
+            )
+        else:
+            while True:
+                best_move_this_depth, best_val_this_depth, current_depth_moves, completed = search_root(
+                    board, legal_moves, current_depth, alpha, beta, start_time, time_limit, ctx
+                )
+                if not completed:
+                    break
+                # Fail-low / Fail-high: mở rộng cửa sổ phía bị vượt và tìm lại
+                if best_val_this_depth <= alpha:
+                    alpha = -INFINITY
+                elif best_val_this_depth >= beta:
+                    beta = INFINITY
+                else:
+                    break
+
+        # Cập nhật kết quả tốt nhất nếu hoàn thành ít nhất 1 nước đi ở depth này
+        # (bỏ qua kết quả fail-low dang dở vì đó chỉ là cận trên).
+        # MultiPV chỉ nhận vòng dang dở khi chưa có vòng nào xong (các dòng chưa so đủ nước gốc).
+        accept = completed or best_val_this_depth > alpha
+        if ctx.multipv > 1:
+            accept = completed or best_move_global is None
+        if best_move_this_depth and accept:
+            best_move_global = best_move_this_depth
+            best_score_global = best_val_this_depth
+            top_moves = sorted(current_depth_moves, key=lambda x: x[1], reverse=True)
+            ctx.best_pv = ctx.pv[0]
+            if ctx.multipv > 1:
+                ctx.best_lines = ctx.pv_lines
+            if completed:
+                completed_depth = current_depth
+            ctx.record_iteration(current_depth, start_time, best_score_global, ctx.best_pv, completed)
+
+        if not completed or abs(best_score_global) > MATE_SCORE - 1000:
+            break
+
+    return best_move_global, best_score_global, top_moves, completed_depth
+
+
 import random
 
-def find_best_move(fen, max_depth=ENGINE_DEPTH, time_limit=3.0, skill_level=10):
+def find_best_move(fen, max_depth=ENGINE_DEPTH, time_limit=3.0, skill_level=10,
+                   null_move=True, late_move_reductions=True, workers=1, parallel_mode='smp',
+                   stop_event=None, node_limit=None, multipv=1, board=None, tt=None, pv_hint=()):
     """
     Tìm nước đi tốt nhất.
     1. Tra cứu Opening Book (chỉ dùng cho level cao).
     2. Nếu level thấp: Giới hạn depth và thêm yếu tố ngẫu nhiên (blunder).
     3. Chạy Iterative Deepening Negamax.
+       `workers` > 1: tìm đa tiến trình, `parallel_mode` = 'smp' (Lazy SMP)
+       hoặc 'root' (chia nước gốc cho pool tiến trình).
+    `null_move` / `late_move_reductions` bật/tắt cắt tỉa chọn lọc cho lượt tìm này.
+    `time_limit` là giới hạn cứng, kiểm tra cả bên trong cây tìm kiếm; `stop_event`
+    (threading.Event) cho phép hủy từ bên ngoài, `node_limit` giới hạn tổng số nút.
+    Khi bị dừng, trả về kết quả của vòng Iterative Deepening hoàn thành gần nhất.
+    Kết quả kèm 'stats': thống kê lượt tìm (xem SearchContext.stats, 'source' cho biết
+    nước đi đến từ 'search', 'book', 'tablebase' hay 'forced').
+    `multipv` > 1: thêm 'multipv' = k nước tốt nhất với điểm chính xác và biến chính
+    (tìm trong tiến trình hiện tại, bỏ qua Opening Book).
+    Phiên theo ván (engine session): `board` là SearchBoard giữ lịch sử nước đi (đúng vị trí `fen`),
+    `tt` là bảng băm riêng của ván, `pv_hint` là biến dự đoán từ lượt tìm trước
+    (nước đầu được xét trước ở gốc, và dùng ngay nếu hết giờ trước khi có kết quả).
     """
-    global NODES_VISITED
-    NODES_VISITED = 0
-    board = chess.Board(fen)
+    tt = tt if tt is not None else TRANS_TABLE
+    tt.new_search()
+    board = board if board is not None else SearchBoard(fen)
     legal_moves = list(board.legal_moves)
+    hint_move = pv_hint[0] if pv_hint and pv_hint[0] in legal_moves else None
     
     # --- 1. ĐIỀU CHỈNH ĐỘ KHÓ (SKILL LEVEL MAPPING) ---
     # Convert skill_level (0-20) sang search_depth và blunder_probability
@@ -352,110 +1137,136 @@ def find_best_move(fen, max_depth=ENGINE_DEPTH, time_limit=3.0, skill_level=10):
         blunder_chance = 0.0
 
     # --- 2. OPENING BOOK (Chỉ dùng cho level > 5) ---
-    if skill_level > 5:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        book_path = os.path.join(base_dir, "bin", "gm2001.bin")
-
-        if os.path.exists(book_path):
-            try:
-                with chess.polyglot.open_reader(book_path) as reader:
-                    entry = reader.weighted_choice(board)
-                    time.sleep(0.3)
-                    return {
-                        'best_move': entry.move.uci(),
-                        'search_score': "0.25",
-                        'pv': 'Opening Theory'
-                    }
-            except:
-                pass
+    # Sách được memory-map một lần mỗi tiến trình; thời gian "suy nghĩ" tối thiểu do client lo.
+    if skill_level > 5 and multipv == 1:
+        book = get_opening_book()
+        book_move = book.weighted_choice(board) if book else None
+        if book_move:
+            return {
+                'best_move': book_move.uci(),
+                'search_score': "0.25",
+                'pv': 'Opening Theory',
+                'stats': _source_stats('book')
+            }
 
     # --- 3. XỬ LÝ CƠ BẢN ---
     if len(legal_moves) == 0:
-        return {'best_move': None, 'search_score': 'Game Over', 'pv': ''}
+        return {'best_move': None, 'search_score': 'Game Over', 'pv': '', 'stats': _source_stats('forced')}
     if len(legal_moves) == 1:
-        return {'best_move': legal_moves[0].uci(), 'search_score': 'Forced', 'pv': legal_moves[0].uci()}
-
-    # --- 4. ITERATIVE DEEPENING SEARCH ---
-    start_time = time.time()
-    best_move_global = None
-    best_score_global = -float('inf')
-    completed_depth = 0
-    top_moves = [] # Lưu danh sách các nước đi tốt để bốc ngẫu nhiên nếu level thấp
-
-    # Chạy từ depth 1 -> target_max_depth
-    for current_depth in range(1, target_max_depth + 1):
-        if time.time() - start_time > time_limit:
-            break
-
-        alpha = -float('inf')
-        beta = float('inf')
-        current_depth_moves = []
-        best_val_this_depth = -float('inf')
-        best_move_this_depth = None
-
-        # Move Ordering
-        legal_moves.sort(key=lambda m: get_move_score(board, m), reverse=True)
-        if best_move_global and best_move_global in legal_moves:
-            legal_moves.remove(best_move_global)
-            legal_moves.insert(0, best_move_global)
-
-        for move in legal_moves:
-            if time.time() - start_time > time_limit: 
-                break
+        return {
+            'best_move': legal_moves[0].uci(), 'search_score': 'Forced', 'pv': legal_moves[0].uci(),
+            'stats': _source_stats('forced')
+        }
 
-            board.push(move)
-            val = -negamax(board, current_depth - 1, -beta, -alpha)
+    # --- 3b. SYZYGY TABLEBASE TẠI GỐC (chỉ level không giả lập sai lầm) ---
+    tablebase = get_tablebase()
+    if tablebase is not None and blunder_chance == 0 and multipv == 1 and tablebase.covers(board):
+        tb_result = tablebase.best_root_move(board)
+        if tb_result:
+            tb_move, wdl = tb_result
+            board.push(tb_move)
+            tb_score = MATE_SCORE - 1 if board.is_checkmate() else wdl_to_score(wdl, 1)
             board.pop()
-
-            current_depth_moves.append((move, val))
-
-            if val > best_val_this_depth:
-                best_val_this_depth = val
-                best_move_this_depth = move
-            
-            alpha = max(alpha, val)
-
-        # Cập nhật kết quả tốt nhất nếu hoàn thành ít nhất 1 nước đi ở depth này
-        if best_move_this_depth:
-            best_move_global = best_move_this_depth
-            best_score_global = best_val_this_depth
-            top_moves = sorted(current_depth_moves, key=lambda x: x[1], reverse=True)
-            completed_depth = current_depth
-        
-        if abs(best_score_global) > MATE_SCORE - 1000:
-            break
+            stats = _source_stats('tablebase')
+            stats['tb_hits'] = 1
+            return {
+                'best_move': tb_move.uci(),
+                'search_score': format_score(tb_score, board.turn),
+                'pv': tb_move.uci(),
+                'stats': stats
+            }
+
+    # --- 4. ITERATIVE DEEPENING SEARCH (PVS + ASPIRATION WINDOWS) ---
+    # Level thấp cần BLUNDER_CANDIDATES nước có điểm chính xác để chọn nước sai
+    search_multipv = max(multipv, BLUNDER_CANDIDATES if blunder_chance > 0 else 1)
+    start_time = time.time()
+    ctx = SearchContext(
+        null_move=null_move, late_move_reductions=late_move_reductions,
+        stop_event=stop_event, deadline=start_time + time_limit, node_limit=node_limit,
+        multipv=search_multipv, tt=tt
+    )
+    if workers > 1 and search_multipv == 1 and parallel_mode == 'root':
+        # Chia nước gốc cho pool tiến trình
+        from backend.engines.parallel import root_split_search
+        best_move_global, best_score_global, top_moves, completed_depth = root_split_search(
+            board, legal_moves, target_max_depth, start_time, time_limit, ctx, workers, hint_move
+        )
+    elif workers > 1 and search_multipv == 1:
+        # Lazy SMP: nhiều tiến trình cùng tìm, chia sẻ bảng băm qua shared memory
+        from backend.engines.smp import lazy_smp_search
+        best_move_global, best_score_global, top_moves, completed_depth = lazy_smp_search(
+            board, legal_moves, target_max_depth, start_time, time_limit, ctx, workers, hint_move
+        )
+    else:
+        # MultiPV luôn tìm trong tiến trình hiện tại
+        best_move_global, best_score_global, top_moves, completed_depth = iterative_deepening(
+            board, legal_moves, target_max_depth, start_time, time_limit, ctx, hint_move=hint_move
+        )
+
+    stats = ctx.stats(time.time() - start_time)
+    stats['source'] = 'search'
+    stats['pv_hint'] = hint_move is not None
+
+    # Nếu không tìm được nước đi (timeout quá nhanh): dùng biến dự đoán nếu có, điểm mặc định là 0
+    if best_score_global == -INFINITY:
+        fallback = (hint_move,) + tuple(pv_hint[1:]) if hint_move else (legal_moves[0],)
+        return {
+            'best_move': fallback[0].uci(),
+            'search_score': "0.00",
+            'pv': ' '.join(move.uci() for move in fallback) if hint_move else "",
+            'stats': stats
+        }
 
     # --- 5. GIẢ LẬP SAI LẦM (BLUNDER LOGIC) ---
-    final_move = best_move_global
-    if skill_level < 15 and len(top_moves) > 1:
+    # Chọn trong các dòng MultiPV (điểm chính xác), không phải các nước chỉ có cận trên
+    final_move, final_pv = best_move_global, ctx.best_pv
+    lines = ctx.best_lines
+    if skill_level < 15 and len(lines) > 1:
         if random.random() < blunder_chance:
-            idx = random.randint(1, min(len(top_moves)-1, 3))
-            final_move = top_moves[idx][0]
-            best_score_global = top_moves[idx][1]
+            idx = random.randint(1, min(len(lines) - 1, BLUNDER_CANDIDATES - 1))
+            final_move, best_score_global, final_pv = lines[idx]
 
     # --- 6. FORMAT KẾT QUẢ ---
-    final_score_visual = best_score_global
-    if board.turn == chess.BLACK: final_score_visual = -best_score_global
-    
-    # Nếu không tìm được nước đi (timeout quá nhanh), mặc định là 0
-    if best_score_global == -float('inf'):
-        return {
-            'best_move': legal_moves[0].uci(),
-            'search_score': "0.00",
-            'pv': ""
-        }
-
-    if abs(best_score_global) > MATE_SCORE - 1000:
-        # Tính toán số nước đến mate
-        score_adjustment = MATE_SCORE - abs(best_score_global)
-        real_mate_in_plies = max(1, 100 - score_adjustment)
-        mate_in_moves = (real_mate_in_plies + 1) // 2
-        score_str = f"+M{mate_in_moves}" if final_score_visual > 0 else f"-M{mate_in_moves}"
-    else:
-        score_str = f"{final_score_visual / 100:+.2f}"
+    # Biến chính: triangular PV của lượt tìm (nếu bắt đầu bằng nước được chọn), kéo dài bằng bảng băm
+    pv_line = final_pv if final_pv[:1] == (final_move,) else (final_move,)
+    pv_line = extend_pv_from_tt(board, pv_line, ctx.tt)
 
-    return {
+    results = {
         'best_move': final_move.uci() if final_move else legal_moves[0].uci(),
-        'search_score': score_str,
-        'pv': final_move.uci() if final_move else ""
+        'search_score': format_score(best_score_global, board.turn),
+        'pv': ' '.join(move.uci() for move in pv_line),
+        'stats': stats
     }
+    if multipv > 1:
+        results['multipv'] = [
+            {
+                'move': move.uci(),
+                'search_score': format_score(score, board.turn),
+                'pv': ' '.join(m.uci() for m in extend_pv_from_tt(board, pv, ctx.tt))
+            }
+            for move, score, pv in lines[:multipv]
+        ]
+    return results
+
+
+def format_score(score, turn):
+    """
+    Điểm theo bên đang đi `turn` -> chuỗi theo góc nhìn Trắng ('+0.35', '+M3', '-M2', '+TB').
+    Điểm chiếu hết = MATE_SCORE - số ply từ gốc; thắng/thua theo tablebase (chưa biết số nước
+    chiếu hết) hiển thị '+TB' / '-TB' thay vì điểm centipawn giả.
+    """
+    visual = score if turn == chess.WHITE else -score
+    if abs(score) > MATE_SCORE - 1000:
+        real_mate_in_plies = max(1, MATE_SCORE - abs(score))
+        mate_in_moves = (real_mate_in_plies + 1) // 2
+        return f"+M{mate_in_moves}" if visual > 0 else f"-M{mate_in_moves}"
+    if abs(score) > DISTANCE_SCORE_BOUND:
+        return "+TB" if visual > 0 else "-TB"
+    return f"{visual / 100:+.2f}"
+
+
+def _source_stats(source):
+    """Thống kê rỗng cho nước đi không qua tìm kiếm (sách khai cuộc / nước bắt buộc)."""
+    stats = SearchContext().stats(0.0)
+    stats['source'] = source
+    return stats
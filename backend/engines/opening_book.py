@@ -0,0 +1,119 @@
+"""
+Module: opening_book.py
+Sách khai cuộc Polyglot (.bin) nằm sẵn trong bộ nhớ của tiến trình.
+
+- File được memory-map một lần mỗi tiến trình, các entry đọc thẳng thành mảng numpy
+  có cấu trúc (không copy); khóa Zobrist được chuyển sang mảng uint64 đã sắp xếp.
+- Tra cứu bằng np.searchsorted (tìm nhị phân), dưới 1 ms cho mỗi vị trí.
+- Nước đi Polyglot được giải mã thủ công, kể cả nhập thành (ghi dưới dạng "Vua ăn Xe").
+"""
+
+import mmap
+import os
+import random
+import threading
+
+import chess
+import chess.polyglot
+import numpy as np
+
+from backend.config import EngineConfig
+
+# Một entry Polyglot: 16 byte big-endian
+BOOK_ENTRY_DTYPE = np.dtype([
+    ('key', '>u8'),
+    ('move', '>u2'),
+    ('weight', '>u2'),
+    ('learn', '>u4'),
+])
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin", "gm2001.bin")
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def decode_polyglot_move(board, raw_move):
+    """
+    Giải mã 16 bit nước đi Polyglot:
+    bit 0-5 ô đích, bit 6-11 ô xuất phát, bit 12-14 quân phong cấp (1 = Mã ... 4 = Hậu).
+    Nhập thành được ghi là Vua đi tới ô Xe cùng màu, đổi lại thành ô đích chuẩn (g/c).
+    """
+    to_square = raw_move & 0x3F
+    from_square = (raw_move >> 6) & 0x3F
+    promotion_code = (raw_move >> 12) & 0x7
+    promotion = promotion_code + 1 if promotion_code else None
+
+    if (not board.chess960
+            and board.kings & board.occupied_co[board.turn] & chess.BB_SQUARES[from_square]
+            and board.rooks & board.occupied_co[board.turn] & chess.BB_SQUARES[to_square]):
+        to_square = to_square - 1 if to_square > from_square else to_square + 2
+
+    return chess.Move(from_square, to_square, promotion)
+
+
+class OpeningBook:
+    """Sách Polyglot memory-map, tra cứu bằng tìm nhị phân trên mảng khóa."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % BOOK_ENTRY_DTYPE.itemsize:
+                raise IOError(f"invalid polyglot book size: {path!r}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        if self._mmap is None:
+            self.entries = np.zeros(0, dtype=BOOK_ENTRY_DTYPE)
+        else:
+            self.entries = np.frombuffer(self._mmap, dtype=BOOK_ENTRY_DTYPE)
+        # Khóa dạng native để searchsorted không phải đổi byte order mỗi lần tra
+        self.keys = self.entries['key'].astype(np.uint64)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find_all(self, board):
+        """
+        Tất cả nước đi trong sách cho vị trí hiện tại: [(move, weight)].
+        Bỏ qua nước không hợp lệ (va chạm khóa hoặc sách lỗi).
+        """
+        key = np.uint64(chess.polyglot.zobrist_hash(board))
+        lo = int(np.searchsorted(self.keys, key, side='left'))
+        hi = int(np.searchsorted(self.keys, key, side='right'))
+        results = []
+        for entry in self.entries[lo:hi]:
+            move = decode_polyglot_move(board, int(entry['move']))
+            if board.is_legal(move):
+                results.append((move, int(entry['weight'])))
+        return results
+
+    def weighted_choice(self, board, rng=random):
+        """Chọn ngẫu nhiên một nước theo trọng số (None nếu vị trí không có trong sách)."""
+        candidates = self.find_all(board)
+        if not candidates:
+            return None
+        moves = [move for move, _ in candidates]
+        weights = [weight for _, weight in candidates]
+        if not any(weights):
+            return rng.choice(moves)
+        return rng.choices(moves, weights=weights)[0]
+
+
+def get_opening_book(path=None):
+    """
+    Sách khai cuộc của tiến trình (mở một lần rồi dùng lại).
+    Trả về None nếu không có file sách hoặc file lỗi (chỉ báo lỗi một lần, engine tìm kiếm bình thường).
+    """
+    path = path or EngineConfig.OPENING_BOOK_PATH or DEFAULT_BOOK_PATH
+    if path not in _books:
+        with _books_lock:
+            if path not in _books:
+                book = None
+                if os.path.exists(path):
+                    try:
+                        book = OpeningBook(path)
+                    except (OSError, ValueError) as e:
+                        print(f"Failed to open opening book {path!r}: {e}")
+                _books[path] = book
+    return _books[path]
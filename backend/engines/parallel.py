@@ -0,0 +1,322 @@
+"""
+Module: parallel.py
+Pool tiến trình dùng lâu dài cho engine Minimax và chế độ chia nước gốc (root splitting).
+
+- Pool được khởi động sẵn khi app chạy (warm_pool) nên request không phải fork tiến trình.
+- Mỗi tiến trình trong pool giữ bảng băm riêng (minimax.TRANS_TABLE) giữa các request.
+- Root splitting: nước tốt nhất (PV) được tìm tại chỗ để có alpha, các nước gốc còn lại
+  được gửi vào pool theo thứ tự get_move_score. Alpha hiện tại nằm trong bộ nhớ chia sẻ
+  (SharedRootState): tiến trình con đọc lại khi bắt đầu và trước khi tìm lại, nên alpha tăng ở
+  tiến trình khác cũng thu hẹp cửa sổ của các nước đang chờ / đang tìm.
+- Cùng vùng nhớ có cờ dừng: tiến trình chính bật cờ khi lượt tìm kết thúc (xong, hết giờ
+  hoặc bị hủy), các nước đang tìm dở trong pool dừng ngay thay vì chạy tới hết giờ.
+- Tiến trình con dựng lại bàn cờ từ vị trí gốc + lịch sử nước đi (phát hiện lặp lại thế cờ)
+  và trả về biến chính của nước đã tìm.
+"""
+
+import atexit
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import chess
+
+from backend.engines import minimax
+from backend.engines.search_board import SearchBoard
+
+_executor = None
+_executor_workers = 0
+
+# Thế hệ bảng băm: tăng khi xóa cache, tiến trình con tự xóa bảng khi thấy thế hệ mới
+_tables_generation = 0
+
+# Chu kỳ kiểm tra cờ hủy của tiến trình chính khi chờ kết quả (giây)
+POLL_INTERVAL = 0.05
+
+# Lượt tìm / thế hệ bảng băm hiện tại trong tiến trình con
+_worker_search_id = None
+_worker_generation = 0
+# Trạng thái chia sẻ của lượt tìm hiện tại (tiến trình con giữ một vùng gắn kèm)
+_worker_state = None
+
+
+class SharedFlag:
+    """Cờ dừng 1 byte trong bộ nhớ chia sẻ, cùng giao diện với threading.Event."""
+
+    def __init__(self, buf, offset=0):
+        self._buf = buf
+        self._offset = offset
+
+    def is_set(self):
+        return self._buf[self._offset] != 0
+
+    def set(self):
+        self._buf[self._offset] = 1
+
+    def clear(self):
+        self._buf[self._offset] = 0
+
+
+class SharedRootState:
+    """
+    Trạng thái chia sẻ của một lượt root splitting: alpha tại gốc (int64) và cờ dừng
+    (byte ngay sau alpha, dùng làm stop_event của SearchContext trong tiến trình con).
+    """
+
+    _ALPHA_FORMAT = 'q'
+    _STOP_OFFSET = struct.calcsize(_ALPHA_FORMAT)
+
+    def __init__(self, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self._STOP_OFFSET + 1)
+            self.is_owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.is_owner = False
+        self.name = self.shm.name
+        self.stop_flag = SharedFlag(self.shm.buf, self._STOP_OFFSET)
+        if self.is_owner:
+            self.set_alpha(-minimax.INFINITY)
+            self.stop_flag.clear()
+
+    def get_alpha(self):
+        return struct.unpack_from(self._ALPHA_FORMAT, self.shm.buf)[0]
+
+    def set_alpha(self, value):
+        struct.pack_into(self._ALPHA_FORMAT, self.shm.buf, 0, value)
+
+    def close(self):
+        self.stop_flag = None
+        self.shm.close()
+        if self.is_owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _attach_state(name):
+    """
+    Gắn trạng thái chia sẻ của lượt tìm `name` trong tiến trình con (đóng vùng của lượt trước).
+    Trả về None nếu lượt tìm đã kết thúc và vùng nhớ đã bị xóa.
+    """
+    global _worker_state
+    if _worker_state is None or _worker_state.name != name:
+        if _worker_state is not None:
+            _worker_state.close()
+            _worker_state = None
+        try:
+            _worker_state = SharedRootState(name)
+        except FileNotFoundError:
+            return None
+    return _worker_state
+
+
+def board_history(board):
+    """(FEN vị trí gốc, các nước đã đi dạng UCI): đủ để dựng lại bàn cờ kèm lịch sử lặp."""
+    return board.root().fen(), [move.uci() for move in board.move_stack]
+
+
+def rebuild_board(root_fen, history):
+    board = SearchBoard(root_fen)
+    for move_uci in history:
+        board.push_uci(move_uci)
+    return board
+
+
+def get_executor(workers):
+    """Pool tiến trình dùng lâu dài; tạo lại nếu số tiến trình thay đổi."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        # Tiến trình con dùng chung resource tracker với tiến trình chính,
+        # tránh mỗi con tự dọn (unlink) bộ nhớ chia sẻ của Lazy SMP khi thoát
+        resource_tracker.ensure_running()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def _ping():
+    return True
+
+
+def warm_pool(workers):
+    """Khởi động trước toàn bộ tiến trình trong pool (gọi lúc app khởi động)."""
+    if workers <= 1:
+        return
+    executor = get_executor(workers)
+    wait([executor.submit(_ping) for _ in range(workers)])
+
+
+def clear_worker_tables():
+    """Yêu cầu các tiến trình con xóa bảng băm riêng ở lượt tìm kế tiếp."""
+    global _tables_generation
+    _tables_generation += 1
+
+
+def _search_root_move(search_id, generation, root_fen, history, move_uci, depth, state_name, beta,
+                      deadline, null_move, late_move_reductions):
+    """
+    Tìm một nước gốc trong tiến trình con (PVS: cửa sổ rỗng, tìm lại nếu vượt alpha),
+    với alpha mới nhất đọc từ bộ nhớ chia sẻ.
+    Trả về (move_uci, score, pv, nodes, qnodes); score = None nếu hết giờ / lượt tìm đã dừng,
+    pv (danh sách UCI, bắt đầu bằng move_uci) chỉ có khi nước này vượt alpha.
+    """
+    global _worker_search_id, _worker_generation
+    if generation != _worker_generation:
+        minimax.TRANS_TABLE.clear()
+        minimax.clear_eval_caches()
+        _worker_generation = generation
+    if search_id != _worker_search_id:
+        minimax.TRANS_TABLE.new_search()
+        _worker_search_id = search_id
+
+    state = _attach_state(state_name)
+    if state is None or state.stop_flag.is_set():
+        return move_uci, None, [], 0, 0
+    alpha = state.get_alpha()
+    board = rebuild_board(root_fen, history)
+    board.push_uci(move_uci)
+    ctx = minimax.SearchContext(null_move, late_move_reductions, stop_event=state.stop_flag, deadline=deadline)
+    pv = []
+    try:
+        val = -minimax.negamax(board, depth - 1, -alpha - 1, -alpha, ctx, 1)
+        if alpha < val < beta:
+            # Nước khác có thể đã nâng alpha trong lúc tìm cửa sổ rỗng
+            alpha = max(alpha, state.get_alpha())
+            ctx.pv[1] = ()
+            val = -minimax.negamax(board, depth - 1, -beta, -alpha, ctx, 1)
+            if val > alpha:
+                # Triangular PV, kéo dài bằng bảng băm riêng của tiến trình con
+                # (bảng băm của tiến trình chính không có các entry này)
+                board.pop()
+                line = (chess.Move.from_uci(move_uci),) + ctx.pv[1]
+                pv = [move.uci() for move in minimax.extend_pv_from_tt(board, line, ctx.tt)]
+    except minimax.SearchAborted:
+        val = None
+    return move_uci, val, pv, ctx.nodes, ctx.qnodes
+
+
+def root_split_search(board, legal_moves, max_depth, start_time, time_limit, ctx, workers, hint_move=None):
+    """
+    Iterative Deepening với các nước gốc chia cho pool tiến trình.
+    Trả về cùng dạng với minimax.iterative_deepening; `hint_move` được xét đầu tiên như ở đó.
+    """
+    executor = get_executor(workers)
+    state = SharedRootState()
+    try:
+        return _root_split_iterations(
+            executor, state, board, legal_moves, max_depth, start_time, time_limit, ctx, workers, hint_move
+        )
+    finally:
+        # Dừng các nước còn đang tìm trong pool (future.cancel() không dừng được task đang chạy)
+        state.stop_flag.set()
+        state.close()
+
+
+def _root_split_iterations(executor, state, board, legal_moves, max_depth, start_time, time_limit,
+                           ctx, workers, hint_move):
+    root_fen, history = board_history(board)
+    search_id = f"{board.fen()}@{start_time}"
+    deadline = start_time + time_limit
+    legal_moves = list(legal_moves)
+
+    best_move_global = None
+    best_score_global = -minimax.INFINITY
+    completed_depth = 0
+    top_moves = []
+
+    for current_depth in range(1, max_depth + 1):
+        if time.time() - start_time > time_limit or ctx.stopped() or ctx.aborted:
+            break
+
+        # Move Ordering
+        ctx.new_iteration()
+        legal_moves.sort(key=lambda m: minimax.get_move_score(board, m, ctx), reverse=True)
+        first_move = best_move_global or hint_move
+        if first_move and first_move in legal_moves:
+            legal_moves.remove(first_move)
+            legal_moves.insert(0, first_move)
+
+        # 1. Nước PV tìm tại chỗ với cửa sổ đầy đủ để có alpha
+        first = legal_moves[0]
+        root_stack_size = len(board.move_stack)
+        board.push(first)
+        try:
+            alpha = -minimax.negamax(board, current_depth - 1, -minimax.INFINITY, minimax.INFINITY, ctx, 1)
+        except minimax.SearchAborted:
+            while len(board.move_stack) > root_stack_size:
+                board.pop()
+            break
+        board.pop()
+        pvs = {first: (first,) + ctx.pv[1]}
+        best_move, scored_moves = first, [(first, alpha)]
+        state.set_alpha(alpha)
+
+        # 2. Các nước còn lại gửi vào pool; alpha mới nhất đọc từ bộ nhớ chia sẻ
+        pending = [move.uci() for move in legal_moves[1:]]
+        in_flight = set()
+        completed = True
+        while pending or in_flight:
+            while pending and len(in_flight) < workers:
+                in_flight.add(executor.submit(
+                    _search_root_move, search_id, _tables_generation, root_fen, history, pending.pop(0),
+                    current_depth, state.name, minimax.INFINITY, deadline, ctx.null_move,
+                    ctx.late_move_reductions
+                ))
+            # Chờ theo từng chu kỳ ngắn để phản hồi kịp yêu cầu hủy
+            remaining = deadline - time.time()
+            done, in_flight = wait(
+                in_flight, timeout=max(0.0, min(remaining, POLL_INTERVAL)), return_when=FIRST_COMPLETED
+            )
+            if ctx.stopped() or (not done and remaining <= 0):
+                completed = False
+                break
+            for future in done:
+                move_uci, val, pv, nodes, qnodes = future.result()
+                ctx.nodes += nodes
+                ctx.qnodes += qnodes
+                if val is None:
+                    completed = False
+                    continue
+                move = chess.Move.from_uci(move_uci)
+                scored_moves.append((move, val))
+                if val > alpha:
+                    alpha = val
+                    best_move = move
+                    pvs[move] = tuple(chess.Move.from_uci(uci) for uci in pv) or (move,)
+                    state.set_alpha(alpha)
+            if not completed:
+                break
+
+        for future in in_flight:
+            future.cancel()
+
+        # Kết quả dang dở vẫn dùng được: nước PV đã có điểm chính xác
+        best_move_global = best_move
+        best_score_global = alpha
+        top_moves = sorted(scored_moves, key=lambda x: x[1], reverse=True)
+        # Biến chính: triangular PV của nước tốt nhất (tìm tại chỗ hoặc trả về từ pool)
+        ctx.best_pv = pvs[best_move]
+        if completed:
+            completed_depth = current_depth
+        ctx.record_iteration(current_depth, start_time, best_score_global, ctx.best_pv, completed)
+
+        if not completed or abs(best_score_global) > minimax.MATE_SCORE - 1000:
+            break
+
+    return best_move_global, best_score_global, top_moves, completed_depth
+
+
+def shutdown():
+    """Dừng pool khi tiến trình kết thúc."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+atexit.register(shutdown)
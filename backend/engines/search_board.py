@@ -0,0 +1,84 @@
+"""
+Module: search_board.py
+Bàn cờ dùng cho tìm kiếm: khóa Zobrist (Polyglot) được cập nhật tăng dần theo push/pop.
+
+- chess.polyglot.zobrist_hash() duyệt toàn bộ bàn cờ mỗi lần gọi (~30 µs);
+  SearchBoard chỉ XOR phần thay đổi của nước vừa đi nên rẻ hơn nhiều.
+- pop() khôi phục khóa từ ngăn xếp, không tính lại.
+- Mọi thao tác làm mới ngăn xếp của python-chess (set_fen, set_piece_at, ...) đều gọi
+  clear_stack(), nên khóa được tính lại từ đầu ở đó.
+"""
+
+import chess
+import chess.polyglot
+
+ZOBRIST_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(ZOBRIST_ARRAY)
+_TURN_KEY = ZOBRIST_ARRAY[780]
+
+
+class SearchBoard(chess.Board):
+    """chess.Board kèm thuộc tính `zobrist` luôn bằng chess.polyglot.zobrist_hash(board)."""
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._zobrist_stack = []
+        self.refresh_zobrist()
+
+    def refresh_zobrist(self):
+        """Tính lại khóa từ đầu (các phần castling / en passant được lưu riêng để cập nhật nhanh)."""
+        self._castling_key = _HASHER.hash_castling(self)
+        self._ep_key = _HASHER.hash_ep_square(self)
+        self.zobrist = _HASHER.hash_board(self) ^ self._castling_key ^ self._ep_key ^ _HASHER.hash_turn(self)
+
+    def push(self, move):
+        before = (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+                  self.occupied_co[chess.WHITE], self.occupied_co[chess.BLACK], self.castling_rights)
+        super().push(move)
+        self._zobrist_stack.append((self.zobrist, self._castling_key, self._ep_key))
+        self._update_zobrist(before)
+
+    def _update_zobrist(self, before):
+        key = self.zobrist ^ _TURN_KEY
+        old_white, old_black, old_castling = before[6], before[7], before[8]
+        new_white, new_black = self.occupied_co[chess.WHITE], self.occupied_co[chess.BLACK]
+        after = (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings)
+
+        # Quân: chỉ xét loại quân có bitboard thay đổi hoặc có ô đổi màu
+        # (phong cấp ăn quân cùng loại). Chỉ số Polyglot: Đen = 0, Trắng = 1.
+        recolored = (old_white ^ new_white) | (old_black ^ new_black)
+        for index, new_mask in enumerate(after):
+            old_mask = before[index]
+            if old_mask != new_mask or old_mask & recolored:
+                base = 128 * index
+                for square in chess.scan_forward((old_mask & old_black) ^ (new_mask & new_black)):
+                    key ^= ZOBRIST_ARRAY[base + square]
+                for square in chess.scan_forward((old_mask & old_white) ^ (new_mask & new_white)):
+                    key ^= ZOBRIST_ARRAY[base + 64 + square]
+
+        # Quyền nhập thành chỉ đổi khi Vua/Xe rời ô gốc hoặc Xe bị ăn
+        if self.castling_rights != old_castling:
+            castling_key = _HASHER.hash_castling(self)
+            key ^= self._castling_key ^ castling_key
+            self._castling_key = castling_key
+
+        # En passant chỉ có sau nước Tốt đi 2 ô
+        if self._ep_key or self.ep_square is not None:
+            ep_key = _HASHER.hash_ep_square(self)
+            key ^= self._ep_key ^ ep_key
+            self._ep_key = ep_key
+
+        self.zobrist = key
+
+    def pop(self):
+        move = super().pop()
+        self.zobrist, self._castling_key, self._ep_key = self._zobrist_stack.pop()
+        return move
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.zobrist, board._castling_key, board._ep_key = self.zobrist, self._castling_key, self._ep_key
+        if stack:
+            stack = len(self.move_stack) if stack is True else stack
+            board._zobrist_stack = self._zobrist_stack[-stack:]
+        return board
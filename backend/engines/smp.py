@@ -0,0 +1,179 @@
+"""
+Module: smp.py
+Lazy SMP cho engine Minimax: chạy thêm N-1 tiến trình phụ cùng tìm kiếm một vị trí,
+tất cả dùng chung một bảng băm đặt trong `multiprocessing.shared_memory`.
+Tiến trình phụ bắt đầu ở độ sâu so le để khám phá cây khác nhau và bổ sung entry cho
+tiến trình chính; kết quả trả về là lượt tìm hoàn thành độ sâu lớn nhất.
+"""
+
+import atexit
+import threading
+import time
+from concurrent.futures import wait
+from multiprocessing import shared_memory
+
+import chess
+
+from backend.config import EngineConfig
+from backend.engines import minimax
+from backend.engines.parallel import SharedFlag, board_history, get_executor, rebuild_board
+from backend.engines.transposition import TranspositionTable
+
+# Vùng điều khiển ở đầu bộ nhớ chia sẻ (byte 0: cờ dừng)
+CONTROL_BYTES = 64
+STOP_FLAG_OFFSET = 0
+
+# Thời gian chờ thêm cho tiến trình phụ trả kết quả sau khi hết giờ (giây)
+HELPER_GRACE_TIME = 0.05
+
+_shared_table = None
+_attached_tables = {}
+_smp_lock = threading.Lock()
+
+
+class SharedSearchTable:
+    """Vùng nhớ chia sẻ gồm [vùng điều khiển | bảng băm]."""
+
+    def __init__(self, size_mb, name=None):
+        self.size_mb = size_mb
+        nbytes = CONTROL_BYTES + TranspositionTable.required_bytes(size_mb)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.is_owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.is_owner = False
+        self.name = self.shm.name
+        self.stop_flag = SharedFlag(self.shm.buf, STOP_FLAG_OFFSET)
+        with self.shm.buf[CONTROL_BYTES:] as tt_buffer:
+            self.tt = TranspositionTable(size_mb, buffer=tt_buffer)
+
+    def close(self):
+        self.tt.release()
+        self.shm.close()
+        if self.is_owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def get_shared_table():
+    """Bảng băm chia sẻ của tiến trình chính (tạo một lần)."""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = SharedSearchTable(EngineConfig.MINIMAX_HASH_MB)
+    return _shared_table
+
+
+def clear_shared_table():
+    """Xóa bảng băm chia sẻ (nếu đã tạo)."""
+    if _shared_table is not None:
+        _shared_table.tt.clear()
+
+
+def _attach_table(name, size_mb):
+    """Gắn (và lưu đệm) bảng băm chia sẻ trong tiến trình phụ."""
+    table = _attached_tables.get(name)
+    if table is None:
+        table = SharedSearchTable(size_mb, name=name)
+        _attached_tables[name] = table
+    return table
+
+
+def _helper_search(name, size_mb, age, root_fen, history, max_depth, start_time, time_limit, start_depth,
+                   null_move, late_move_reductions):
+    """
+    Tìm kiếm trong tiến trình phụ; trả về kết quả dạng picklable (UCI) kèm số nút.
+    Bàn cờ dựng lại từ vị trí gốc + lịch sử nước đi, nên tiến trình phụ thấy cùng các thế hòa
+    (lặp lại, luật 50 nước) với tiến trình chính và không ghi điểm sai vào bảng băm chung.
+    """
+    table = _attach_table(name, size_mb)
+    table.tt.age = age
+    board = rebuild_board(root_fen, history)
+    ctx = minimax.SearchContext(
+        null_move, late_move_reductions, tt=table.tt, stop_event=table.stop_flag,
+        deadline=start_time + time_limit
+    )
+    best_move, best_score, top_moves, completed_depth = minimax.iterative_deepening(
+        board, board.legal_moves, max_depth, start_time, time_limit, ctx, start_depth
+    )
+    return (
+        best_move.uci() if best_move else None,
+        best_score,
+        [(move.uci(), score) for move, score in top_moves],
+        completed_depth,
+        ctx.nodes,
+        ctx.qnodes
+    )
+
+
+def lazy_smp_search(board, legal_moves, max_depth, start_time, time_limit, ctx, workers, hint_move=None):
+    """
+    Lazy SMP: tiến trình chính + (workers - 1) tiến trình phụ dùng chung bảng băm.
+    Trả về cùng dạng với minimax.iterative_deepening (`hint_move` được xét đầu tiên như ở đó).
+    Bảng băm riêng của phiên (ctx.tt khác TRANS_TABLE) được giữ cho tiến trình chính;
+    khi đó tiến trình phụ chỉ góp kết quả, bảng chung không thay bảng của ván.
+    Nếu đang có lượt Lazy SMP khác chạy, tìm kiếm đơn luồng như bình thường.
+    """
+    if not _smp_lock.acquire(blocking=False):
+        return minimax.iterative_deepening(
+            board, legal_moves, max_depth, start_time, time_limit, ctx, hint_move=hint_move
+        )
+
+    try:
+        table = get_shared_table()
+        table.tt.new_search()
+        table.stop_flag.clear()
+        if ctx.tt is minimax.TRANS_TABLE:
+            ctx.tt = table.tt
+
+        executor = get_executor(workers)
+        root_fen, history = board_history(board)
+        futures = [
+            executor.submit(
+                _helper_search, table.name, table.size_mb, table.tt.age, root_fen, history, max_depth,
+                start_time, time_limit, 1 + (helper_id % 2), ctx.null_move, ctx.late_move_reductions
+            )
+            for helper_id in range(1, workers)
+        ]
+
+        results = [minimax.iterative_deepening(
+            board, legal_moves, max_depth, start_time, time_limit, ctx, hint_move=hint_move
+        )]
+
+        # Dừng tiến trình phụ và gom kết quả đã xong
+        table.stop_flag.set()
+        remaining = max(0.0, start_time + time_limit - time.time())
+        done, _ = wait(futures, timeout=remaining + HELPER_GRACE_TIME)
+        for future in futures:
+            if future not in done or future.exception() is not None:
+                continue
+            move_uci, score, top_moves, completed_depth, nodes, qnodes = future.result()
+            # Số nút của tiến trình phụ được cộng vào thống kê của lượt tìm
+            ctx.nodes += nodes
+            ctx.qnodes += qnodes
+            if move_uci is None:
+                continue
+            results.append((
+                chess.Move.from_uci(move_uci),
+                score,
+                [(chess.Move.from_uci(uci), value) for uci, value in top_moves],
+                completed_depth
+            ))
+
+        # Kết quả sâu nhất thắng; bằng nhau thì ưu tiên tiến trình chính
+        return max(results, key=lambda result: result[3])
+    finally:
+        _smp_lock.release()
+
+
+def shutdown():
+    """Dọn dẹp bộ nhớ chia sẻ khi tiến trình kết thúc."""
+    global _shared_table
+    if _shared_table is not None:
+        _shared_table.close()
+        _shared_table = None
+
+
+atexit.register(shutdown)
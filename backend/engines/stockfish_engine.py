@@ -1,29 +1,208 @@
+"""
+Stockfish engine layer built on python-chess's asyncio UCI protocol.
+All Stockfish processes are driven from one shared event loop (EngineLoop), so a
+single background thread handles every engine conversation. Flask routes use the
+blocking adapters at the bottom of this module (get_stockfish_move, ...).
+"""
+
+import asyncio
+import concurrent.futures
 import chess
 import chess.engine
 import os
 import threading
+import time
 import atexit
 import platform
 import shutil
+from contextlib import asynccontextmanager
+
+from backend.config import EngineConfig
+
+# Extra seconds a UCI command may take beyond its search time before the process is
+# considered hung (same margin as SimpleEngine's default timeout)
+COMMAND_TIMEOUT = 10.0
+
+# Lines reported when Skill Level is below the maximum: Stockfish picks its weakened move
+# among its top 4 lines anyway, so the chosen move's score/PV comes from the same search
+SKILL_MULTIPV = 4
+
+SEARCH_INFO = chess.engine.INFO_BASIC | chess.engine.INFO_SCORE | chess.engine.INFO_PV
+
+# How often a running search checks its stop_event (set from a Flask thread by cancel_search)
+STOP_POLL_INTERVAL = 0.05
+
 
-class StockfishEngineManager:
+class EngineLoop:
     """
-    Singleton manager for persistent Stockfish engine process.
-    Reuses the same process to avoid expensive startup/shutdown overhead.
+    The asyncio event loop shared by all engine processes of this worker,
+    running forever in one daemon thread.
     """
     _instance = None
-    _lock = threading.Lock()
-    
+    _instance_lock = threading.Lock()
+
     def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="engine-loop", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get_instance(cls):
+        if not cls._instance:
+            with cls._instance_lock:
+                if not cls._instance:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared loop and block the calling thread for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+class StockfishProcess:
+    """
+    One persistent Stockfish process of the pool, with its health state.
+    Only the coroutine that checked it out (or the pool, for idle housekeeping) talks to it.
+    """
+
+    def __init__(self, index, engine_path):
+        self.index = index
+        self.engine_path = engine_path
+        self.transport = None
+        self.engine = None
+        # 'stopped' (not started yet / shut down), 'ready', 'failed' (restarted on next checkout)
+        self.state = "stopped"
+        self.last_error = None
+        self.restarts = 0
+        self.searches = 0
+        self.failures = 0
+        # Game of the last search; a process pondering for a game is preferred for it
+        self.game = None
+        self.pondering = False
+        # Bumped by every checkout; a ponder stop timer only fires for its own search
+        self.ponder_generation = 0
+        # Options currently set on the process (only changes are sent)
+        self.options = {}
+        self.options_sent = 0
+        self.options_skipped = 0
+
+    @property
+    def skill_level(self):
+        return self.options.get("Skill Level")
+
+    async def configure(self, options):
+        """
+        Set engine options, sending only those that differ from the process's current state
+        (an unchanged configure would still queue a command and cancel pondering).
+        """
+        changed = {name: value for name, value in options.items() if self.options.get(name) != value}
+        self.options_skipped += len(options) - len(changed)
+        if changed:
+            await self.engine.configure(changed)
+            self.options.update(changed)
+            self.options_sent += len(changed)
+
+    async def get_engine(self):
+        """Ensures the engine process is running and configured."""
+        if self.engine is None:
+            if not os.path.exists(self.engine_path):
+                return None
+            try:
+                self.transport, self.engine = await chess.engine.popen_uci(self.engine_path)
+                await self.configure({
+                    "Threads": EngineConfig.STOCKFISH_THREADS,
+                    "Hash": EngineConfig.STOCKFISH_HASH_MB,
+                })
+                if self.state == "failed":
+                    self.restarts += 1
+                self.state = "ready"
+            except Exception as e:
+                print(f"Failed to start Stockfish: {e}")
+                self.mark_failed(e)
+        return self.engine
+
+    def mark_failed(self, error):
+        """Kill a crashed / unresponsive process; it is restarted on its next checkout"""
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        self._kill()
+        self.state = "failed"
+
+    def _kill(self):
+        if self.transport is not None:
+            self.transport.close()
+        self.transport = None
         self.engine = None
+        self.options = {}
+        self.pondering = False
+
+    async def shutdown(self):
+        """Stops the Stockfish process."""
+        if self.engine is not None:
+            try:
+                await asyncio.wait_for(self.engine.quit(), COMMAND_TIMEOUT)
+            except Exception:
+                pass
+        self._kill()
+        self.state = "stopped"
+
+    def stats(self):
+        return {
+            'index': self.index,
+            'state': self.state,
+            'game': self.game,
+            'pondering': self.pondering,
+            'skill_level': self.skill_level,
+            'options_sent': self.options_sent,
+            'options_skipped': self.options_skipped,
+            'searches': self.searches,
+            'failures': self.failures,
+            'restarts': self.restarts,
+            'last_error': self.last_error
+        }
+
+
+class StockfishPool:
+    """
+    Bounded pool of persistent Stockfish processes (singleton per worker process).
+    Each request checks a process out for its whole search and checks it back in, so up
+    to STOCKFISH_POOL_SIZE searches run concurrently; processes start lazily on first use.
+    Pool methods are coroutines and run on the shared EngineLoop.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size=EngineConfig.STOCKFISH_POOL_SIZE):
         self.engine_path = self._find_engine_path()
-        
+        self.processes = [StockfishProcess(i, self.engine_path) for i in range(max(1, size))]
+        # Idle processes, least recently used first
+        self._idle = list(self.processes)
+        self._cond = asyncio.Condition()
+        # Queue metrics (for sizing the pool)
+        self.checkouts = 0
+        self.skill_matches = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
     @classmethod
     def get_instance(cls):
         if not cls._instance:
-            with cls._lock:
+            with cls._instance_lock:
                 if not cls._instance:
                     cls._instance = cls()
+                    atexit.register(cls._instance.close)
         return cls._instance
 
     def _find_engine_path(self):
@@ -36,89 +215,358 @@ class StockfishEngineManager:
                 path = shutil.which("stockfish") or path
         return path
 
-    def get_engine(self):
-        """Ensures the engine process is running and configured."""
-        with self._lock:
-            if self.engine is None:
-                if not os.path.exists(self.engine_path):
-                    return None
-                
-                try:
-                    self.engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
-                    self.engine.configure({
-                        "Threads": 1,      # Minimize CPU usage
-                        "Hash": 16,        # Minimize RAM usage
-                    })
-                    # Register cleanup
-                    atexit.register(self.shutdown)
-                except Exception as e:
-                    print(f"Failed to start Stockfish: {e}")
-                    self.engine = None
-            return self.engine
-
-    def shutdown(self):
-        """Kills the Stockfish process."""
-        with self._lock:
-            if self.engine:
-                try:
-                    self.engine.quit()
-                except:
-                    pass
-                self.engine = None
-
-def get_stockfish_move(fen, skill_level=10, time_limit=1.0):
+    def _pick_idle(self, game, skill_level):
+        """
+        Idle process for `game`: its own (pondering) process, then one not pondering that is
+        already set to `skill_level`, then any one not pondering, then LRU
+        """
+        if game is not None:
+            for process in self._idle:
+                if process.game == game:
+                    return process
+        free = [process for process in self._idle if not process.pondering]
+        for process in free:
+            if skill_level is not None and process.skill_level == skill_level:
+                return process
+        return free[0] if free else self._idle[0]
+
+    async def checkout(self, timeout=EngineConfig.STOCKFISH_CHECKOUT_TIMEOUT, game=None, skill_level=None):
+        """
+        Take an idle process, waiting at most `timeout` seconds.
+        Processes already configured for `skill_level` are preferred (no option change).
+
+        Returns:
+            StockfishProcess, or None if all processes stayed busy (caller falls back)
+        """
+        start = time.perf_counter()
+        async with self._cond:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._idle), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return None
+            finally:
+                self.waiting -= 1
+            process = self._pick_idle(game, skill_level)
+            self._idle.remove(process)
+        waited = time.perf_counter() - start
+        self.checkouts += 1
+        self.skill_matches += 1 if skill_level is not None and process.skill_level == skill_level else 0
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+        process.ponder_generation += 1
+        return process
+
+    async def checkin(self, process):
+        async with self._cond:
+            self._idle.append(process)
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def process(self, timeout=EngineConfig.STOCKFISH_CHECKOUT_TIMEOUT, game=None, skill_level=None):
+        """`async with pool.process() as process:` (process is None on checkout timeout)"""
+        process = await self.checkout(timeout, game, skill_level)
+        try:
+            yield process
+        finally:
+            if process is not None:
+                await self.checkin(process)
+
+    def schedule_ponder_stop(self, process):
+        """
+        Stop the process's background pondering after PONDER_TIME_LIMIT seconds
+        (called while it is checked out). Any later checkout cancels the timer's effect.
+        """
+        generation = process.ponder_generation
+        asyncio.get_running_loop().call_later(
+            EngineConfig.PONDER_TIME_LIMIT,
+            lambda: asyncio.ensure_future(self._stop_ponder(process, generation))
+        )
+
+    async def _stop_ponder(self, process, generation):
+        async with self._cond:
+            if process not in self._idle or process.ponder_generation != generation:
+                return
+            self._idle.remove(process)
+        try:
+            if process.engine is not None:
+                # Any new command sends "stop" to the pondering search first
+                await asyncio.wait_for(process.engine.ping(), COMMAND_TIMEOUT)
+            process.pondering = False
+        except Exception as e:
+            print(f"Failed to stop pondering: {e}")
+            process.mark_failed(e)
+        finally:
+            await self.checkin(process)
+
+    async def shutdown(self):
+        """Stops all idle Stockfish processes (busy ones are left to their search)."""
+        for process in list(self._idle):
+            await process.shutdown()
+
+    def close(self):
+        """Blocking shutdown for atexit."""
+        try:
+            EngineLoop.get_instance().run(self.shutdown(), COMMAND_TIMEOUT)
+        except Exception:
+            pass
+
+    def stats(self):
+        checkouts = self.checkouts
+        idle = len(self._idle)
+        return {
+            'size': len(self.processes),
+            'idle': idle,
+            'in_use': len(self.processes) - idle,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'checkouts': checkouts,
+            'skill_match_rate': round(self.skill_matches / checkouts, 4) if checkouts else 0.0,
+            'timeouts': self.timeouts,
+            'avg_wait': round(self.wait_time / checkouts, 4) if checkouts else 0.0,
+            'max_wait': round(self.max_wait_time, 4),
+            'processes': [process.stats() for process in self.processes]
+        }
+
+
+# ==================== ASYNC API ====================
+
+async def get_move(fen, skill_level=10, time_limit=1.0, multipv=1, board=None, game=None, ponder=False,
+                   stop_event=None):
+    """
+    Best move at `skill_level` from a pooled Stockfish process, with its score, PV,
+    depth and nodes from one search of `time_limit` seconds.
+    multipv > 1 also returns the top-k lines ('multipv') from the same search.
+    `board` (position `fen` with its move history) and `game` identify the game: with
+    ponder=True Stockfish keeps searching on its expected reply after answering, and
+    the next call on the position after that reply continues it with 'ponderhit'.
+    Setting `stop_event` (threading.Event) sends 'stop': the search returns its best move
+    so far, marked 'interrupted' (a pondering play() is cancelled and returns no move).
+    If no process frees up within STOCKFISH_CHECKOUT_TIMEOUT, returns at once with
+    'busy': True so the caller can fall back to another engine.
+    """
+    pool = StockfishPool.get_instance()
+    if not os.path.exists(pool.engine_path):
+        return {"success": False, "error": f"Stockfish not found at {pool.engine_path}"}
+
+    async with pool.process(game=game, skill_level=skill_level) as process:
+        if process is None:
+            return {"success": False, "busy": True, "error": "All Stockfish processes are busy"}
+
+        engine = await process.get_engine()
+        if not engine:
+            return {"success": False, "error": f"Stockfish failed to start: {process.last_error}"}
+
+        try:
+            process.searches += 1
+            process.game = game
+            process.pondering = False
+            board = board.copy() if board is not None else chess.Board(fen)
+            # Configure engine for current search (no command if already at this level,
+            # so a pending ponder search can still be resumed with 'ponderhit')
+            await process.configure({"Skill Level": skill_level})
+
+            if ponder and multipv == 1:
+                # Only play() can keep searching on the expected reply after 'bestmove'
+                return await asyncio.wait_for(
+                    _unless_stopped(_play_and_ponder(pool, process, board, time_limit, game), stop_event),
+                    time_limit + COMMAND_TIMEOUT
+                )
+
+            return await asyncio.wait_for(
+                _search(engine, board, time_limit, multipv, skill_level, game, stop_event),
+                time_limit + COMMAND_TIMEOUT
+            )
+
+        except Exception as e:
+            print(f"Stockfish Communication Error: {e!r}")
+            # Kill this process on crash / hang; it is restarted on its next checkout
+            process.mark_failed(e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+
+async def analyse(fen, time_limit=EngineConfig.EVALUATION_TIME_LIMIT, multipv=1):
+    """
+    Full-strength analysis (no Skill Level): best move, score, PV, depth and nodes,
+    plus the top-k lines ('multipv') when multipv > 1.
+    """
+    pool = StockfishPool.get_instance()
+    if not os.path.exists(pool.engine_path):
+        return {"success": False, "error": f"Stockfish not found at {pool.engine_path}"}
+
+    async with pool.process(skill_level=EngineConfig.MAX_SKILL_LEVEL) as process:
+        if process is None:
+            return {"success": False, "busy": True, "error": "All Stockfish processes are busy"}
+
+        engine = await process.get_engine()
+        if not engine:
+            return {"success": False, "error": f"Stockfish failed to start: {process.last_error}"}
+
+        try:
+            process.searches += 1
+            process.pondering = False
+            await process.configure({"Skill Level": EngineConfig.MAX_SKILL_LEVEL})
+            return await asyncio.wait_for(
+                _search(engine, chess.Board(fen), time_limit, multipv, EngineConfig.MAX_SKILL_LEVEL),
+                time_limit + COMMAND_TIMEOUT
+            )
+
+        except Exception as e:
+            print(f"Stockfish Communication Error: {e!r}")
+            process.mark_failed(e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+
+async def evaluate(fen, multipv=1):
+    """Quick evaluation for the advantage bar (EVALUATION_TIME_LIMIT)."""
+    return await analyse(fen, EngineConfig.EVALUATION_TIME_LIMIT, multipv)
+
+
+async def _wait_for_stop(stop_event):
+    """Return once `stop_event` (a threading.Event) is set."""
+    while not stop_event.is_set():
+        await asyncio.sleep(STOP_POLL_INTERVAL)
+
+
+async def _stop_analysis_on(analysis, stop_event):
+    await _wait_for_stop(stop_event)
+    analysis.stop()
+
+
+async def _unless_stopped(coro, stop_event):
+    """Run `coro`; cancel it (the engine gets 'stop') if `stop_event` is set first."""
+    if stop_event is None:
+        return await coro
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_for_stop(stop_event))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if task.done():
+        return task.result()
+    task.cancel()
+    return {"success": False, "interrupted": True, "error": "Search cancelled"}
+
+
+async def _search(engine, board, time_limit, multipv, skill_level, game=None, stop_event=None):
     """
-    Persistent-process Stockfish communication.
-    Uses the singleton manager to avoid CPU-heavy process spawning.
+    One analysis: bestmove (still subject to Skill Level) with the score, PV, depth and
+    nodes of the line actually played, plus the top-k lines when multipv > 1.
+    `stop_event` ends the analysis early (best move so far, marked 'interrupted').
+    Caller must have the process checked out.
     """
-    manager = StockfishEngineManager.get_instance()
-    engine = manager.get_engine()
-    
-    if not engine:
-        return {"success": False, "error": f"Stockfish not found at {manager.engine_path}"}
-    
+    report_lines = max(multipv, SKILL_MULTIPV if skill_level < EngineConfig.MAX_SKILL_LEVEL else 1)
+    analysis = await engine.analysis(
+        board,
+        chess.engine.Limit(time=time_limit),
+        multipv=report_lines,
+        game=game,
+        info=SEARCH_INFO
+    )
+    watcher = asyncio.ensure_future(_stop_analysis_on(analysis, stop_event)) if stop_event is not None else None
     try:
-        # Use common lock to prevent concurrent commands to the same engine instance
-        with manager._lock:
-            board = chess.Board(fen)
-            
-            # Configure engine for current search
-            engine.configure({"Skill Level": skill_level})
-            
-            # Request move and analysis info
-            # We use play() which is efficient for getting both the move and score in one call
-            result = engine.play(board, chess.engine.Limit(time=min(0.5, time_limit)))
-            
-            # Extract score from result info or fallback to quick analysis if info missing
-            score_str = "0.00"
-            if result.info and "score" in result.info:
-                score_str = _parse_score(result.info["score"])
-            else:
-                info = engine.analyse(board, chess.engine.Limit(time=0.1))
-                score_str = _parse_score(info.get("score"))
-
-            return {
-                "success": True,
-                "best_move": result.move.uci() if result.move else None,
-                "search_score": score_str
+        best = await analysis.wait()
+        lines = [info for info in analysis.multipv if info.get("pv")]
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        analysis.stop()
+
+    best_move = best.move or (lines[0]["pv"][0] if lines else None)
+    # Score/PV of the move actually played (Skill Level may pick a line other than the first)
+    chosen = next((info for info in lines if info["pv"][0] == best_move), lines[0] if lines else None)
+    results = _format_result(best_move, chosen or {})
+    results["nodes"] = max((info.get("nodes", 0) for info in lines), default=0)
+    if stop_event is not None and stop_event.is_set():
+        results["interrupted"] = True
+    if multipv > 1:
+        results["multipv"] = [
+            {
+                "move": info["pv"][0].uci(),
+                "search_score": _parse_score(info.get("score")),
+                "pv": " ".join(move.uci() for move in info["pv"])
             }
-            
-    except Exception as e:
-        print(f"Stockfish Communication Error: {e}")
-        # Reset engine instance on crash to attempt restart next time
-        manager.shutdown()
-        return {"success": False, "error": str(e)}
+            for info in lines[:multipv]
+        ]
+    return results
+
+
+async def _play_and_ponder(pool, process, board, time_limit, game):
+    """
+    play() with pondering: the same single search, after which Stockfish keeps thinking
+    on its expected reply (stopped after PONDER_TIME_LIMIT or by the next command).
+    """
+    result = await process.engine.play(
+        board,
+        chess.engine.Limit(time=time_limit),
+        info=SEARCH_INFO,
+        ponder=True,
+        game=game
+    )
+    if result.ponder:
+        process.pondering = True
+        pool.schedule_ponder_stop(process)
+    return _format_result(result.move, result.info or {})
+
+
+def _format_result(move, info):
+    """Result dict of one search from its bestmove and the info of the line played."""
+    pv = info.get("pv") or ([move] if move else [])
+    return {
+        "success": move is not None,
+        "best_move": move.uci() if move else None,
+        "search_score": _parse_score(info.get("score")),
+        "pv": " ".join(m.uci() for m in pv),
+        "depth": info.get("depth", 0),
+        "nodes": info.get("nodes", 0)
+    }
+
+
+# ==================== SYNC ADAPTERS (Flask routes) ====================
+
+def _run_sync(coro, time_limit):
+    """Run an engine coroutine on the shared loop from a Flask thread."""
+    timeout = EngineConfig.STOCKFISH_CHECKOUT_TIMEOUT + time_limit + 2 * COMMAND_TIMEOUT
+    try:
+        return EngineLoop.get_instance().run(coro, timeout)
+    except concurrent.futures.TimeoutError:
+        return {"success": False, "error": "Stockfish request timed out"}
+
+
+def get_stockfish_move(fen, skill_level=10, time_limit=1.0, multipv=1, board=None, game=None, ponder=False,
+                       stop_event=None):
+    """Blocking get_move() (see there)."""
+    return _run_sync(get_move(fen, skill_level, time_limit, multipv, board, game, ponder, stop_event), time_limit)
+
+
+def analyse_stockfish(fen, time_limit=EngineConfig.EVALUATION_TIME_LIMIT, multipv=1):
+    """Blocking analyse() (see there)."""
+    return _run_sync(analyse(fen, time_limit, multipv), time_limit)
+
+
+def evaluate_stockfish(fen, multipv=1):
+    """Blocking evaluate() (see there)."""
+    return _run_sync(evaluate(fen, multipv), EngineConfig.EVALUATION_TIME_LIMIT)
+
+
+def get_pool_stats():
+    """Queue / health metrics of the Stockfish pool of this process"""
+    return StockfishPool.get_instance().stats()
+
 
 def _parse_score(score):
     """Helper to convert engine score to string (view from White)."""
     if not score:
         return "0.00"
-    
+
     white_score = score.white()
     if white_score.is_mate():
         mate_moves = white_score.mate()
         return f"+M{mate_moves}" if mate_moves > 0 else f"-M{abs(mate_moves)}"
-    
+
     cp = white_score.score()
     if cp is not None:
         return f"{cp / 100:+.2f}"
@@ -0,0 +1,114 @@
+"""
+Module: tablebase.py
+Tra cứu Syzygy Tablebase (WDL/DTZ) cho tàn cuộc ít quân, qua `chess.syzygy`.
+
+- Bật khi cấu hình EngineConfig.SYZYGY_PATH (thư mục chứa file .rtbw/.rtbz).
+- Handle được mở một lần mỗi tiến trình và dùng lại (file mở lười khi tra lần đầu).
+- WDL dùng làm điểm cắt trong negamax; DTZ dùng để chọn nước tại gốc.
+"""
+
+import os
+import threading
+
+import chess
+import chess.syzygy
+
+from backend.config import EngineConfig
+
+# Điểm thắng theo tablebase: trên mọi điểm đánh giá, dưới vùng điểm chiếu hết
+TB_WIN_SCORE = 20000
+
+_tablebases = {}
+_tablebases_lock = threading.Lock()
+
+
+def wdl_to_score(wdl, ply):
+    """
+    WDL (theo bên đang đi) -> điểm negamax.
+    Thắng/thua "bị nguyền" (±1, hòa do luật 50 nước) tính là hòa.
+    """
+    if wdl >= 2:
+        return TB_WIN_SCORE - ply
+    if wdl <= -2:
+        return -TB_WIN_SCORE + ply
+    return 0
+
+
+class SyzygyTablebase:
+    """Bọc chess.syzygy.Tablebase: biết số quân tối đa, trả None khi thiếu bảng."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tb = chess.syzygy.open_tablebase(directory)
+        # Số quân tối đa (tên bảng dạng "KRPvKR")
+        names = list(self._tb.wdl) + list(self._tb.dtz)
+        self.max_pieces = max((len(name) - 1 for name in names), default=0)
+        self.has_dtz = bool(self._tb.dtz)
+
+    def covers(self, board):
+        """Vị trí nằm trong phạm vi bảng (đủ ít quân, không còn quyền nhập thành)."""
+        return not board.castling_rights and chess.popcount(board.occupied) <= self.max_pieces
+
+    def probe_wdl(self, board):
+        try:
+            return self._tb.probe_wdl(board)
+        except (chess.syzygy.MissingTableError, KeyError):
+            return None
+
+    def probe_dtz(self, board):
+        try:
+            return self._tb.probe_dtz(board)
+        except (chess.syzygy.MissingTableError, KeyError):
+            return None
+
+    def best_root_move(self, board):
+        """
+        Chọn nước tại gốc theo WDL rồi DTZ:
+        thắng thì về 0 (ăn quân / đi Tốt / chiếu hết) nhanh nhất, thua thì kéo dài nhất.
+        Trả về (move, wdl) hoặc None nếu thiếu bảng cho một nước nào đó.
+        """
+        if not self.has_dtz:
+            return None
+        best_key, best_move, best_wdl = None, None, None
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    key, wdl = (3, 0), 2
+                else:
+                    wdl_after = self.probe_wdl(board)
+                    dtz_after = self.probe_dtz(board)
+                    if wdl_after is None or dtz_after is None:
+                        return None
+                    wdl = -wdl_after
+                    # Đối thủ càng gần về 0 (|dtz| nhỏ) càng tốt cho bên thắng
+                    key = (wdl, -abs(dtz_after) if wdl > 0 else abs(dtz_after))
+            finally:
+                board.pop()
+            if best_key is None or key > best_key:
+                best_key, best_move, best_wdl = key, move, wdl
+        return (best_move, best_wdl) if best_move else None
+
+    def close(self):
+        self._tb.close()
+
+
+def get_tablebase(directory=None):
+    """
+    Tablebase của tiến trình (mở một lần rồi dùng lại).
+    Trả về None nếu chưa cấu hình SYZYGY_PATH hoặc thư mục không có bảng nào.
+    """
+    directory = directory or EngineConfig.SYZYGY_PATH
+    if not directory:
+        return None
+    if directory not in _tablebases:
+        with _tablebases_lock:
+            if directory not in _tablebases:
+                tablebase = None
+                if os.path.isdir(directory):
+                    tablebase = SyzygyTablebase(directory)
+                    if not tablebase.max_pieces:
+                        tablebase.close()
+                        tablebase = None
+                _tablebases[directory] = tablebase
+    return _tablebases[directory]
@@ -0,0 +1,159 @@
+"""
+Module: transposition.py
+Bảng băm (Transposition Table) dung lượng cố định cho engine Minimax.
+
+- Bộ nhớ cấp phát một lần theo số MB cấu hình, không tăng theo thời gian chạy.
+- Mỗi bucket có 2 ô: ô 0 ưu tiên độ sâu (depth-preferred), ô 1 luôn ghi đè (always-replace).
+- Mỗi entry gồm 2 số 64-bit: `data` (điểm, độ sâu, flag, tuổi, nước đi được đóng gói)
+  và `check = key ^ data` (kiểm tra lockless, an toàn khi nhiều tiến trình cùng ghi).
+- Tuổi (age) tăng sau mỗi lượt tìm kiếm để entry cũ bị thay thế trước.
+"""
+
+import chess
+
+# Cấu trúc một entry trong `data` (64 bit):
+#   bit  0-31: score + SCORE_OFFSET
+#   bit 32-39: depth
+#   bit 40-41: flag
+#   bit 42-47: age
+#   bit 48-63: move (from | to << 6 | promotion << 12)
+SCORE_OFFSET = 1 << 31
+AGE_MASK = 0x3F
+
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2
+FILL_SAMPLE_SIZE = 1000
+
+
+def encode_move(move):
+    """Đóng gói nước đi thành 16 bit (0 = không có nước đi)."""
+    if not move:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    """Giải mã 16 bit thành chess.Move (None nếu rỗng)."""
+    if not code:
+        return None
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+class TranspositionTable:
+    """
+    Bảng băm kích thước cố định lưu trên mảng cấp phát sẵn.
+    Có thể dùng bộ đệm ngoài (ví dụ `shared_memory.buf`) để chia sẻ giữa các tiến trình.
+    """
+
+    def __init__(self, size_mb=16, buffer=None):
+        self.num_buckets = self.buckets_for_size(size_mb)
+        self.capacity = self.num_buckets * BUCKET_SIZE
+        self._bucket_mask = self.num_buckets - 1
+
+        if buffer is None:
+            buffer = bytearray(self.capacity * ENTRY_BYTES)
+        self._view = memoryview(buffer)[:self.capacity * ENTRY_BYTES]
+        self._raw = self._view.cast('B')
+        self._checks = self._view[:self.capacity * 8].cast('Q')
+        self._data = self._view[self.capacity * 8:].cast('Q')
+
+        self.age = 0
+        self.reset_stats()
+
+    @staticmethod
+    def buckets_for_size(size_mb):
+        """Số bucket (lũy thừa của 2) vừa với dung lượng cho trước."""
+        entries = max(BUCKET_SIZE, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        return 1 << ((entries // BUCKET_SIZE).bit_length() - 1)
+
+    @classmethod
+    def required_bytes(cls, size_mb):
+        """Số byte bộ đệm cần cấp phát cho bảng `size_mb`."""
+        return cls.buckets_for_size(size_mb) * BUCKET_SIZE * ENTRY_BYTES
+
+    # --- Vòng đời ---
+    def new_search(self):
+        """Tăng tuổi bảng và reset thống kê trước mỗi lượt tìm kiếm."""
+        self.age = (self.age + 1) & AGE_MASK
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self):
+        """Xóa toàn bộ entry."""
+        self._raw[:] = bytes(len(self._raw))
+        self.reset_stats()
+
+    def release(self):
+        """Giải phóng các view trên bộ đệm (cần trước khi đóng bộ nhớ chia sẻ)."""
+        for view in (self._checks, self._data, self._raw, self._view):
+            view.release()
+
+    # --- Tra cứu / Ghi ---
+    def probe(self, key):
+        """
+        Tra cứu vị trí.
+        Trả về (depth, score, flag, move) hoặc None nếu không có.
+        """
+        self.probes += 1
+        index = (key & self._bucket_mask) * BUCKET_SIZE
+        for slot in (index, index + 1):
+            data = self._data[slot]
+            if data and self._checks[slot] ^ data == key:
+                self.hits += 1
+                return (
+                    (data >> 32) & 0xFF,
+                    (data & 0xFFFFFFFF) - SCORE_OFFSET,
+                    (data >> 40) & 0x3,
+                    decode_move(data >> 48)
+                )
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """
+        Ghi entry theo chính sách 2 ô:
+        - Ô 0 nhận entry nếu trống, cùng vị trí, đã cũ (khác tuổi) hoặc độ sâu mới >= cũ.
+        - Ngược lại entry được ghi vào ô 1 (luôn ghi đè).
+        """
+        self.stores += 1
+        data = (
+            (int(score) + SCORE_OFFSET)
+            | (max(0, min(depth, 0xFF)) << 32)
+            | (flag << 40)
+            | (self.age << 42)
+            | (encode_move(move) << 48)
+        )
+
+        slot = (key & self._bucket_mask) * BUCKET_SIZE
+        old = self._data[slot]
+        if old and self._checks[slot] ^ old != key \
+                and ((old >> 42) & AGE_MASK) == self.age \
+                and depth < ((old >> 32) & 0xFF):
+            slot += 1
+
+        self._data[slot] = data
+        self._checks[slot] = key ^ data
+
+    # --- Thống kê ---
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill_percent(self):
+        """Tỉ lệ ô đã dùng (%), ước lượng trên FILL_SAMPLE_SIZE ô đầu như `hashfull` của UCI."""
+        sample = min(self.capacity, FILL_SAMPLE_SIZE)
+        used = sum(1 for i in range(sample) if self._data[i])
+        return 100.0 * used / sample
+
+    def stats(self):
+        return {
+            'size_mb': round(self.capacity * ENTRY_BYTES / (1024 * 1024), 2),
+            'capacity': self.capacity,
+            'probes': self.probes,
+            'hits': self.hits,
+            'stores': self.stores,
+            'hit_rate': round(self.hit_rate(), 4),
+            'fill_percent': round(self.fill_percent(), 2)
+        }
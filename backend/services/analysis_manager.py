@@ -22,10 +22,10 @@ class ChessAnalysisManager:
         Convert engine score string to float for calculations.
         
         Args:
-            score_str: Score from engine (e.g., "+1.50", "-0.80", "+M2", "-M5", "0.00")
+            score_str: Score from engine (e.g., "+1.50", "-0.80", "+M2", "-M5", "+TB", "0.00")
             
         Returns:
-            float: Parsed score value. Mate positions return ±100.0
+            float: Parsed score value. Mate and tablebase win/loss positions return ±100.0
             
         Examples:
             >>> parse_score("+1.50")
@@ -34,13 +34,15 @@ class ChessAnalysisManager:
             -100.0
             >>> parse_score("M2")
             100.0
+            >>> parse_score("-TB")
+            -100.0
         """
         s = str(score_str).strip()
         if not s:
             return 0.0
             
-        # Check for mate notation (+M1, -M5, M2...)
-        mate_match = re.search(r'([+-])?M\d+', s, re.IGNORECASE)
+        # Check for mate notation (+M1, -M5, M2...) and tablebase results (+TB, -TB)
+        mate_match = re.search(r'([+-])?(?:M\d+|TB)', s, re.IGNORECASE)
         if mate_match:
             return (-AnalysisConfig.MATE_SCORE_ABSOLUTE 
                     if mate_match.group(1) == '-' 
@@ -121,6 +123,27 @@ class ChessAnalysisManager:
         except Exception:
             return uci_move
 
+    @staticmethod
+    def pv_to_san(fen: str, pv: str) -> str:
+        """
+        Convert a space-separated UCI principal variation to numbered SAN.
+        
+        Args:
+            fen: Position the variation starts from
+            pv: Moves in UCI format (e.g., "e2e4 e7e5 g1f3")
+            
+        Returns:
+            str: Variation in SAN (e.g., "1. e4 e5 2. Nf3"), the raw value if it is
+                 not a UCI line (e.g., "Opening Theory"), or "N/A" if empty
+        """
+        if not pv or pv == AnalysisConfig.PLAYER_NA:
+            return AnalysisConfig.PLAYER_NA
+        try:
+            board = chess.Board(fen)
+            return board.variation_san([chess.Move.from_uci(uci) for uci in pv.split()])
+        except Exception:
+            return pv
+
     def get_move_quality_label(self, diff: float, is_best: bool = False, prev_v: float = 0.0, cur_v: float = 0.0) -> str:
         """
         Determine move quality label based on evaluation difference and position context.
@@ -200,7 +223,7 @@ class ChessAnalysisManager:
                 - formatted_score: Current evaluation
                 - opening_name: Opening name if detected
                 - move_count: Number of moves played
-                - engine_pv: Principal variation
+                - engine_pv: Principal variation in SAN
         """
         fen = data.get('fen')
         current_score = data.get('current_score') or engine_results.get('search_score', '0')
@@ -246,5 +269,5 @@ class ChessAnalysisManager:
             "formatted_score": str(current_score),
             "opening_name": data.get('opening_name', AnalysisConfig.PLAYER_NA),
             "move_count": data.get('move_count', 0),
-            "engine_pv": engine_results.get('pv', AnalysisConfig.PLAYER_NA)
+            "engine_pv": self.pv_to_san(fen, engine_results.get('pv', AnalysisConfig.PLAYER_NA))
         }
@@ -5,25 +5,49 @@ Implements Strategy Pattern for engine selection and Single Responsibility Princ
 """
 
 import os
+import threading
+import time
 from typing import Dict, Any, Optional
-from backend.engines.stockfish_engine import get_stockfish_move
-from backend.engines.minimax import find_best_move
+from backend.engines.stockfish_engine import get_stockfish_move, evaluate_stockfish, get_pool_stats
+from backend.engines.minimax import find_best_move, TRANS_TABLE, PAWN_HASH, EVAL_CACHE
+from backend.services.engine_sessions import EngineSession, EngineSessionRegistry, PonderTask
+from backend.services.position_cache import PositionCache
 from backend.config import EngineConfig, ChessConfig
 
 
 class EngineStrategy:
     """Base strategy interface for chess engines"""
     
+    # Engine name in position cache keys, and the search budget of evaluate()
+    # (seconds, and its depth cap in plies; 0 = uncapped)
+    name = ''
+    evaluation_time = 0.0
+    evaluation_depth = 0
+    
     def get_move(
         self, 
         fen: str, 
         skill_level: int, 
-        time_limit: float
+        time_limit: float,
+        stop_event: Optional[threading.Event] = None,
+        multipv: int = 1,
+        session: Optional[EngineSession] = None,
+        ponder: bool = False
     ) -> Dict[str, Any]:
-        """Get best move from engine"""
+        """
+        Get best move from engine.
+        stop_event aborts the search early; multipv > 1 adds the top-k candidate
+        lines ('multipv': [{move, search_score, pv}]) with exact scores.
+        session (already synced to fen) carries the game's history and hash table.
+        ponder asks engines that ponder natively to keep thinking on the predicted reply.
+        """
         raise NotImplementedError
     
-    def evaluate(self, fen: str) -> Dict[str, Any]:
+    def start_ponder(self, session: EngineSession, skill_level: int) -> Optional[PonderTask]:
+        """Start a background search on the session's predicted reply (None if not supported)"""
+        return None
+    
+    def evaluate(self, fen: str, multipv: int = 1) -> Dict[str, Any]:
         """Quick position evaluation"""
         raise NotImplementedError
 
@@ -31,56 +55,221 @@ class EngineStrategy:
 class StockfishStrategy(EngineStrategy):
     """Stockfish engine strategy (for local development)"""
     
+    name = 'stockfish'
+    evaluation_time = EngineConfig.EVALUATION_TIME_LIMIT
+    
     def get_move(
         self, 
         fen: str, 
         skill_level: int, 
-        time_limit: float
+        time_limit: float,
+        stop_event: Optional[threading.Event] = None,
+        multipv: int = 1,
+        session: Optional[EngineSession] = None,
+        ponder: bool = False
     ) -> Dict[str, Any]:
-        """Get move from Stockfish"""
-        results = get_stockfish_move(fen, skill_level, time_limit)
+        """
+        Get move from Stockfish (one search of time_limit, with score, PV, depth and nodes).
+        stop_event sends 'stop' to the running search (cancel_search / pagehide beacon).
+        With a session, the game's move history is sent so that Stockfish's own
+        pondering (ponder=True) can be resumed with 'ponderhit' on the next move.
+        If every pooled Stockfish process stays busy, a short Minimax search answers instead.
+        """
+        session_args = {}
+        if session is not None:
+            session_args = {'board': session.board, 'game': session.game_id, 'ponder': ponder}
+        results = get_stockfish_move(fen, skill_level, time_limit, multipv, stop_event=stop_event, **session_args)
+        if results.get('busy'):
+            return MinimaxStrategy(workers=1).get_move(
+                fen, skill_level, min(time_limit, EngineConfig.FALLBACK_TIME_LIMIT),
+                stop_event, multipv, session
+            )
         results['success'] = results.get('success', True)
         return results
     
-    def evaluate(self, fen: str) -> Dict[str, Any]:
-        """Quick evaluation with Stockfish"""
-        results = get_stockfish_move(
-            fen,
-            skill_level=EngineConfig.MAX_SKILL_LEVEL,
-            time_limit=EngineConfig.EVALUATION_TIME_LIMIT
-        )
+    def evaluate(self, fen: str, multipv: int = 1) -> Dict[str, Any]:
+        """Quick full-strength evaluation with Stockfish"""
+        results = evaluate_stockfish(fen, multipv)
         
         if results.get('success'):
             return results
         
         # Fallback to Minimax if Stockfish fails
-        return MinimaxStrategy().evaluate(fen)
+        return MinimaxStrategy().evaluate(fen, multipv)
 
 
 class MinimaxStrategy(EngineStrategy):
     """Custom Minimax engine strategy (for production)"""
     
+    name = 'minimax'
+    evaluation_time = EngineConfig.FALLBACK_TIME_LIMIT
+    evaluation_depth = EngineConfig.FALLBACK_MAX_DEPTH
+    
+    def __init__(
+        self,
+        workers: int = EngineConfig.MINIMAX_WORKERS,
+        parallel_mode: str = EngineConfig.MINIMAX_PARALLEL_MODE
+    ):
+        """
+        Args:
+            workers: Search processes per move (>1 enables multi-process search)
+            parallel_mode: 'smp' (Lazy SMP) or 'root' (root-move splitting)
+        """
+        self.workers = workers
+        self.parallel_mode = parallel_mode
+    
     def get_move(
         self, 
         fen: str, 
         skill_level: int, 
-        time_limit: float
+        time_limit: float,
+        stop_event: Optional[threading.Event] = None,
+        multipv: int = 1,
+        session: Optional[EngineSession] = None,
+        ponder: bool = False
     ) -> Dict[str, Any]:
-        """Get move from Minimax"""
-        results = find_best_move(fen, time_limit=time_limit, skill_level=skill_level)
+        """
+        Get move from Minimax (time_limit is enforced inside the search tree).
+        With a session the search runs on the game's board (repetition history),
+        its private hash table and the line predicted by the previous search.
+        """
+        session_args = {}
+        if session is not None:
+            session_args = {'board': session.board, 'tt': session.tt, 'pv_hint': session.pv_hint}
+        results = find_best_move(
+            fen,
+            time_limit=time_limit,
+            skill_level=skill_level,
+            workers=self.workers,
+            parallel_mode=self.parallel_mode,
+            stop_event=stop_event,
+            node_limit=EngineConfig.MINIMAX_NODE_LIMIT or None,
+            multipv=multipv,
+            **session_args
+        )
         results['success'] = True if results.get('best_move') else False
         return results
     
-    def evaluate(self, fen: str) -> Dict[str, Any]:
+    def start_ponder(self, session: EngineSession, skill_level: int) -> Optional[PonderTask]:
+        """
+        Search the position after the predicted reply in a background thread
+        (single process, capped at PONDER_TIME_LIMIT, sharing the session's hash table).
+        """
+        board = session.ponder_board()
+        if board is None:
+            return None
+        pv_hint = session.expected_line[1:]
+        
+        def search(stop_event: threading.Event) -> Dict[str, Any]:
+            results = find_best_move(
+                board.fen(),
+                time_limit=EngineConfig.PONDER_TIME_LIMIT,
+                skill_level=skill_level,
+                stop_event=stop_event,
+                board=board,
+                tt=session.tt,
+                pv_hint=pv_hint
+            )
+            results['success'] = True if results.get('best_move') else False
+            return results
+        
+        return PonderTask.start(session.expected_line[0], skill_level, search)
+    
+    def evaluate(self, fen: str, multipv: int = 1) -> Dict[str, Any]:
         """Quick evaluation with Minimax"""
         return find_best_move(
             fen,
-            max_depth=EngineConfig.FALLBACK_MAX_DEPTH,
-            time_limit=EngineConfig.FALLBACK_TIME_LIMIT,
-            skill_level=EngineConfig.MAX_SKILL_LEVEL
+            max_depth=self.evaluation_depth,
+            time_limit=self.evaluation_time,
+            skill_level=EngineConfig.MAX_SKILL_LEVEL,
+            multipv=multipv
         )
 
 
+class EngineStatsCollector:
+    """
+    Per-process aggregate of Minimax search statistics.
+    Fed with the 'stats' dict returned by find_best_move; read by /api/game/engine_stats.
+    """
+    
+    _SUMMED_FIELDS = (
+        'nodes', 'qnodes', 'time', 'tt_probes', 'tt_hits', 'tt_cutoffs', 'tb_hits',
+        'beta_cutoffs', 'first_move_cutoffs', 'eval_time', 'movegen_time'
+    )
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Drop all aggregated counters"""
+        with self._lock:
+            self.searches = 0
+            self.aborted = 0
+            self.depth_sum = 0
+            self.max_time = 0.0
+            self.sources: Dict[str, int] = {}
+            self.totals = dict.fromkeys(self._SUMMED_FIELDS, 0)
+            self.last: Optional[Dict[str, Any]] = None
+    
+    def record(self, stats: Dict[str, Any]) -> None:
+        """Add one search's stats to the aggregate"""
+        with self._lock:
+            source = stats.get('source', 'search')
+            self.sources[source] = self.sources.get(source, 0) + 1
+            self.last = stats
+            if source != 'search':
+                return
+            self.searches += 1
+            self.aborted += 1 if stats.get('aborted') else 0
+            self.depth_sum += stats.get('depth', 0)
+            self.max_time = max(self.max_time, stats.get('time', 0.0))
+            for field in self._SUMMED_FIELDS:
+                self.totals[field] += stats.get(field, 0)
+        
+        if EngineConfig.MINIMAX_LOG_STATS:
+            print(
+                f"[minimax] depth={stats.get('depth')} nodes={stats.get('nodes')}+{stats.get('qnodes')} "
+                f"nps={stats.get('nps')} time={stats.get('time')}s tt_hit={stats.get('tt_hit_rate')} "
+                f"first_cut={stats.get('first_move_cutoff_rate')} aborted={stats.get('aborted')}"
+            )
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregated view for the engine_stats endpoint"""
+        with self._lock:
+            totals = dict(self.totals)
+            searches = self.searches
+            search_time = totals['time']
+            total_nodes = totals['nodes'] + totals['qnodes']
+            return {
+                'pid': os.getpid(),
+                'uptime': round(time.time() - self.started_at, 1),
+                'searches': searches,
+                'sources': dict(self.sources),
+                'aborted': self.aborted,
+                'avg_depth': round(self.depth_sum / searches, 2) if searches else 0.0,
+                'avg_time': round(search_time / searches, 4) if searches else 0.0,
+                'max_time': round(self.max_time, 4),
+                'nodes': totals['nodes'],
+                'qnodes': totals['qnodes'],
+                'nps': int(total_nodes / search_time) if search_time > 0 else 0,
+                'tt_hit_rate': round(totals['tt_hits'] / totals['tt_probes'], 4) if totals['tt_probes'] else 0.0,
+                'tt_cutoffs': totals['tt_cutoffs'],
+                'tb_hits': totals['tb_hits'],
+                'first_move_cutoff_rate': (
+                    round(totals['first_move_cutoffs'] / totals['beta_cutoffs'], 4)
+                    if totals['beta_cutoffs'] else 0.0
+                ),
+                'eval_time_share': round(totals['eval_time'] / search_time, 4) if search_time > 0 else 0.0,
+                'movegen_time_share': round(totals['movegen_time'] / search_time, 4) if search_time > 0 else 0.0,
+                'transposition_table': TRANS_TABLE.stats(),
+                'pawn_hash': PAWN_HASH.stats(),
+                'eval_cache': EVAL_CACHE.stats(),
+                'last_search': self.last
+            }
+
+
 class EngineService:
     """
     Service layer for chess engine operations.
@@ -91,6 +280,14 @@ class EngineService:
         """Initialize with environment-appropriate strategy"""
         self.is_production = os.environ.get('RENDER') is not None
         self._strategy: Optional[EngineStrategy] = None
+        # Running searches that clients may cancel, keyed by client-provided search_id
+        self._active_searches: Dict[str, threading.Event] = {}
+        self._searches_lock = threading.Lock()
+        self.stats = EngineStatsCollector()
+        # Per-game Minimax state (board history, hash table, predicted line), keyed by game_id
+        self.sessions = EngineSessionRegistry()
+        # Results of repeated positions (full-strength searches only)
+        self.position_cache = PositionCache()
     
     def _get_strategy(self, engine_choice: str = 'stockfish') -> EngineStrategy:
         """
@@ -117,32 +314,209 @@ class EngineService:
         fen: str,
         engine_choice: str = 'stockfish',
         skill_level: int = EngineConfig.DEFAULT_SKILL_LEVEL,
-        time_limit: float = EngineConfig.DEFAULT_THINK_TIME
+        time_limit: float = EngineConfig.DEFAULT_THINK_TIME,
+        search_id: Optional[str] = None,
+        multipv: int = 1,
+        game_id: Optional[str] = None,
+        ponder: bool = False
     ) -> Dict[str, Any]:
         """
         Get best move from appropriate engine with guaranteed format.
+        If search_id is given, the search can be aborted with cancel_search(search_id).
+        multipv > 1 adds the top-k candidate lines under 'multipv'.
+        If game_id is given, the engine searches inside that game's session (move history,
+        per-game hash table, previous PV) and the chosen move is played on the session board.
+        With ponder (and a game_id), the engine keeps thinking on the predicted reply
+        until the next call; if the player makes that move, the ponder search is reused.
+        Full-strength searches outside a game session are served from the position cache.
         """
         strategy = self._get_strategy(engine_choice)
-        raw_results = strategy.get_move(fen, skill_level, time_limit)
+        session = self.sessions.get(game_id) if game_id else None
+        ponder = ponder and EngineConfig.PONDER_ENABLED and session is not None
+        multipv = self.clamp_multipv(multipv)
+        cacheable = session is None and skill_level == EngineConfig.MAX_SKILL_LEVEL
+        if cacheable:
+            cached = self._cached_result(fen, strategy, skill_level, time_limit, multipv)
+            if cached is not None:
+                return cached
+        stop_event = self._register_search(search_id) if search_id else None
+        try:
+            if session is not None:
+                with session.lock:
+                    hit = session.sync(fen)
+                    raw_results = self._take_ponder(session, hit, skill_level, time_limit, multipv)
+                    if raw_results is None:
+                        raw_results = strategy.get_move(
+                            fen, skill_level, time_limit, stop_event, multipv, session, ponder
+                        )
+                    session.record_move(raw_results.get('best_move'), raw_results.get('pv', ''))
+                    if ponder:
+                        session.ponder = strategy.start_ponder(session, skill_level)
+            else:
+                raw_results = strategy.get_move(fen, skill_level, time_limit, stop_event, multipv)
+        finally:
+            if search_id:
+                self._unregister_search(search_id, stop_event)
+        self._record_stats(raw_results)
         
         # Ensure consistent format
         formatted = self.format_engine_results(raw_results)
         formatted['success'] = raw_results.get('success', True)
         if 'error' in raw_results:
             formatted['error'] = raw_results['error']
+        if cacheable:
+            self._cache_result(fen, strategy, skill_level, time_limit, multipv, raw_results, formatted)
             
         return formatted
     
-    def evaluate_position(self, fen: str) -> Dict[str, Any]:
+    def _cached_result(
+        self,
+        fen: str,
+        strategy: EngineStrategy,
+        skill_level: int,
+        budget: float,
+        multipv: int,
+        max_depth: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached result searched at least as long, as wide and as deep as requested, or None.
+        max_depth is the depth cap of the requested search (0 = uncapped, e.g. move searches).
+        """
+        try:
+            return self.position_cache.get(fen, strategy.name, skill_level, budget, multipv, max_depth)
+        except ValueError:
+            return None
+    
+    def _cache_result(
+        self,
+        fen: str,
+        strategy: EngineStrategy,
+        skill_level: int,
+        budget: float,
+        multipv: int,
+        raw_results: Dict[str, Any],
+        formatted: Dict[str, Any],
+        max_depth: int = 0
+    ) -> None:
+        """
+        Store a search that used its budget: time-bounded results are cached under their budget,
+        searches cut short by a stop request or a node limit ('interrupted') are not,
+        nor searches that finished no iteration, nor fallbacks to another engine.
+        """
+        produced_by = MinimaxStrategy.name if 'stats' in raw_results else StockfishStrategy.name
+        if not formatted.get('success') or produced_by != strategy.name:
+            return
+        stats = raw_results.get('stats') or {}
+        if raw_results.get('interrupted') or stats.get('interrupted'):
+            return
+        if stats.get('source') == 'search' and not stats.get('iterations'):
+            return
+        try:
+            self.position_cache.put(fen, strategy.name, skill_level, budget, multipv, formatted, max_depth)
+        except ValueError:
+            pass
+    
+    @staticmethod
+    def _take_ponder(
+        session: EngineSession,
+        hit: bool,
+        skill_level: int,
+        time_limit: float,
+        multipv: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Collect the session's ponder search when the player made the predicted move.
+        Time already spent pondering counts against time_limit: the search is stopped at
+        once if it used the whole budget, otherwise it continues with its head start.
+        A wrong guess (or different skill / MultiPV request) cancels the ponder search.
+        
+        Returns:
+            Results of the ponder search, or None if a normal search is needed
+        """
+        task = session.take_ponder()
+        if task is None:
+            return None
+        if not (hit and multipv == 1 and task.skill_level == skill_level and task.move == session.board.peek()):
+            task.cancel()
+            return None
+        
+        results = task.finish(max(0.0, time_limit - (time.time() - task.started)))
+        if not results or not results.get('success'):
+            return None
+        results.setdefault('stats', {})['ponder_hit'] = True
+        return results
+    
+    def cancel_search(self, search_id: str) -> bool:
+        """
+        Abort a running search (e.g. the client disconnected or started a new game).
+        
+        Returns:
+            bool: True if a running search with this id was signalled
+        """
+        with self._searches_lock:
+            stop_event = self._active_searches.get(search_id)
+        if stop_event is None:
+            return False
+        stop_event.set()
+        return True
+    
+    def _register_search(self, search_id: str) -> threading.Event:
+        """Create the stop event for a search (a reused id cancels the older search)"""
+        stop_event = threading.Event()
+        with self._searches_lock:
+            previous = self._active_searches.get(search_id)
+            if previous is not None:
+                previous.set()
+            self._active_searches[search_id] = stop_event
+        return stop_event
+    
+    def _unregister_search(self, search_id: str, stop_event: threading.Event) -> None:
+        with self._searches_lock:
+            if self._active_searches.get(search_id) is stop_event:
+                del self._active_searches[search_id]
+    
+    def _record_stats(self, raw_results: Dict[str, Any]) -> None:
+        """Feed Minimax search stats (Stockfish results carry none) into the aggregate"""
+        if raw_results.get('stats'):
+            self.stats.record(raw_results['stats'])
+    
+    def reset_session(self, game_id: str) -> bool:
+        """Drop a game's engine session (e.g. the client started a new game)"""
+        return self.sessions.drop(game_id)
+    
+    def get_engine_stats(self) -> Dict[str, Any]:
+        """Aggregated search statistics of this process"""
+        snapshot = self.stats.snapshot()
+        snapshot['sessions'] = self.sessions.stats()
+        snapshot['stockfish_pool'] = get_pool_stats()
+        snapshot['position_cache'] = self.position_cache.stats()
+        return snapshot
+    
+    def evaluate_position(self, fen: str, multipv: int = 1) -> Dict[str, Any]:
         """
         Quick position evaluation for UI bar with guaranteed format.
+        multipv > 1 adds the top-k candidate lines (e.g. for a hint list).
+        Repeated positions are answered from the position cache (also filled by
+        longer full-strength searches such as chat analysis).
         """
         strategy = self._get_strategy('stockfish')
-        raw_results = strategy.evaluate(fen)
+        multipv = self.clamp_multipv(multipv)
+        skill_level = EngineConfig.MAX_SKILL_LEVEL
+        cached = self._cached_result(
+            fen, strategy, skill_level, strategy.evaluation_time, multipv, strategy.evaluation_depth
+        )
+        if cached is not None:
+            return cached
+        raw_results = strategy.evaluate(fen, multipv)
+        self._record_stats(raw_results)
         
         # Ensure consistent format
         formatted = self.format_engine_results(raw_results)
         formatted['success'] = raw_results.get('success', True)
+        self._cache_result(
+            fen, strategy, skill_level, strategy.evaluation_time, multipv, raw_results, formatted,
+            strategy.evaluation_depth
+        )
         return formatted
     
     @staticmethod
@@ -154,13 +528,27 @@ class EngineService:
             results: Raw engine results
             
         Returns:
-            Formatted dict with search_score, best_move, pv
+            Formatted dict with search_score, best_move, pv (and multipv, depth, nodes if present)
         """
-        return {
+        formatted = {
             'search_score': results.get('search_score', ChessConfig.DEFAULT_SCORE),
             'best_move': results.get('best_move', ChessConfig.DEFAULT_BEST_MOVE),
             'pv': results.get('pv', ChessConfig.DEFAULT_PV)
         }
+        for key in ('depth', 'nodes'):
+            if key in results:
+                formatted[key] = results[key]
+        if results.get('multipv'):
+            formatted['multipv'] = results['multipv']
+        return formatted
+    
+    @staticmethod
+    def clamp_multipv(multipv: Any) -> int:
+        """Sanitize a client-provided MultiPV count to 1..MAX_MULTIPV"""
+        try:
+            return max(1, min(EngineConfig.MAX_MULTIPV, int(multipv)))
+        except (ValueError, TypeError):
+            return 1
     
     @staticmethod
     def parse_time_limit(time_limit_raw: str) -> float:
@@ -0,0 +1,224 @@
+"""
+Engine Sessions
+Per-game Minimax state kept between bot moves, keyed by a client-provided game id.
+Each session owns the board with its move stack (repetition / fifty-move history),
+a private transposition table, the line expected after the last bot move and
+an optional background ponder search on the predicted reply.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import chess
+
+from backend.config import EngineConfig
+from backend.engines.search_board import SearchBoard
+from backend.engines.transposition import TranspositionTable
+
+
+# CPU budget: ponder searches allowed to run at once in this process
+_ponder_slots = threading.BoundedSemaphore(max(1, EngineConfig.MAX_PONDER_TASKS))
+
+
+class PonderTask:
+    """Background search on the position after the predicted reply"""
+
+    def __init__(self, move: chess.Move, skill_level: int, search: Callable[[threading.Event], Dict[str, Any]]):
+        self.move = move
+        self.skill_level = skill_level
+        self.stop_event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, args=(search,), name="ponder", daemon=True)
+
+    @classmethod
+    def start(
+        cls, move: chess.Move, skill_level: int, search: Callable[[threading.Event], Dict[str, Any]]
+    ) -> Optional["PonderTask"]:
+        """Start pondering, or return None when the process is already at MAX_PONDER_TASKS"""
+        if not _ponder_slots.acquire(blocking=False):
+            return None
+        task = cls(move, skill_level, search)
+        task._thread.start()
+        return task
+
+    def _run(self, search: Callable[[threading.Event], Dict[str, Any]]) -> None:
+        try:
+            self.result = search(self.stop_event)
+        except Exception as e:
+            print(f"Ponder search failed: {e}")
+        finally:
+            _ponder_slots.release()
+
+    def finish(self, timeout: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Let the search continue up to `timeout` more seconds, then stop it and return its result"""
+        self._thread.join(timeout)
+        self.cancel()
+        return self.result
+
+    def cancel(self) -> None:
+        """Stop the search (it returns its last completed iteration) and wait for the thread"""
+        self.stop_event.set()
+        self._thread.join()
+
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+
+class EngineSession:
+    """Engine state of one game (callers hold `lock` while searching on `board`)"""
+
+    def __init__(self, game_id: str, hash_mb: float = EngineConfig.ENGINE_SESSION_HASH_MB):
+        self.game_id = game_id
+        self.board = SearchBoard()
+        self.tt = TranspositionTable(hash_mb)
+        # Expected continuation from the current position (previous PV after the bot move)
+        self.expected_line: Tuple[chess.Move, ...] = ()
+        # Hint for the next search, set by sync()
+        self.pv_hint: Tuple[chess.Move, ...] = ()
+        # Background search on the predicted reply (see PonderTask)
+        self.ponder: Optional[PonderTask] = None
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+        self.searches = 0
+        self.ponder_hits = 0
+        self.resyncs = 0
+
+    def sync(self, fen: str) -> bool:
+        """
+        Bring the session board to `fen`, keeping the move history when `fen` is the
+        current position or one legal move away (the opponent's reply).
+        Otherwise (takeback, loaded position, new game) the board restarts from `fen`.
+
+        Returns:
+            bool: True if the reply was the move predicted by the last search (ponder hit)
+        """
+        self.last_used = time.time()
+        target = chess.Board(fen).epd()
+        self.pv_hint = ()
+
+        if self.board.epd() == target:
+            self.pv_hint = self.expected_line
+            return False
+
+        for move in self.board.legal_moves:
+            self.board.push(move)
+            if self.board.epd() == target:
+                hit = self.expected_line[:1] == (move,)
+                self.pv_hint = self.expected_line[1:] if hit else ()
+                self.expected_line = self.pv_hint
+                self.ponder_hits += hit
+                return hit
+            self.board.pop()
+
+        self.board = SearchBoard(fen)
+        self.expected_line = ()
+        self.resyncs += 1
+        return False
+
+    def ponder_board(self) -> Optional[SearchBoard]:
+        """Copy of the board after the predicted reply (None without a prediction)"""
+        if not self.expected_line or self.expected_line[0] not in self.board.legal_moves:
+            return None
+        board = self.board.copy()
+        board.push(self.expected_line[0])
+        return board
+
+    def take_ponder(self) -> Optional[PonderTask]:
+        """Detach the ponder task (the caller finishes or cancels it)"""
+        task, self.ponder = self.ponder, None
+        return task
+
+    def cancel_ponder(self) -> None:
+        task = self.take_ponder()
+        if task is not None:
+            task.cancel()
+
+    def ponder_cancel_async(self) -> None:
+        """Signal the ponder search to stop without waiting (session is being discarded)"""
+        task = self.ponder
+        if task is not None:
+            task.stop_event.set()
+
+    def record_move(self, best_move: Optional[str], pv: str = '') -> None:
+        """Play the bot's move on the session board and keep the rest of its PV as the expected line"""
+        self.searches += 1
+        if not best_move:
+            return
+        move = chess.Move.from_uci(best_move)
+        if move not in self.board.legal_moves:
+            return
+        try:
+            line = tuple(chess.Move.from_uci(uci) for uci in pv.split())
+        except ValueError:
+            line = ()
+        self.board.push(move)
+        self.expected_line = line[1:] if line[:1] == (move,) else ()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'game_id': self.game_id,
+            'plies': len(self.board.move_stack),
+            'searches': self.searches,
+            'ponder_hits': self.ponder_hits,
+            'resyncs': self.resyncs,
+            'pondering': self.ponder is not None and self.ponder.running(),
+            'idle': round(time.time() - self.last_used, 1),
+            'transposition_table': self.tt.stats()
+        }
+
+
+class EngineSessionRegistry:
+    """LRU registry of engine sessions (the least recently used game is evicted when full)"""
+
+    def __init__(
+        self,
+        max_sessions: int = EngineConfig.MAX_ENGINE_SESSIONS,
+        hash_mb: float = EngineConfig.ENGINE_SESSION_HASH_MB
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.hash_mb = hash_mb
+        self._sessions: "OrderedDict[str, EngineSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, game_id: str) -> EngineSession:
+        """Session for `game_id`, created on first use"""
+        with self._lock:
+            session = self._sessions.get(game_id)
+            if session is None:
+                session = EngineSession(game_id, self.hash_mb)
+                self._sessions[game_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    evicted.ponder_cancel_async()
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(game_id)
+            return session
+
+    def drop(self, game_id: str) -> bool:
+        """Forget a game's session (its board history and hash table)"""
+        with self._lock:
+            session = self._sessions.pop(game_id, None)
+        if session is None:
+            return False
+        session.ponder_cancel_async()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            'active': len(sessions),
+            'max_sessions': self.max_sessions,
+            'hash_mb': self.hash_mb,
+            'evictions': self.evictions,
+            'ponder_hits': sum(s.ponder_hits for s in sessions),
+            'searches': sum(s.searches for s in sessions)
+        }
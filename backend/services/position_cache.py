@@ -0,0 +1,240 @@
+"""
+Position Cache
+Caches engine results (eval bar, chat analysis, full-strength moves) so repeated
+positions are not searched again. Entries are keyed by the FEN without move counters,
+the engine and the skill level; each entry remembers its search budget (seconds), MultiPV
+count and depth cap (0 = none), and satisfies any request with an equal or smaller budget
+and MultiPV whose own depth cap is no deeper (a depth-capped evaluation never answers an
+uncapped move search).
+An optional sqlite file shares entries between worker processes (e.g. gunicorn workers).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import chess
+
+from backend.config import EngineConfig
+
+
+def normalize_fen(fen: str) -> str:
+    """FEN without halfmove / fullmove counters (en passant only when capturable)"""
+    return chess.Board(fen).epd()
+
+
+class SqliteCacheBackend:
+    """Shared second-level cache in a sqlite file (one row per cache key)"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=1.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "key TEXT PRIMARY KEY, budget REAL, lines INTEGER, max_depth INTEGER, created REAL, result TEXT)"
+        )
+        self._conn.commit()
+        self._puts = 0
+
+    def get(self, key: str, min_created: float) -> Optional[Tuple[float, int, int, float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT budget, lines, max_depth, created, result FROM positions "
+                "WHERE key = ? AND created >= ?",
+                (key, min_created)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], row[3], json.loads(row[4])
+
+    def put(self, key: str, budget: float, lines: int, max_depth: int, created: float,
+            result: Dict[str, Any], min_created: float) -> None:
+        """Insert, or replace a shallower (smaller budget / MultiPV / depth cap) or expired entry"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO positions (key, budget, lines, max_depth, created, result) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET budget = excluded.budget, lines = excluded.lines, "
+                "max_depth = excluded.max_depth, created = excluded.created, result = excluded.result "
+                "WHERE (excluded.budget >= positions.budget AND excluded.lines >= positions.lines "
+                "AND (excluded.max_depth = 0 OR (positions.max_depth != 0 "
+                "AND excluded.max_depth >= positions.max_depth))) "
+                "OR positions.created < ?",
+                (key, budget, lines, max_depth, created, json.dumps(result), min_created)
+            )
+            self._puts += 1
+            # Trim to max_entries (oldest first) every few hundred writes
+            if self._puts % 256 == 0:
+                self._conn.execute(
+                    "DELETE FROM positions WHERE key NOT IN "
+                    "(SELECT key FROM positions ORDER BY created DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM positions")
+            self._conn.commit()
+
+
+class PositionCache:
+    """
+    In-process LRU + TTL cache of formatted engine results, optionally backed by a
+    shared sqlite file. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EngineConfig.POSITION_CACHE_SIZE,
+        ttl: float = EngineConfig.POSITION_CACHE_TTL,
+        sqlite_path: str = EngineConfig.POSITION_CACHE_SQLITE_PATH
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        # key -> (budget, lines, max_depth, created, result)
+        self._entries: "OrderedDict[str, Tuple[float, int, int, float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.shared: Optional[SqliteCacheBackend] = None
+        if sqlite_path:
+            try:
+                self.shared = SqliteCacheBackend(sqlite_path, self.max_entries)
+            except sqlite3.Error as e:
+                print(f"Position cache: sqlite backend disabled ({e})")
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shallow = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(fen: str, engine: str, skill_level: int) -> str:
+        return f"{normalize_fen(fen)}|{engine}|{skill_level}"
+
+    @staticmethod
+    def _depth_covers(entry_depth: int, max_depth: int) -> bool:
+        """An entry capped at entry_depth (0 = uncapped) searched at least as deep as max_depth"""
+        return entry_depth == 0 or (max_depth != 0 and entry_depth >= max_depth)
+
+    @classmethod
+    def _satisfies(cls, entry: Tuple[float, int, int, float, Dict[str, Any]], budget: float,
+                   multipv: int, max_depth: int) -> bool:
+        return entry[0] >= budget and entry[1] >= multipv and cls._depth_covers(entry[2], max_depth)
+
+    @staticmethod
+    def _trim(result: Dict[str, Any], multipv: int) -> Dict[str, Any]:
+        """Copy of a cached result with at most `multipv` candidate lines"""
+        result = dict(result)
+        if multipv > 1 and result.get('multipv'):
+            result['multipv'] = result['multipv'][:multipv]
+        else:
+            result.pop('multipv', None)
+        return result
+
+    def get(self, fen: str, engine: str, skill_level: int, budget: float,
+            multipv: int = 1, max_depth: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Cached result searched with at least `budget` seconds and `multipv` lines,
+        and at least as deep as a search capped at `max_depth` plies (0 = uncapped).
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        key = self.make_key(fen, engine, skill_level)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] < now - self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is not None and self._satisfies(entry, budget, multipv, max_depth):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._trim(entry[4], multipv)
+
+        if self.shared is not None:
+            try:
+                shared_entry = self.shared.get(key, now - self.ttl)
+            except sqlite3.Error:
+                shared_entry = None
+            if shared_entry is not None and self._satisfies(shared_entry, budget, multipv, max_depth):
+                with self._lock:
+                    self._insert(key, shared_entry)
+                    self.hits += 1
+                    self.shared_hits += 1
+                return self._trim(shared_entry[4], multipv)
+
+        with self._lock:
+            self.misses += 1
+            self.shallow += 1 if entry is not None else 0
+        return None
+
+    def put(self, fen: str, engine: str, skill_level: int, budget: float, multipv: int,
+            result: Dict[str, Any], max_depth: int = 0) -> None:
+        """
+        Store a result unless a deeper (larger budget / MultiPV / depth cap) one is already cached.
+        max_depth is the search's depth cap (0 = uncapped).
+        """
+        key = self.make_key(fen, engine, skill_level)
+        now = time.time()
+        entry = (budget, multipv, max_depth, now, dict(result))
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[3] >= now - self.ttl and not (
+                budget >= current[0] and multipv >= current[1] and self._depth_covers(max_depth, current[2])
+            ):
+                return
+            self._insert(key, entry)
+            self.stores += 1
+        if self.shared is not None:
+            try:
+                self.shared.put(key, budget, multipv, max_depth, now, entry[4], now - self.ttl)
+            except sqlite3.Error as e:
+                print(f"Position cache: sqlite write failed ({e})")
+
+    def _insert(self, key: str, entry: Tuple[float, int, int, float, Dict[str, Any]]) -> None:
+        """Caller holds the lock"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'shared_backend': self.shared.path if self.shared is not None else None,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'shallow_misses': self.shallow,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'expired': self.expired
+            }
@@ -38,6 +38,8 @@ const BOT = {
     DEFAULT_ENGINE: 'server',
     DEFAULT_COLOR: 'r',
     DEFAULT_TIME: '0',
+    // Let the server engine think on the expected reply between moves (opt-in)
+    SERVER_PONDER: false,
     LEVEL_THRESHOLDS: [
         { max: 4, value: "0" },
         { max: 8, value: "5" },
@@ -62,7 +64,8 @@ const ENGINE = {
     MATE_SCORE_BASE: 1000000,
     MATE_DEPTH_ADJUSTMENT: 500,
     CP_TO_PAWN: 100,
-    MATE_SYMBOLS: ['M', '#'],
+    // Decisive scores: mate ('+M3', '#') and tablebase wins/losses ('+TB')
+    MATE_SYMBOLS: ['M', '#', 'TB'],
     NORMALIZED_SCORE: {
         MATE: 100,
         DEFAULT: 0
@@ -225,6 +228,7 @@ const API = {
     CLEAR_CACHE: '/api/game/clear_cache',
     MAKE_MOVE: '/api/game/make_move',
     BOT_MOVE: '/api/game/bot_move',
+    CANCEL_SEARCH: '/api/game/cancel_search',
     EVALUATE: '/api/game/evaluate',
     IMAGE_ANALYZE: '/api/image/analyze_image',
     CHAT_ANALYSIS: '/api/analysis/chat_analysis',
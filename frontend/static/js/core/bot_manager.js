@@ -18,6 +18,10 @@ export class BotManager {
         // Stockfish WASM state
         this.sfEngine = null;
         this.sfIsReady = false;
+        // Server search in flight (cancelled on new game / page exit)
+        this.pendingSearchId = null;
+        // Server engine session of the current game (move history + per-game hash table)
+        this.gameId = null;
         this.STOCKFISH_URL = APP_CONST?.BOT?.STOCKFISH_WASM_URL || "https://cdn.jsdelivr.net/npm/stockfish.js@10.0.2/stockfish.min.js";
 
         this.dom = {
@@ -56,6 +60,9 @@ export class BotManager {
         // Auto-initialize Stockfish in background after a short delay
         const delay = APP_CONST?.BOT?.INIT_DELAY_MS || 2000;
         setTimeout(() => this.initStockfish(), delay);
+
+        // Free the server worker if the user leaves mid-search
+        window.addEventListener('pagehide', () => this.cancelPendingSearch());
     }
 
     close() {
@@ -171,7 +178,14 @@ export class BotManager {
         return result;
     }
 
+    _newId() {
+        return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+
     async _getBestMoveFromAPI(fen, engineType, level, timeLimit) {
+        const searchId = this._newId();
+        this.pendingSearchId = searchId;
+        if (!this.gameId) this.gameId = this._newId();
         try {
             const url = (APP_CONST && APP_CONST.API && APP_CONST.API.BOT_MOVE) 
                 ? APP_CONST.API.BOT_MOVE : '/api/game/bot_move';
@@ -183,7 +197,10 @@ export class BotManager {
                     fen, 
                     engine: engineType === 'server' ? 'stockfish' : engineType, 
                     skill_level: level, 
-                    time_limit: timeLimit 
+                    time_limit: timeLimit,
+                    search_id: searchId,
+                    game_id: this.gameId,
+                    ponder: Boolean(APP_CONST && APP_CONST.BOT && APP_CONST.BOT.SERVER_PONDER)
                 })
             });
             const d = await resp.json();
@@ -191,9 +208,42 @@ export class BotManager {
         } catch (error) {
             console.error("Error fetching bot move from API:", error);
             return null;
+        } finally {
+            if (this.pendingSearchId === searchId) this.pendingSearchId = null;
         }
     }
 
+    /**
+     * Ask the server to abort the bot search still running for this page (if any)
+     */
+    cancelPendingSearch() {
+        if (!this.pendingSearchId) return;
+        const url = APP_CONST?.API?.CANCEL_SEARCH || '/api/game/cancel_search';
+        const body = JSON.stringify({ search_id: this.pendingSearchId });
+        this.pendingSearchId = null;
+        if (navigator.sendBeacon) {
+            navigator.sendBeacon(url, new Blob([body], { type: 'application/json' }));
+        } else {
+            fetch(url, { method: 'POST', headers: {'Content-Type': 'application/json'}, body, keepalive: true });
+        }
+    }
+
+    /**
+     * Start a fresh server engine session: drops the previous game's session
+     * (its history and hash table) without touching other players' games
+     */
+    resetGameSession() {
+        const url = APP_CONST?.API?.CLEAR_CACHE || '/api/game/clear_cache';
+        const previousId = this.gameId;
+        this.gameId = this._newId();
+        if (!previousId) return;
+        fetch(url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ game_id: previousId })
+        });
+    }
+
     // --- Stockfish WASM Implementation ---
 
     async initStockfish() {
@@ -350,10 +400,8 @@ export class BotManager {
             if (window.TIMER_MANAGER) window.TIMER_MANAGER.reset();
         }
 
-        const clearCacheUrl = (APP_CONST && APP_CONST.API && APP_CONST.API.CLEAR_CACHE) 
-            ? APP_CONST.API.CLEAR_CACHE : '/api/game/clear_cache';
-        
-        fetch(clearCacheUrl, {method: 'POST'});
+        this.cancelPendingSearch();
+        this.resetGameSession();
 
         if (window.LOGIC_GAME && window.LOGIC_GAME.initBoard) {
             window.LOGIC_GAME.initBoard(boardOrientation);
@@ -67,7 +67,7 @@ export class ChessEngine {
         let val = normScore.DEFAULT;
         
         // Handle Mate notation
-        const mateSymbols = engineConst.MATE_SYMBOLS || ['M', '#'];
+        const mateSymbols = engineConst.MATE_SYMBOLS || ['M', '#', 'TB'];
         const isMate = mateSymbols.some(sym => scoreStr.includes(sym));
 
         if (isMate) {
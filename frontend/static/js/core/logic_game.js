@@ -576,11 +576,15 @@ export class ChessCore {
      * Resets the game state and clears backend cache.
      */
     async clearBoard() {
-        const clearUrl = APP_CONST?.API?.CLEAR_CACHE || '/api/game/clear_cache';
-        try {
-            await fetch(clearUrl, { method: 'POST' });
-        } catch (e) {
-            console.warn("Failed to clear backend cache", e);
+        if (window.BOT_MANAGER && window.BOT_MANAGER.resetGameSession) {
+            window.BOT_MANAGER.resetGameSession();
+        } else {
+            const clearUrl = APP_CONST?.API?.CLEAR_CACHE || '/api/game/clear_cache';
+            try {
+                await fetch(clearUrl, { method: 'POST' });
+            } catch (e) {
+                console.warn("Failed to clear backend cache", e);
+            }
         }
 
         const currentOrientation = (typeof window.board !== 'undefined' && window.board) ? window.board.orientation() : 'white';
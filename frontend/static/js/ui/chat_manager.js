@@ -479,7 +479,7 @@ export class AliceChat {
         
         if (!s) return normScore.DEFAULT;
         const str = s.toString();
-        const mateSymbols = engineConst.MATE_SYMBOLS || ['M', '#'];
+        const mateSymbols = engineConst.MATE_SYMBOLS || ['M', '#', 'TB'];
         const isMate = mateSymbols.some(sym => str.includes(sym));
 
         if (isMate) return str.includes('-') ? -normScore.MATE : normScore.MATE;
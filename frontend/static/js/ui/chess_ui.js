@@ -82,7 +82,7 @@ export class ChessUI {
             }
 
             const scoreStr = String(score || "0.00");
-            if (scoreStr.includes('M') || scoreStr.includes('#')) {
+            if (scoreStr.includes('M') || scoreStr.includes('#') || scoreStr.includes('TB')) {
                 formattedScore = scoreStr.replace("#", "M");
                 percentAdvantage = scoreStr.includes('-') ? 0 : 100;
             } else {
@@ -0,0 +1,794 @@
+import random
+import threading
+import time
+
+import chess
+
+from backend.engines import minimax
+from backend.engines.transposition import TranspositionTable
+
+
+TEST_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 0 9",
+]
+
+
+def reference_material_pst(board):
+    """Square-by-square material + PST sum (White's point of view)."""
+    score = 0
+    for sq in chess.SQUARES:
+        piece = board.piece_at(sq)
+        if not piece:
+            continue
+        table = minimax.PIECE_TABLES[piece.piece_type]
+        val = minimax.PIECE_VALUES[piece.piece_type] + minimax.get_square_value(sq, piece.color, table)
+        score += val if piece.color == chess.WHITE else -val
+    return score
+
+
+def test_material_pst_matches_square_scan():
+    rng = random.Random(7)
+    for fen in TEST_FENS:
+        board = chess.Board(fen)
+        for _ in range(40):
+            assert minimax.material_pst_score(board) == reference_material_pst(board)
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+
+
+def test_evaluate_board_terminal_positions():
+    mated = chess.Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+    assert minimax.evaluate_board(mated) == -minimax.MATE_SCORE
+
+    stalemate = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    assert minimax.evaluate_board(stalemate) == 0
+
+
+def test_transposition_table_store_probe_and_replacement():
+    tt = TranspositionTable(size_mb=0.001)
+    move = chess.Move.from_uci("e7e8q")
+    key = 0x1234_5678_9ABC_DEF0
+
+    tt.store(key, 5, -321, minimax.HASH_EXACT, move)
+    assert tt.probe(key) == (5, -321, minimax.HASH_EXACT, move)
+
+    # Same bucket, shallower entry goes to the always-replace slot
+    other = key + tt.num_buckets
+    tt.store(other, 2, 40, minimax.HASH_BETA, None)
+    assert tt.probe(key)[0] == 5
+    assert tt.probe(other) == (2, 40, minimax.HASH_BETA, None)
+
+    # Stale entries from an older search give way to new ones
+    tt.new_search()
+    third = key + 2 * tt.num_buckets
+    tt.store(third, 1, 7, minimax.HASH_ALPHA, None)
+    assert tt.probe(third) == (1, 7, minimax.HASH_ALPHA, None)
+    assert tt.probe(key) is None
+
+    tt.clear()
+    assert tt.probe(other) is None
+    assert tt.fill_percent() == 0.0
+
+
+def search_nodes(fen, depth, **options):
+    minimax.clear_transposition_table()
+    ctx = minimax.SearchContext(**options)
+    board = chess.Board(fen)
+    for d in range(1, depth + 1):
+        minimax.negamax(board, d, -minimax.INFINITY, minimax.INFINITY, ctx)
+    return ctx.nodes
+
+
+def test_selective_pruning_reduces_node_count():
+    fen = "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 0 9"
+    full = search_nodes(fen, 4, null_move=False, late_move_reductions=False)
+    pruned = search_nodes(fen, 4)
+    assert pruned < full / 2
+
+
+def test_find_best_move_finds_mate_in_one():
+    result = minimax.find_best_move("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", skill_level=20)
+    assert result['best_move'] == 'd1d8'
+    assert result['search_score'] == '+M1'
+
+
+def test_gives_direct_check_matches_checkers():
+    rng = random.Random(11)
+    for fen in TEST_FENS:
+        board = chess.Board(fen)
+        for _ in range(30):
+            for move in board.legal_moves:
+                piece_type = board.piece_type_at(move.from_square)
+                board.push(move)
+                expected = bool(board.checkers() & chess.BB_SQUARES[move.to_square])
+                board.pop()
+                assert minimax.gives_direct_check(board, move, piece_type) == expected
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+
+
+def test_killer_and_history_ordering_stats():
+    minimax.clear_transposition_table()
+    ctx = minimax.SearchContext()
+    board = chess.Board(TEST_FENS[3])
+    for depth in range(1, 4):
+        ctx.new_iteration()
+        minimax.negamax(board, depth, -minimax.INFINITY, minimax.INFINITY, ctx)
+    assert ctx.beta_cutoffs > 0
+    assert 0.5 < ctx.first_move_cutoff_rate <= 1.0
+    assert any(k[0] for k in ctx.killers)
+    assert any(ctx.history[chess.BLACK]) or any(ctx.history[chess.WHITE])
+
+
+def test_static_exchange_evaluation():
+    # Pawn takes a knight defended by a pawn: wins knight, loses pawn
+    board = chess.Board("4k3/8/2p5/3n4/4P3/8/8/4K3 w - - 0 1")
+    assert minimax.see(board, chess.Move.from_uci("e4d5")) == 320 - 100
+
+    # Queen takes a pawn defended by a pawn: loses the queen
+    board = chess.Board("4k3/8/2p5/3p4/8/8/3Q4/4K3 w - - 0 1")
+    assert minimax.see(board, chess.Move.from_uci("d2d5")) == 100 - 900
+
+    # Rook takes an undefended-looking pawn, backed up by an x-ray rook behind it
+    board = chess.Board("3rk3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1")
+    assert minimax.see(board, chess.Move.from_uci("d2d5")) == 100
+
+    # Quiescence skips the losing capture entirely
+    board = chess.Board("4k3/8/2p5/3p4/8/8/3Q4/4K3 w - - 0 1")
+    ctx = minimax.SearchContext()
+    minimax.quiescence_search(board, -minimax.INFINITY, minimax.INFINITY, ctx)
+    assert ctx.qnodes == 1
+
+
+def test_lazy_smp_returns_legal_move():
+    fen = TEST_FENS[3]
+    result = minimax.find_best_move(fen, time_limit=0.5, skill_level=20, workers=2)
+    assert chess.Move.from_uci(result['best_move']) in chess.Board(fen).legal_moves
+
+
+def test_search_limits_abort_inside_tree():
+    fen = TEST_FENS[1]
+    board = chess.Board(fen)
+
+    # Node budget: aborted mid-iteration, board restored, last finished depth kept
+    ctx = minimax.SearchContext(node_limit=5000)
+    move, _, _, depth = minimax.iterative_deepening(board, board.legal_moves, 20, time.time(), 60, ctx)
+    assert ctx.aborted and move in board.legal_moves and depth >= 1
+    assert ctx.nodes + ctx.qnodes <= 5000 + minimax.STOP_CHECK_MASK
+    assert board.fen() == fen
+
+    # Cancelled before starting: nothing searched
+    stop_event = threading.Event()
+    stop_event.set()
+    ctx = minimax.SearchContext(stop_event=stop_event)
+    move, _, _, depth = minimax.iterative_deepening(board, board.legal_moves, 20, time.time(), 60, ctx)
+    assert move is None and depth == 0
+
+
+def test_find_best_move_honours_hard_deadline():
+    start = time.time()
+    result = minimax.find_best_move(TEST_FENS[1], max_depth=30, time_limit=0.3, skill_level=20)
+    stats = result['stats']
+    # The deadline, not the depth, ended the search (generous wall-clock bound for slow machines)
+    assert stats['depth'] < 30 and not stats['interrupted']
+    assert time.time() - start < 5
+    assert chess.Move.from_uci(result['best_move']) in chess.Board(TEST_FENS[1]).legal_moves
+
+
+def test_find_best_move_reports_search_stats():
+    from backend.services.engine_service import EngineStatsCollector
+
+    minimax.clear_transposition_table()
+    result = minimax.find_best_move(TEST_FENS[3], max_depth=4, time_limit=30, skill_level=20)
+    stats = result['stats']
+    assert stats['source'] == 'search' and stats['depth'] == 4
+    assert [it['depth'] for it in stats['iterations']] == [1, 2, 3, 4]
+    assert stats['iterations'][-1]['pv'].split()[0] == result['best_move']
+    assert stats['nodes'] == stats['tt_probes'] and 0 < stats['tt_hits'] < stats['tt_probes']
+    assert stats['nps'] > 0 and 0 < stats['eval_time'] + stats['movegen_time'] < stats['time']
+
+    collector = EngineStatsCollector()
+    collector.record(stats)
+    collector.record(minimax.find_best_move("k7/8/1Q6/8/8/8/8/7K b - - 0 1")['stats'])
+    snapshot = collector.snapshot()
+    assert snapshot['searches'] == 1 and snapshot['sources'] == {'search': 1, 'forced': 1}
+    assert snapshot['nodes'] == stats['nodes'] and snapshot['avg_depth'] == 4
+
+
+def test_find_best_move_returns_full_principal_variation():
+    from backend.services.analysis_manager import ChessAnalysisManager
+
+    minimax.clear_transposition_table()
+    fen = TEST_FENS[3]
+    result = minimax.find_best_move(fen, max_depth=5, time_limit=30, skill_level=20)
+    moves = result['pv'].split()
+    assert len(moves) >= 5 and moves[0] == result['best_move']
+
+    board = chess.Board(fen)
+    for uci in moves:
+        move = chess.Move.from_uci(uci)
+        assert move in board.legal_moves
+        board.push(move)
+
+    san = ChessAnalysisManager.pv_to_san(fen, result['pv'])
+    assert san.startswith("9...") and len(san.split()) > len(moves)
+
+
+def test_multipv_lines_have_exact_scores():
+    fen = TEST_FENS[3]
+    minimax.clear_transposition_table()
+    result = minimax.find_best_move(
+        fen, max_depth=3, time_limit=60, skill_level=20,
+        null_move=False, late_move_reductions=False, multipv=3
+    )
+    lines = result['multipv']
+    assert len(lines) == 3 and lines[0]['move'] == result['best_move']
+    assert len({line['move'] for line in lines}) == 3
+
+    # Each candidate's score equals an independent full-window search of that move
+    board = chess.Board(fen)
+    for line in lines:
+        assert line['pv'].split()[0] == line['move']
+        minimax.clear_transposition_table()
+        board.push_uci(line['move'])
+        ctx = minimax.SearchContext(null_move=False, late_move_reductions=False)
+        score = -minimax.negamax(board, 2, -minimax.INFINITY, minimax.INFINITY, ctx, 1)
+        board.pop()
+        assert line['search_score'] == minimax.format_score(score, board.turn)
+
+
+def test_opening_book_matches_polyglot_reader(tmp_path):
+    import struct
+
+    import chess.polyglot
+
+    from backend.engines.opening_book import OpeningBook
+
+    def raw(from_sq, to_sq, promotion=0):
+        return to_sq | (from_sq << 6) | (promotion << 12)
+
+    start = chess.Board()
+    castle = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    promote = chess.Board("8/4P3/8/8/8/8/k7/6K1 w - - 0 1")
+    entries = [
+        (start, raw(chess.E2, chess.E4), 10),
+        (start, raw(chess.D2, chess.D4), 5),
+        (castle, raw(chess.E1, chess.H1), 3),  # O-O written as king takes rook
+        (castle, raw(chess.E1, chess.A1), 1),  # O-O-O
+        (promote, raw(chess.E7, chess.E8, 4), 7),
+    ]
+    records = sorted((chess.polyglot.zobrist_hash(b), m, w) for b, m, w in entries)
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"".join(struct.pack(">QHHI", k, m, w, 0) for k, m, w in records))
+
+    book = OpeningBook(str(path))
+    assert len(book) == 5
+    with chess.polyglot.open_reader(str(path)) as reader:
+        for board in (start, castle, promote):
+            expected = sorted((e.move.uci(), e.weight) for e in reader.find_all(board))
+            assert sorted((m.uci(), w) for m, w in book.find_all(board)) == expected
+    assert {m.uci() for m, _ in book.find_all(castle)} == {"e1g1", "e1c1"}
+    assert book.weighted_choice(promote) == chess.Move.from_uci("e7e8q")
+    assert book.weighted_choice(chess.Board(TEST_FENS[1])) is None
+
+
+def test_tablebase_wdl_cutoff_in_negamax():
+    from backend.engines.tablebase import TB_WIN_SCORE, get_tablebase
+
+    class FakeTablebase:
+        """Every 3-piece position is a win for the side to move."""
+        max_pieces = 3
+
+        def covers(self, board):
+            return not board.castling_rights and chess.popcount(board.occupied) <= self.max_pieces
+
+        def probe_wdl(self, board):
+            return 2
+
+    assert get_tablebase("") is None
+
+    # Rook takes the queen: the child is a 3-piece position right after a capture,
+    # so negamax returns the (fake) tablebase verdict for Black without searching
+    minimax.clear_transposition_table()
+    board = chess.Board("4k3/8/8/8/8/8/3q4/3RK3 w - - 0 1")
+    ctx = minimax.SearchContext()
+    ctx.tablebase = FakeTablebase()
+    board.push_uci("d1d2")
+    score = -minimax.negamax(board, 3, -minimax.INFINITY, minimax.INFINITY, ctx, 1)
+    assert score == -(TB_WIN_SCORE - 1)
+    assert ctx.tb_hits == 1 and ctx.nodes == 1
+
+    # The TT keeps the verdict relative to the node, so reaching it at another ply
+    # (e.g. through a transposition) scores it by the new distance from the root
+    assert ctx.tt.probe(minimax.zobrist_key(board))[1] == TB_WIN_SCORE
+    ctx.tablebase = None
+    assert minimax.negamax(board, 3, -minimax.INFINITY, minimax.INFINITY, ctx, 3) == TB_WIN_SCORE - 3
+
+
+def test_pawn_structure_and_eval_cache():
+    # White: isolated passed a6, doubled + isolated passed c2/c3; Black: f7/g7/h7 (passed, no weaknesses)
+    board = chess.Board("6k1/5ppp/P7/8/8/2P5/2P5/6K1 w - - 0 1")
+    bonus = minimax.PASSED_PAWN_BONUS
+    white = (bonus[5] + bonus[2] + bonus[1]
+             - minimax.DOUBLED_PAWN_PENALTY - 3 * minimax.ISOLATED_PAWN_PENALTY)
+    black = 3 * bonus[1]
+    minimax.clear_eval_caches()
+    assert minimax.pawn_structure_score(board) == white - black
+    assert minimax.pawn_structure_score(board) == white - black
+    assert minimax.PAWN_HASH.hits == 1
+
+    rng = random.Random(3)
+    for fen in TEST_FENS:
+        board = chess.Board(fen)
+        for _ in range(30):
+            cached = minimax.static_score(board)
+            minimax.clear_eval_caches()
+            assert minimax.static_score(board) == cached
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+
+
+def test_batch_evaluate_matches_evaluate_board():
+    from backend.engines import batch_eval
+
+    rng = random.Random(11)
+    boards = []
+    for fen in TEST_FENS:
+        board = chess.Board(fen)
+        for _ in range(30):
+            boards.append(board.copy())
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+    boards.append(chess.Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"))
+    boards.append(chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"))
+
+    planes = batch_eval.board_bitplanes(boards)
+    assert planes.shape == (len(boards), 12, 64)
+    assert planes[0].sum() == chess.popcount(boards[0].occupied)
+    assert list(batch_eval.batch_pawn_structure(planes)) == [minimax.pawn_structure_score(b) for b in boards]
+    assert list(batch_eval.batch_king_safety(planes)) == [minimax.king_safety_score(b) for b in boards]
+    assert list(batch_eval.batch_evaluate(boards)) == [minimax.evaluate_board(b) for b in boards]
+
+
+def test_search_board_incremental_zobrist():
+    from backend.engines.search_board import SearchBoard
+
+    rng = random.Random(5)
+    # Promotion capturing a piece of the same type (c2xd1=N) keeps the knight bitboard unchanged
+    fens = TEST_FENS + ["2r1k2r/p1pN1p2/b2bp2Q/3n2p1/1q2P3/2BB1P1p/PPp3PP/R2NK2R b KQk - 0 12"]
+    for fen in fens:
+        board = SearchBoard(fen)
+        assert board.zobrist == chess.polyglot.zobrist_hash(board)
+        for _ in range(60):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = chess.Move.null() if not board.is_check() and rng.random() < 0.05 else rng.choice(moves)
+            board.push(move)
+            assert board.zobrist == chess.polyglot.zobrist_hash(board)
+            if rng.random() < 0.2:
+                board.pop()
+                assert board.zobrist == chess.polyglot.zobrist_hash(board)
+        copy = board.copy(stack=4)
+        while copy.move_stack:
+            copy.pop()
+            assert copy.zobrist == chess.polyglot.zobrist_hash(copy)
+
+    board = SearchBoard("2r1k2r/p1pN1p2/b2bp2Q/3n2p1/1q2P3/2BB1P1p/PPp3PP/R2NK2R b KQk - 0 12")
+    board.push_uci("c2d1n")
+    assert board.zobrist == chess.polyglot.zobrist_hash(board)
+
+
+def test_bench_perft_and_epd_suite():
+    from backend.engines import bench
+
+    assert bench.perft(chess.Board(), 3) == 8902
+    results = bench.run_perft(2)
+    assert results and all(r['ok'] for r in results)
+
+    positions = bench.load_epd()
+    assert len(positions) >= 10
+    for _, fen, best_moves in positions:
+        board = chess.Board(fen)
+        assert best_moves and all(chess.Move.from_uci(uci) in board.legal_moves for uci in best_moves)
+
+    qsearch = bench.run_qsearch(repeat=1)
+    assert qsearch['positions'] == sum(chess.Board(fen).legal_moves.count() for _, fen, _ in positions)
+    assert qsearch['qnodes'] >= qsearch['positions'] and qsearch['nps'] > 0
+
+
+def test_engine_sessions_keep_history_and_evict_lru():
+    from backend.services.engine_service import EngineService
+    from backend.services.engine_sessions import EngineSessionRegistry
+
+    registry = EngineSessionRegistry(max_sessions=2, hash_mb=0.01)
+    first = registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert registry.get("a") is first and registry.evictions == 1 and registry.drop("a")
+
+    session = registry.get("game")
+    session.sync(chess.STARTING_FEN)
+    session.record_move("e2e4", "e2e4 e7e5 g1f3")
+    board = chess.Board()
+    board.push_uci("e2e4")
+    board.push_uci("e7e5")
+    assert session.sync(board.fen()) is True
+    assert session.pv_hint == (chess.Move.from_uci("g1f3"),)
+    assert len(session.board.move_stack) == 2
+
+    service = EngineService()
+    service.is_production = True
+    fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    result = service.get_best_move(fen, skill_level=20, time_limit=0.3, game_id="g1")
+    session = service.sessions.get("g1")
+    assert session.board.move_stack == [chess.Move.from_uci(result['best_move'])]
+    assert session.tt.stores > 0
+
+    board = chess.Board(fen)
+    board.push_uci(result['best_move'])
+    board.push(next(iter(board.legal_moves)))
+    service.get_best_move(board.fen(), skill_level=20, time_limit=0.3, game_id="g1")
+    assert len(session.board.move_stack) == 3
+    assert service.reset_session("g1") and len(service.sessions) == 0
+
+
+def test_ponder_hit_reuses_background_search_and_miss_cancels_it():
+    from backend.services.engine_service import EngineService
+
+    service = EngineService()
+    service.is_production = True
+    fen = "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 0 9"
+    result = service.get_best_move(fen, skill_level=20, time_limit=0.3, game_id="p1", ponder=True)
+    session = service.sessions.get("p1")
+    assert session.ponder is not None and session.expected_line
+    predicted = session.expected_line[0]
+
+    board = chess.Board(fen)
+    board.push_uci(result['best_move'])
+    board.push(predicted)
+    service.get_best_move(board.fen(), skill_level=20, time_limit=0.2, game_id="p1", ponder=True)
+    assert service.stats.last['ponder_hit'] is True
+    assert session.ponder_hits == 1
+
+    # Wrong guess: the ponder search is stopped and a normal search runs
+    task = session.ponder
+    board = session.board.copy()
+    board.push(next(move for move in board.legal_moves if move not in session.expected_line[:1]))
+    service.get_best_move(board.fen(), skill_level=20, time_limit=0.2, game_id="p1")
+    assert task.stop_event.is_set() and not task.running()
+    assert 'ponder_hit' not in service.stats.last and session.ponder is None
+
+
+def test_stockfish_pool_checkout_timeout_and_game_affinity():
+    from backend.engines.stockfish_engine import EngineLoop, StockfishPool
+
+    async def scenario(pool):
+        first = await pool.checkout(timeout=0.1, game="g1")
+        first.game = "g1"
+        second = await pool.checkout(timeout=0.1)
+        assert first is not second
+        assert await pool.checkout(timeout=0.05) is None and pool.timeouts == 1
+
+        await pool.checkin(second)
+        await pool.checkin(first)
+        async with pool.process(timeout=0.1, game="g1") as process:
+            assert process is first
+            assert pool.stats()['in_use'] == 1
+
+        # Without a game, a process already at the requested skill level is preferred
+        second.options["Skill Level"] = 20
+        async with pool.process(timeout=0.1, skill_level=20) as process:
+            assert process is second
+
+    pool = StockfishPool(size=2)
+    EngineLoop.get_instance().run(scenario(pool), timeout=5)
+    stats = pool.stats()
+    assert stats['idle'] == 2 and stats['checkouts'] == 4 and stats['skill_match_rate'] == 0.25
+
+
+def test_position_cache_budget_ttl_and_shared_sqlite(tmp_path, monkeypatch):
+    from backend.config import EngineConfig
+    from backend.services.engine_service import EngineService, MinimaxStrategy
+    from backend.services.position_cache import PositionCache
+
+    fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    same_position = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 7 12"
+    result = {'best_move': 'f1b5', 'search_score': '+0.30', 'pv': 'f1b5 a7a6',
+              'multipv': [{'move': 'f1b5'}, {'move': 'd2d4'}]}
+    path = str(tmp_path / "positions.sqlite")
+    cache = PositionCache(max_entries=2, ttl=60, sqlite_path=path)
+    cache.put(fen, 'minimax', 20, 1.0, 2, result)
+
+    # Deeper / wider entry answers shallower requests; move counters are ignored
+    assert cache.get(same_position, 'minimax', 20, 0.5)['best_move'] == 'f1b5'
+    assert 'multipv' not in cache.get(fen, 'minimax', 20, 1.0)
+    assert cache.get(fen, 'minimax', 20, 2.0) is None and cache.shallow == 1
+    assert cache.get(fen, 'stockfish', 20, 0.5) is None
+    cache.put(fen, 'minimax', 20, 0.3, 1, {'best_move': 'a2a3'})
+    assert cache.get(fen, 'minimax', 20, 0.3, 2)['best_move'] == 'f1b5'
+
+    # A depth-capped evaluation only answers requests capped at the same depth or shallower
+    capped = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+    cache.put(capped, 'minimax', 20, 1.0, 1, {'best_move': 'e7e5'}, max_depth=10)
+    assert cache.get(capped, 'minimax', 20, 0.1) is None
+    assert cache.get(capped, 'minimax', 20, 0.1, max_depth=12) is None
+    assert cache.get(capped, 'minimax', 20, 0.1, max_depth=8)['best_move'] == 'e7e5'
+    cache.put(capped, 'minimax', 20, 1.0, 1, {'best_move': 'c7c5'})
+    assert cache.get(capped, 'minimax', 20, 1.0, max_depth=10)['best_move'] == 'c7c5'
+
+    # Another worker process sees the entry through the sqlite file
+    other = PositionCache(ttl=60, sqlite_path=path)
+    assert other.get(fen, 'minimax', 20, 1.0)['best_move'] == 'f1b5' and other.shared_hits == 1
+    assert other.get(capped, 'minimax', 20, 1.0)['best_move'] == 'c7c5'
+    assert PositionCache(ttl=0, sqlite_path=path).get(fen, 'minimax', 20, 0.1) is None
+
+    # Depth-only evaluation budget, so the result does not depend on machine speed
+    monkeypatch.setattr(MinimaxStrategy, 'evaluation_depth', 3)
+    monkeypatch.setattr(MinimaxStrategy, 'evaluation_time', 60.0)
+    service = EngineService()
+    service.is_production = True
+    first = service.evaluate_position(fen)
+    assert first['success'] and service.position_cache.stats()['stores'] == 1
+    assert service.evaluate_position(same_position) == first
+    # The evaluation is depth-capped, so a full-strength move search is not served from it
+    service.get_best_move(fen, skill_level=20, time_limit=0.1)
+    stats = service.position_cache.stats()
+    assert stats['hits'] == 1 and stats['shallow_misses'] == 1
+
+    # A time-bounded move search is cached; one cut short by the node limit is not
+    service.get_best_move(capped, skill_level=20, time_limit=0.1)
+    assert service.position_cache.stats()['stores'] == 2
+    monkeypatch.setattr(EngineConfig, 'MINIMAX_NODE_LIMIT', 500)
+    node_limited = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/2N5/PPPP1PPP/R1BQKBNR w KQkq - 2 3"
+    assert service.get_best_move(node_limited, skill_level=20, time_limit=60)['success']
+    assert service.position_cache.stats()['stores'] == 2
+
+
+def test_root_split_matches_single_process_search():
+    from backend.engines.parallel import board_history, rebuild_board
+
+    # Mate found by a pool worker (not the first root move): its PV must come back in full
+    fen = "r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1"
+    results = []
+    for workers in (1, 2):
+        minimax.clear_transposition_table()
+        results.append(minimax.find_best_move(
+            fen, max_depth=3, time_limit=60, skill_level=20, workers=workers, parallel_mode='root'
+        ))
+    single, split = results
+    assert chess.Move.from_uci(split['best_move']) in chess.Board(fen).legal_moves
+    assert (split['best_move'], split['search_score'], split['pv']) == \
+        (single['best_move'], single['search_score'], single['pv'])
+    assert len(split['pv'].split()) == 3
+
+    # Workers rebuild the board with its history, so repetitions are still detected
+    board = chess.Board()
+    for move in ["g1f3", "g8f6", "f3g1", "f6g8"] * 2:
+        board.push_uci(move)
+    rebuilt = rebuild_board(*board_history(board))
+    assert rebuilt.move_stack == board.move_stack and rebuilt.is_repetition(3)
+
+
+def test_stockfish_search_issues_one_analysis_per_move():
+    import asyncio
+    import chess.engine
+    from backend.engines import stockfish_engine
+
+    board = chess.Board()
+    lines = [
+        {"pv": [chess.Move.from_uci(uci) for uci in pv], "depth": 14, "nodes": nodes,
+         "score": chess.engine.PovScore(chess.engine.Cp(cp), chess.WHITE)}
+        for pv, cp, nodes in [
+            (["e2e4", "e7e5"], 35, 90000), (["d2d4", "d7d5"], 30, 90000),
+            (["g1f3", "g8f6"], 25, 80000), (["c2c4", "e7e5"], 20, 80000),
+        ]
+    ]
+
+    class FakeAnalysis:
+        def __init__(self, best, multipv):
+            self.best, self.multipv = best, multipv
+
+        async def wait(self):
+            return chess.engine.BestMove(self.best, None)
+
+        def stop(self):
+            pass
+
+    class FakeEngine:
+        """Reports `multipv` lines; Skill Level plays the second one when weakened"""
+        def __init__(self, weakened):
+            self.weakened = weakened
+            self.calls = []
+
+        async def analysis(self, board, limit, multipv=1, game=None, info=None):
+            self.calls.append(multipv)
+            reported = lines[:multipv]
+            return FakeAnalysis(reported[1 if self.weakened else 0]["pv"][0], reported)
+
+    # Weakened level: one search with SKILL_MULTIPV lines, score/PV of the move actually played
+    engine = FakeEngine(weakened=True)
+    result = asyncio.run(stockfish_engine._search(engine, board, 0.1, 1, skill_level=5))
+    assert engine.calls == [stockfish_engine.SKILL_MULTIPV]
+    assert result == {"success": True, "best_move": "d2d4", "search_score": "+0.30", "pv": "d2d4 d7d5",
+                      "depth": 14, "nodes": 90000}
+
+    # Full strength with MultiPV: still one search, top-k lines attached
+    engine = FakeEngine(weakened=False)
+    result = asyncio.run(stockfish_engine._search(engine, board, 0.1, 2, skill_level=20))
+    assert engine.calls == [2]
+    assert (result["best_move"], result["search_score"], result["pv"]) == ("e2e4", "+0.35", "e2e4 e7e5")
+    assert [line["move"] for line in result["multipv"]] == ["e2e4", "d2d4"]
+    assert result["multipv"][1] == {"move": "d2d4", "search_score": "+0.30", "pv": "d2d4 d7d5"}
+
+    # stop_event sends 'stop' to a search that would otherwise run for its whole time limit
+    class EndlessAnalysis(FakeAnalysis):
+        def __init__(self, best, multipv):
+            super().__init__(best, multipv)
+            self.stopped = asyncio.Event()
+
+        async def wait(self):
+            await self.stopped.wait()
+            return await super().wait()
+
+        def stop(self):
+            self.stopped.set()
+
+    class EndlessEngine(FakeEngine):
+        async def analysis(self, board, limit, multipv=1, game=None, info=None):
+            self.calls.append(multipv)
+            return EndlessAnalysis(lines[0]["pv"][0], lines[:multipv])
+
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+    start = time.time()
+    result = asyncio.run(stockfish_engine._search(EndlessEngine(False), board, 60, 1, 20, stop_event=stop_event))
+    assert time.time() - start < 30
+    assert result["best_move"] == "e2e4" and result["interrupted"]
+
+    async def endless_play():
+        await asyncio.sleep(60)
+
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+    result = asyncio.run(stockfish_engine._unless_stopped(endless_play(), stop_event))
+    assert result["interrupted"] and not result["success"]
+
+
+def test_pvs_and_aspiration_match_full_window_search():
+    # Plain alpha-beta as the reference (no null-move / LMR, which change the tree themselves)
+    fens = [TEST_FENS[1], TEST_FENS[2], "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"]
+    nodes = {True: 0, False: 0}
+    for fen in fens:
+        results = {}
+        for pvs in (False, True):
+            minimax.clear_transposition_table()
+            ctx = minimax.SearchContext(null_move=False, late_move_reductions=False, pvs=pvs)
+            board = chess.Board(fen)
+            move, score, _, depth = minimax.iterative_deepening(board, board.legal_moves, 4, time.time(), 60, ctx)
+            assert depth == 4
+            results[pvs] = (move, score)
+            nodes[pvs] += ctx.nodes + ctx.qnodes
+        assert results[True] == results[False]
+    assert nodes[True] < nodes[False]
+
+
+def test_root_split_stop_reaches_running_workers():
+    from backend.engines import parallel
+
+    stop_event = threading.Event()
+    threading.Timer(0.5, stop_event.set).start()
+    start = time.time()
+    result = minimax.find_best_move(
+        TEST_FENS[1], max_depth=30, time_limit=60, skill_level=20, workers=2, parallel_mode='root',
+        stop_event=stop_event
+    )
+    assert chess.Move.from_uci(result['best_move']) in chess.Board(TEST_FENS[1]).legal_moves
+    assert result['stats']['interrupted'] and time.time() - start < 30
+
+    # A root move already running in a worker stops on the shared flag, not at its 60 s deadline
+    state = parallel.SharedRootState()
+    try:
+        threading.Timer(0.5, state.stop_flag.set).start()
+        start = time.time()
+        root_fen, history = parallel.board_history(chess.Board(TEST_FENS[1]))
+        move_uci, val, pv, nodes, _ = parallel._search_root_move(
+            "stop-test", parallel._worker_generation, root_fen, history, "e2a6", 30, state.name,
+            minimax.INFINITY, time.time() + 60, True, True
+        )
+        assert val is None and pv == [] and nodes > 0 and time.time() - start < 30
+        # Moves dispatched after the search ended return at once
+        assert parallel._search_root_move(
+            "stop-test", parallel._worker_generation, root_fen, history, "e1g1", 30, state.name,
+            minimax.INFINITY, time.time() + 60, True, True
+        )[1:] == (None, [], 0, 0)
+    finally:
+        if parallel._worker_state is not None:
+            parallel._worker_state.close()
+            parallel._worker_state = None
+        state.close()
+
+
+def test_lazy_smp_helpers_search_with_move_history():
+    from backend.engines import smp
+    from backend.engines.parallel import board_history
+
+    # Black, a rook down, can claim a threefold repetition with c6b8; only the history shows it
+    board = chess.Board("1n2k3/pppppppp/8/8/8/8/PPPPPPPP/R3K1N1 b - - 0 1")
+    for move in "b8c6 g1f3 c6b8 f3g1 b8c6 g1f3 c6b8 f3g1 b8c6 g1f3".split():
+        board.push_uci(move)
+
+    table = smp.get_shared_table()
+    table.tt.clear()
+    table.stop_flag.clear()
+    try:
+        move, score, _, depth, _, _ = smp._helper_search(
+            table.name, table.size_mb, table.tt.age, *board_history(board), 3, time.time(), 60, 1, True, True
+        )
+    finally:
+        attached = smp._attached_tables.pop(table.name, None)
+        if attached is not None:
+            attached.close()
+    assert (move, score, depth) == ("c6b8", 0, 3)
+
+
+def test_lazy_smp_keeps_session_table_and_pv_hint(monkeypatch):
+    from backend.engines.search_board import SearchBoard
+
+    hints = []
+    iterative_deepening = minimax.iterative_deepening
+
+    def recording_iterative_deepening(*args, hint_move=None, **kwargs):
+        hints.append(hint_move)
+        return iterative_deepening(*args, hint_move=hint_move, **kwargs)
+
+    monkeypatch.setattr(minimax, 'iterative_deepening', recording_iterative_deepening)
+    board = SearchBoard(TEST_FENS[1])
+    session_tt = TranspositionTable(1)
+    hint = chess.Move.from_uci("d5e6")
+    result = minimax.find_best_move(
+        TEST_FENS[1], max_depth=3, time_limit=60, skill_level=20, workers=2, parallel_mode='smp',
+        board=board, tt=session_tt, pv_hint=(hint,)
+    )
+    assert hints == [hint] and result['stats']['pv_hint']
+    # The main thread searched in the session table, not the process-wide shared one
+    assert session_tt.stores > 0
+
+
+def test_broken_opening_book_falls_back_to_search(tmp_path, monkeypatch, capsys):
+    from backend.config import EngineConfig
+    from backend.engines import opening_book
+
+    path = tmp_path / "broken.bin"
+    path.write_bytes(b"\x00" * 17)
+    monkeypatch.setattr(EngineConfig, 'OPENING_BOOK_PATH', str(path))
+    monkeypatch.setattr(opening_book, '_books', {})
+
+    for _ in range(2):
+        result = minimax.find_best_move(chess.STARTING_FEN, max_depth=1, time_limit=60, skill_level=10)
+        assert result['stats']['source'] == 'search'
+    assert opening_book._books == {str(path): None}
+    assert capsys.readouterr().out.count("Failed to open opening book") == 1
+
+
+def test_format_score_shows_tablebase_results():
+    from backend.engines.tablebase import wdl_to_score
+    from backend.services.analysis_manager import ChessAnalysisManager
+
+    assert minimax.format_score(wdl_to_score(2, 1), chess.WHITE) == "+TB"
+    assert minimax.format_score(wdl_to_score(2, 7), chess.BLACK) == "-TB"
+    assert minimax.format_score(minimax.MATE_SCORE - 3, chess.WHITE) == "+M2"
+    assert minimax.format_score(-150, chess.BLACK) == "+1.50"
+    assert ChessAnalysisManager.parse_score("-TB") == ChessAnalysisManager.parse_score("-M3")
@@ -0,0 +1,46 @@
+"""
+Đo thời gian đạt độ sâu (time-to-depth) của engine Minimax với 1/2/4 tiến trình.
+Chạy từ thư mục gốc của repo:
+    python -m tools.bench_parallel --depth 5 --workers 1 2 4 --mode root smp
+"""
+
+import argparse
+import time
+
+from backend.engines import minimax
+from backend.engines.parallel import warm_pool
+
+BENCH_FENS = [
+    "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 0 9",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "2rq1rk1/pp1bppbp/2np1np1/8/3NP3/1BN1BP2/PPPQ2PP/2KR3R w - - 0 11",
+]
+
+
+def time_to_depth(fen, depth, workers, mode):
+    minimax.clear_transposition_table()
+    start = time.time()
+    minimax.find_best_move(
+        fen, max_depth=depth, time_limit=600, skill_level=20,
+        workers=workers, parallel_mode=mode
+    )
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimax time-to-depth benchmark")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", nargs="+", default=["root", "smp"])
+    args = parser.parse_args()
+
+    print(f"{'mode':<6}{'workers':>8}{'depth':>7}{'total (s)':>12}")
+    for mode in args.mode:
+        for workers in args.workers:
+            warm_pool(workers)
+            total = sum(time_to_depth(fen, args.depth, workers, mode) for fen in BENCH_FENS)
+            print(f"{mode:<6}{workers:>8}{args.depth:>7}{total:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Profile engine Minimax bằng cProfile: tỉ lệ thời gian của từng nhóm công việc
+(băm Zobrist, kiểm tra kết thúc ván, đánh giá, sinh nước, push/pop) trên một độ sâu cố định.
+Chạy từ thư mục gốc của repo:
+    python -m tools.profile_minimax --depth 4 --top 15
+"""
+
+import argparse
+import cProfile
+import pstats
+
+from backend.engines import minimax
+
+PROFILE_FENS = [
+    "r1bq1rk1/pp2ppbp/2np1np1/8/3NP3/2N1BP2/PPPQ2PP/R3KB1R b KQ - 0 9",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2k5/3p4/p2P1p2/P2P1P2/8/3K4/8 w - - 0 1",
+]
+
+# Hàm "cửa vào" của mỗi nhóm; thời gian tính theo cumtime nên gồm cả hàm con.
+# Các nhóm có thể chồng lên nhau (ví dụ has_legal_move sinh nước đi), tổng có thể khác 100%.
+CATEGORIES = {
+    'zobrist': ('zobrist_hash', '_update_zobrist'),
+    'terminal': ('is_game_over', 'is_checkmate', 'is_repetition', 'is_fivefold_repetition',
+                 'is_seventyfive_moves', 'is_fifty_moves', 'is_insufficient_material',
+                 'has_legal_move', 'is_draw_by_rule'),
+    'eval': ('static_score',),
+    'movegen': ('generate_legal_moves', 'generate_legal_captures'),
+    'push/pop': ('push', 'pop'),
+}
+_FUNC_CATEGORY = {func: name for name, funcs in CATEGORIES.items() for func in funcs}
+
+
+def category_shares(stats):
+    """
+    Tỉ lệ thời gian của mỗi nhóm trên tổng thời gian profile.
+    Chỉ cộng cumtime của lời gọi đến từ ngoài nhóm để không đếm trùng đệ quy trong nhóm.
+    """
+    shares = {name: 0.0 for name in CATEGORIES}
+    for (_, _, func), (_, _, _, _, callers) in stats.stats.items():
+        category = _FUNC_CATEGORY.get(func)
+        if category is None:
+            continue
+        for (_, _, caller), caller_stats in callers.items():
+            if _FUNC_CATEGORY.get(caller) != category:
+                shares[category] += caller_stats[3]
+    total = stats.total_tt
+    return {name: value / total for name, value in shares.items()} if total else shares
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimax cProfile breakdown")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile()
+    nodes = 0
+    for fen in PROFILE_FENS:
+        minimax.clear_transposition_table()
+        profiler.enable()
+        result = minimax.find_best_move(fen, max_depth=args.depth, time_limit=600, skill_level=20)
+        profiler.disable()
+        nodes += result['stats']['nodes'] + result['stats']['qnodes']
+
+    stats = pstats.Stats(profiler)
+    print(f"nodes: {nodes}  profiled time: {stats.total_tt:.2f}s")
+    print(f"{'category':<10}{'share':>8}")
+    for name, share in sorted(category_shares(stats).items(), key=lambda item: -item[1]):
+        print(f"{name:<10}{share:>8.1%}")
+    if args.top:
+        print()
+        stats.sort_stats('tottime').print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()